@@ -0,0 +1,16 @@
+from uuid import UUID
+
+from fastapi import APIRouter, HTTPException
+
+from app.core.scheduling.jobs import runner
+from app.core.schemas.top_schemas import JobOut
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("/{job_id}", response_model=JobOut)
+def get_job(job_id: UUID):
+    job = runner.get(job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return job
@@ -0,0 +1,80 @@
+"""Keyset (cursor) pagination for list endpoints.
+
+A page is selected with ``WHERE (sort keys) > (keys of the last row seen)`` over a
+composite index on the same keys, so page N costs the same as page 1. The cursor is
+an opaque url-safe token holding the keys of the last row; lists stay plain JSON
+arrays and the cursor of the next page is returned in the ``X-Next-Cursor`` header
+(absent on the last page).
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Sequence, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import literal, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def page_size(default: int = DEFAULT_PAGE_SIZE):
+    return Query(default=default, ge=1, le=MAX_PAGE_SIZE)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else str(v) for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> List[Any]:
+    """Key values of a cursor, converted to the Python types of ``columns``."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        converted = []
+        for value, column in zip(values, columns):
+            kind = column.type.python_type
+            if kind is datetime:
+                converted.append(datetime.fromisoformat(value))
+            elif kind is UUID:
+                converted.append(UUID(value))
+            else:
+                converted.append(kind(value))
+        return converted
+    except (ValueError, TypeError, binascii.Error, json.JSONDecodeError):
+        raise HTTPException(400, "Invalid cursor")
+
+
+def keyset_page(
+    query,
+    columns: Sequence,
+    cursor: str | None,
+    limit: int,
+    response: Response,
+    descending: bool = False,
+    key=None,
+) -> list:
+    """One page of ``query`` ordered by ``columns`` (unique together, e.g. ending with id).
+
+    ``key`` extracts the sort values from a result row; by default they are read from
+    the row entity by the column names. Sets the next-page header on ``response``.
+    """
+    keys = tuple_(*columns)
+    if cursor:
+        # Значения привязываются с типами колонок, чтобы драйвер сравнивал их как хранимые
+        after = tuple_(*(literal(v, c.type) for v, c in zip(decode_cursor(cursor, columns), columns)))
+        query = query.filter(keys < after if descending else keys > after)
+    order = [c.desc() for c in columns] if descending else list(columns)
+    rows = query.order_by(*order).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        values: Tuple = key(last) if key else tuple(getattr(last, c.key) for c in columns)
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(values)
+    return rows
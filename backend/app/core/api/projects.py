@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
 from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional
 from uuid import UUID
 
 from app.auth.api.deps import get_current_user
+from app.core.api.pagination import keyset_page, page_size
 from app.core.models.course import OutcomeProject, Project
 from app.core.models.review import ReviewProject
+from app.core.scheduling.cache import bump_version
 from app.core.models.users import Membership, Team, User
 from app.core.schemas.top_schemas import (
     ProjectOut,
@@ -63,16 +65,20 @@ def create_project(
 
 @router.get("", response_model=List[ProjectOut])
 def list_projects(
+    response: Response,
     teamId: Optional[UUID] = None,
     q: Optional[str] = Query(default=None, description="search in title/description"),
-    limit: int = 50,
-    offset: int = 0,
+    limit: int = page_size(),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     query = (
         db.query(Project)
-        .options(selectinload(Project.reviews).selectinload(ReviewProject.reviewer))
+        .options(
+            selectinload(Project.outcome),
+            selectinload(Project.reviews).selectinload(ReviewProject.reviewer),
+        )
         .join(Membership, Membership.team_id == Project.team_id)
         .filter(Membership.user_id == current_user.id)
     )
@@ -83,7 +89,7 @@ def list_projects(
         query = query.filter(
             (Project.title.ilike(ilike)) | (Project.description.ilike(ilike))
         )
-    return query.order_by(Project.title).limit(limit).offset(offset).all()
+    return keyset_page(query, (Project.title, Project.id), cursor, limit, response)
 
 @router.get("/{project_id}", response_model=ProjectOut)
 def get_project(
@@ -136,6 +142,7 @@ def update_project(
             proj.outcome.acceptance_criteria = payload.outcome.acceptanceCriteria
         if payload.outcome.deadline is not None:
             proj.outcome.deadline = payload.outcome.deadline
+            bump_version(db, proj.id)
         if payload.outcome.result is not None:
             proj.outcome.result = payload.outcome.result
     db.commit()
@@ -1,10 +1,11 @@
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
 from sqlalchemy.orm import Session
 
 from app.auth.api.deps import get_current_user
+from app.core.api.pagination import keyset_page, page_size
 from app.core.models.review import ReviewTask, ReviewProject
 from app.core.models.task import Task
 from app.core.models.course import Project
@@ -23,7 +24,10 @@ router = APIRouter(prefix="/reviews", tags=["reviews"])
 
 @router.get("/tasks", response_model=List[ReviewTaskWithTask])
 def list_task_reviews(
+    response: Response,
     status_filter: Optional[str] = Query(default=None, description="Filter by status"),
+    limit: int = page_size(100),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -35,7 +39,10 @@ def list_task_reviews(
     )
     if status_filter:
         q = q.filter(ReviewTask.status == status_filter)
-    rows = q.order_by(ReviewTask.created_at.desc()).all()
+    rows = keyset_page(
+        q, (ReviewTask.created_at, ReviewTask.id), cursor, limit, response,
+        descending=True, key=lambda row: (row[0].created_at, row[0].id),
+    )
     result: List[ReviewTaskWithTask] = []
     for review, task, project_title in rows:
         setattr(task, "project_title", project_title)
@@ -224,7 +231,10 @@ def get_project_review(
 
 @router.get("/projects", response_model=List[ReviewProjectWithProject])
 def list_project_reviews(
+    response: Response,
     status_filter: Optional[str] = Query(default=None, description="Filter by status"),
+    limit: int = page_size(100),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -235,7 +245,10 @@ def list_project_reviews(
     )
     if status_filter:
         q = q.filter(ReviewProject.status == status_filter)
-    rows = q.order_by(ReviewProject.created_at.desc()).all()
+    rows = keyset_page(
+        q, (ReviewProject.created_at, ReviewProject.id), cursor, limit, response,
+        descending=True, key=lambda row: (row[0].created_at, row[0].id),
+    )
     result: List[ReviewProjectWithProject] = []
     for review, project in rows:
         result.append(
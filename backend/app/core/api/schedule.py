@@ -0,0 +1,520 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session, defer
+
+from app.core.models.baseline import ScheduleBaseline
+from app.core.models.task import Dependency, Task
+from app.core.scheduling import baselines, earned_value, leveling, risk
+from app.core.scheduling.cache import bump_version, current_version, schedule_cache
+from app.core.scheduling.engine import DependencyEdge, ScheduleGraph
+from app.core.scheduling.store import (
+    load_assignments,
+    load_progress,
+    load_schedule_graph,
+    lock_project_schedule,
+    write_windows,
+)
+from app.core.schemas.top_schemas import (
+    BaselineIn,
+    BaselineOut,
+    BaselineSlipOut,
+    BaselineVarianceOut,
+    CriticalPathOut,
+    CriticalPathTaskOut,
+    DeadlineViolation,
+    EarnedValueOut,
+    GanttOut,
+    LevelingDelayOut,
+    LevelingOut,
+    ProjectRiskOut,
+    ProjectScheduleOut,
+    RiskTaskOut,
+    ScheduleSimulationIn,
+    ScheduleSimulationOut,
+    ScheduleTaskOut,
+    SimulatedTaskDelta,
+)
+from app.db import get_db
+
+router = APIRouter(prefix="/projects/{project_id}", tags=["schedule"])
+
+
+def _project_version_or_404(db: Session, project_id: UUID) -> int:
+    version = current_version(db, project_id)
+    if version is None:
+        raise HTTPException(404, "Project not found")
+    return version
+
+
+def _cached_json(request: Request, key, version: int, body: bytes) -> Response:
+    # В ETag весь ключ: у версии проекта нет id базового плана, лимита и т.п.
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=8).hexdigest()
+    etag = f'W/"{digest}-{version}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+def _hours(value) -> float | None:
+    return value.total_seconds() / 3600 if value is not None else None
+
+
+def _build_schedule(db: Session, project_id: UUID, version: int) -> bytes:
+    graph = load_schedule_graph(db, project_id)
+    result = graph.analyze()
+    tasks = [
+        ScheduleTaskOut(
+            id=tid,
+            planned_start=graph.nodes[tid].start,
+            planned_end=graph.nodes[tid].end,
+            critical=tid in result.critical,
+            slack_hours=_hours(result.total_float.get(tid)) or 0.0,
+        )
+        for tid in result.order
+    ]
+    infeasible = [
+        DeadlineViolation(
+            id=tid,
+            deadline=graph.project_deadline,
+            planned_end=graph.nodes[tid].end,
+            overrun_hours=_hours(overrun),
+        )
+        for tid, overrun in result.infeasible.items()
+    ]
+    return ProjectScheduleOut(
+        project_id=project_id, version=version, tasks=tasks, infeasible=infeasible
+    ).model_dump_json().encode()
+
+
+@router.get("/schedule", response_model=ProjectScheduleOut)
+def get_project_schedule(project_id: UUID, request: Request, db: Session = Depends(get_db)):
+    """Precomputed schedule snapshot; served from cache while the project is unchanged."""
+    version = _project_version_or_404(db, project_id)
+    key = ("schedule", project_id)
+    body = schedule_cache.get(key, version)
+    if body is None:
+        body = _build_schedule(db, project_id, version)
+        schedule_cache.put(key, version, body)
+    return _cached_json(request, key, version, body)
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+ONE_MS = timedelta(milliseconds=1)
+
+
+def _epoch_ms(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // ONE_MS
+
+
+def _build_gantt(db: Session, project_id: UUID, version: int) -> bytes:
+    # Только нужные колонки через Core select: строки-кортежи без ORM-объектов
+    rows = db.execute(
+        select(Task.id, Task.parent_id, Task.title, Task.status, Task.planned_start, Task.planned_end)
+        .where(Task.project_id == project_id)
+        .order_by(Task.planned_start, Task.id)
+    ).all()
+    index = {row[0]: i for i, row in enumerate(rows)}
+    edges = db.execute(
+        select(Dependency.predecessor_task_id, Dependency.successor_task_id, Dependency.type, Dependency.lag)
+        .join(Task, Dependency.successor_task_id == Task.id)
+        .where(Task.project_id == project_id)
+    ).all()
+    edges = [e for e in edges if e[0] in index]
+    return GanttOut(
+        project_id=project_id,
+        version=version,
+        ids=[r[0] for r in rows],
+        parents=[index.get(r[1], -1) for r in rows],
+        titles=[r[2] for r in rows],
+        statuses=[r[3].value for r in rows],
+        starts=[_epoch_ms(r[4]) for r in rows],
+        ends=[_epoch_ms(r[5]) for r in rows],
+        edge_from=[index[e[0]] for e in edges],
+        edge_to=[index[e[1]] for e in edges],
+        edge_types=[e[2].value for e in edges],
+        edge_lags=[e[3] or 0 for e in edges],
+    ).model_dump_json().encode()
+
+
+@router.get("/gantt", response_model=GanttOut)
+def get_gantt(project_id: UUID, request: Request, db: Session = Depends(get_db)):
+    """Columnar timeline feed: only what the Gantt chart draws, cached per version."""
+    version = _project_version_or_404(db, project_id)
+    key = ("gantt", project_id)
+    body = schedule_cache.get(key, version)
+    if body is None:
+        body = _build_gantt(db, project_id, version)
+        schedule_cache.put(key, version, body)
+    return _cached_json(request, key, version, body)
+
+
+def _build_critical_path(db: Session, project_id: UUID, version: int) -> bytes:
+    graph = load_schedule_graph(db, project_id)
+    # Ранние даты считаем прямым проходом в памяти, база не меняется; сдвиг ALAP-задач
+    # на резервы не влияет, они берутся из result.early_*
+    graph.release_alap()
+    result = graph.schedule()
+    if result.cycle:
+        raise HTTPException(status.HTTP_409_CONFLICT, "Project dependencies contain a cycle")
+    tasks = []
+    for tid in result.order:
+        node = graph.nodes[tid]
+        tasks.append(
+            CriticalPathTaskOut(
+                id=tid,
+                early_start=result.early_start.get(tid, node.start),
+                early_finish=result.early_finish.get(tid, node.end),
+                late_start=result.late_start.get(tid),
+                late_finish=result.late_finish.get(tid),
+                total_float_hours=_hours(result.total_float.get(tid)),
+                free_float_hours=_hours(result.free_float.get(tid)),
+                critical=tid in result.critical,
+            )
+        )
+    ends = [n.end for n in graph.nodes.values() if n.end]
+    return CriticalPathOut(
+        project_id=project_id,
+        version=version,
+        project_finish=max(ends) if ends else None,
+        chain=[tid for tid in result.order if tid in result.critical],
+        tasks=tasks,
+    ).model_dump_json().encode()
+
+
+@router.get("/critical-path", response_model=CriticalPathOut)
+def get_critical_path(project_id: UUID, request: Request, db: Session = Depends(get_db)):
+    """Early/late dates, total and free float and the critical chain; cached per version."""
+    version = _project_version_or_404(db, project_id)
+    key = ("critical-path", project_id)
+    body = schedule_cache.get(key, version)
+    if body is None:
+        body = _build_critical_path(db, project_id, version)
+        schedule_cache.put(key, version, body)
+    return _cached_json(request, key, version, body)
+
+
+def _like(value: datetime | None, reference: datetime | None) -> datetime | None:
+    """Bring a request datetime to the awareness of the stored values it is compared with."""
+    if value is None or reference is None:
+        return value
+    if reference.tzinfo is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    if reference.tzinfo is None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+@router.post("/schedule/simulate", response_model=ScheduleSimulationOut)
+def simulate_schedule(project_id: UUID, payload: ScheduleSimulationIn, db: Session = Depends(get_db)):
+    """Project the effect of hypothetical edits on an in-memory copy; nothing is written."""
+    version = _project_version_or_404(db, project_id)
+    graph = load_schedule_graph(db, project_id)
+    stored = graph.snapshot()
+    nodes = graph.nodes
+    reference = next((n.start for n in nodes.values() if n.start), None)
+
+    referenced = {edit.id for edit in payload.tasks}
+    for dep in payload.addDependencies:
+        referenced |= {dep.predecessorId, dep.successorId}
+    if referenced - nodes.keys():
+        raise HTTPException(404, "Task not found")
+
+    removed = {(d.predecessorId, d.successorId) for d in payload.removeDependencies}
+    added = {}
+    for dep in payload.addDependencies:
+        if dep.predecessorId == dep.successorId:
+            raise HTTPException(400, "A task cannot depend on itself")
+        added[(dep.predecessorId, dep.successorId)] = DependencyEdge(
+            dep.predecessorId, dep.successorId, dep.type, dep.lag
+        )
+    # Пары, чьи связи заменяются, собираем один раз, а не для каждого ребра
+    replaced = removed | added.keys()
+    edges = [
+        edge
+        for edge_list in graph.succs.values()
+        for edge in edge_list
+        if (edge.predecessor_id, edge.successor_id) not in replaced
+    ]
+    edges.extend(added.values())
+
+    seeds = {succ for _, succ in replaced}
+    for edit in payload.tasks:
+        node = nodes[edit.id]
+        seeds.add(node.id)
+        if edit.duration is not None:
+            node.duration = edit.duration
+        if edit.plannedStart is not None:
+            node.start = _like(edit.plannedStart, reference)
+        if edit.shiftHours and node.start:
+            node.start += timedelta(hours=edit.shiftHours)
+        if node.start and (edit.duration is not None or edit.plannedStart is not None or edit.shiftHours):
+            node.end = graph.clock.add(node.start, graph.clock.duration(node.duration))
+        if "deadline" in edit.model_fields_set:
+            node.deadline = _like(edit.deadline, reference)
+
+    simulated = ScheduleGraph(nodes.values(), edges, graph.project_deadline, graph.clock)
+    order, cycle = simulated.event_order()
+    if cycle:
+        raise HTTPException(
+            status.HTTP_409_CONFLICT,
+            {"message": "Simulated dependencies contain a cycle", "tasks": [str(tid) for tid in cycle]},
+        )
+    simulated.forward_pass(order, seeds)
+
+    deltas = []
+    violations = []
+    for tid, node in nodes.items():
+        start, end = stored[tid]
+        if (node.start, node.end) != (start, end):
+            shift = (node.end - end) if node.end and end else timedelta(0)
+            deltas.append(
+                SimulatedTaskDelta(
+                    id=tid,
+                    planned_start=start,
+                    planned_end=end,
+                    new_start=node.start,
+                    new_end=node.end,
+                    shift_hours=_hours(shift),
+                )
+            )
+        if node.deadline and node.end and node.end > node.deadline:
+            violations.append(
+                DeadlineViolation(
+                    id=tid,
+                    deadline=node.deadline,
+                    planned_end=node.end,
+                    overrun_hours=_hours(node.end - node.deadline),
+                )
+            )
+
+    ends = [n.end for n in nodes.values() if n.end]
+    finish = max(ends) if ends else None
+    overrun = None
+    if finish and graph.project_deadline and finish > graph.project_deadline:
+        overrun = _hours(finish - graph.project_deadline)
+    return ScheduleSimulationOut(
+        project_id=project_id,
+        version=version,
+        project_finish=finish,
+        project_overrun_hours=overrun,
+        deltas=deltas,
+        violations=violations,
+    )
+
+
+@router.post("/schedule/level", response_model=LevelingOut)
+def level_schedule(project_id: UUID, apply: bool = False, db: Session = Depends(get_db)):
+    """Delay tasks so that no assignee is booked on two tasks at once.
+
+    Bookings of the same users in other projects count as busy time and are not moved.
+    Without ``apply`` this is a preview; with it the leveled windows are written.
+    """
+    version = _project_version_or_404(db, project_id)
+    if apply:
+        lock_project_schedule(db, project_id)
+    graph = load_schedule_graph(db, project_id)
+    assignees, busy = load_assignments(db, project_id)
+    try:
+        result = leveling.level(graph, assignees, busy)
+    except ValueError as exc:
+        raise HTTPException(status.HTTP_409_CONFLICT, str(exc))
+    if apply:
+        write_windows(db, result.windows)
+        version = bump_version(db, project_id)
+        db.commit()
+
+    delays = [
+        LevelingDelayOut(
+            id=tid,
+            early_start=result.early_starts[tid],
+            leveled_start=graph.nodes[tid].start,
+            leveled_end=graph.nodes[tid].end,
+            delay_hours=_hours(delay),
+        )
+        for tid, delay in sorted(result.delays.items(), key=lambda item: graph.nodes[item[0]].start)
+    ]
+    return LevelingOut(
+        project_id=project_id,
+        version=version,
+        applied=apply,
+        finish_before=result.finish_before,
+        finish_after=result.finish_after,
+        delays=delays,
+    )
+
+
+def _build_risk(db: Session, project_id: UUID, version: int, samples: int, seed: int) -> bytes:
+    graph = load_schedule_graph(db, project_id)
+    estimates = {
+        tid: (optimistic, likely, pessimistic)
+        for tid, optimistic, likely, pessimistic in db.query(
+            Task.id, Task.duration_optimistic, Task.duration_likely, Task.duration_pessimistic
+        ).filter(Task.project_id == project_id)
+    }
+    if not graph.nodes:
+        raise HTTPException(400, "Project has no tasks")
+    ends = [n.end for n in graph.nodes.values() if n.end]
+    try:
+        model = risk.RiskModel(graph, estimates)
+    except ValueError as exc:
+        raise HTTPException(status.HTTP_409_CONFLICT, str(exc))
+    result = model.run(samples, seed)
+    return ProjectRiskOut(
+        project_id=project_id,
+        version=version,
+        samples=result.samples,
+        p50=result.percentiles[50],
+        p80=result.percentiles[80],
+        p95=result.percentiles[95],
+        mean_finish=result.mean_finish,
+        planned_finish=max(ends) if ends else None,
+        tasks=[RiskTaskOut(id=tid, criticality=value) for tid, value in result.criticality.items()],
+    ).model_dump_json().encode()
+
+
+@router.get("/risk", response_model=ProjectRiskOut)
+def get_schedule_risk(
+    project_id: UUID,
+    request: Request,
+    samples: int = Query(default=1000, ge=100, le=20000),
+    seed: int = 0,
+    db: Session = Depends(get_db),
+):
+    """Monte Carlo completion percentiles and task criticality from PERT estimates."""
+    if not risk.available():
+        raise HTTPException(status.HTTP_501_NOT_IMPLEMENTED, "Risk analysis requires numpy")
+    version = _project_version_or_404(db, project_id)
+    key = ("risk", project_id, samples, seed)
+    body = schedule_cache.get(key, version)
+    if body is None:
+        body = _build_risk(db, project_id, version, samples, seed)
+        schedule_cache.put(key, version, body)
+    return _cached_json(request, key, version, body)
+
+
+@router.get("/earned-value", response_model=EarnedValueOut)
+def get_earned_value(
+    project_id: UUID,
+    as_of: datetime | None = Query(default=None, alias="asOf"),
+    db: Session = Depends(get_db),
+):
+    """Planned and earned value, actual cost, SPI and CPI of the project at ``asOf`` (now by default)."""
+    _project_version_or_404(db, project_id)
+    as_of = as_of or datetime.now(timezone.utc)
+    value = earned_value.compute(load_progress(db, [project_id]), [project_id], as_of)[project_id]
+    return EarnedValueOut(project_id=project_id, as_of=as_of, **value.as_dict())
+
+
+def _baseline_or_404(db: Session, project_id: UUID, name: str) -> ScheduleBaseline:
+    baseline = (
+        db.query(ScheduleBaseline)
+        .options(defer(ScheduleBaseline.data))
+        .filter(ScheduleBaseline.project_id == project_id, ScheduleBaseline.name == name)
+        .first()
+    )
+    if baseline is None:
+        raise HTTPException(404, "Baseline not found")
+    return baseline
+
+
+def _live_windows(db: Session, project_id: UUID):
+    return db.query(Task.id, Task.planned_start, Task.planned_end).filter(Task.project_id == project_id)
+
+
+@router.post("/baselines", response_model=BaselineOut, status_code=status.HTTP_201_CREATED)
+def create_baseline(project_id: UUID, payload: BaselineIn, db: Session = Depends(get_db)):
+    """Freeze the current planned windows of all project tasks under ``name``."""
+    _project_version_or_404(db, project_id)
+    exists = (
+        db.query(ScheduleBaseline.id)
+        .filter(ScheduleBaseline.project_id == project_id, ScheduleBaseline.name == payload.name)
+        .first()
+    )
+    if exists:
+        raise HTTPException(status.HTTP_409_CONFLICT, "Baseline with this name already exists")
+    blob, count = baselines.pack(_live_windows(db, project_id).order_by(Task.id))
+    baseline = ScheduleBaseline(project_id=project_id, name=payload.name, task_count=count, data=blob)
+    db.add(baseline)
+    db.commit()
+    db.refresh(baseline)
+    return baseline
+
+
+@router.get("/baselines", response_model=list[BaselineOut])
+def list_baselines(project_id: UUID, db: Session = Depends(get_db)):
+    _project_version_or_404(db, project_id)
+    # Блоб не нужен для списка, поэтому не загружаем его
+    return (
+        db.query(ScheduleBaseline)
+        .options(defer(ScheduleBaseline.data))
+        .filter(ScheduleBaseline.project_id == project_id)
+        .order_by(ScheduleBaseline.created_at, ScheduleBaseline.name)
+        .all()
+    )
+
+
+@router.delete("/baselines/{name}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_baseline(project_id: UUID, name: str, db: Session = Depends(get_db)):
+    baseline = _baseline_or_404(db, project_id, name)
+    db.delete(baseline)
+    db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+def _build_variance(db: Session, project_id: UUID, version: int, baseline: ScheduleBaseline, limit: int) -> bytes:
+    result = baselines.variance(baseline.data, _live_windows(db, project_id), limit)
+    finish_slip = None
+    if result.baseline_finish and result.planned_finish:
+        finish_slip = _hours(result.planned_finish - result.baseline_finish)
+    return BaselineVarianceOut(
+        project_id=project_id,
+        baseline_id=baseline.id,
+        name=baseline.name,
+        version=version,
+        baseline_finish=result.baseline_finish,
+        planned_finish=result.planned_finish,
+        finish_slip_hours=finish_slip,
+        compared=result.compared,
+        late=result.late,
+        early=result.early,
+        slips=[
+            BaselineSlipOut(
+                id=slip.id,
+                baseline_start=slip.baseline_start,
+                baseline_end=slip.baseline_end,
+                planned_start=slip.planned_start,
+                planned_end=slip.planned_end,
+                start_slip_hours=_hours(slip.start_slip),
+                finish_slip_hours=_hours(slip.finish_slip),
+            )
+            for slip in result.slips
+        ],
+        added=result.added,
+        removed=result.removed,
+    ).model_dump_json().encode()
+
+
+@router.get("/baselines/{name}/variance", response_model=BaselineVarianceOut)
+def get_baseline_variance(
+    project_id: UUID,
+    name: str,
+    request: Request,
+    limit: int = Query(default=100, ge=1, le=10000),
+    db: Session = Depends(get_db),
+):
+    """Slips of the live schedule against a baseline, largest finish slips first."""
+    version = _project_version_or_404(db, project_id)
+    baseline = _baseline_or_404(db, project_id, name)
+    # Базовый план неизменяем, поэтому в ключе достаточно его id
+    key = ("variance", project_id, baseline.id, limit)
+    body = schedule_cache.get(key, version)
+    if body is None:
+        body = _build_variance(db, project_id, version, baseline, limit)
+        schedule_cache.put(key, version, body)
+    return _cached_json(request, key, version, body)
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
-from sqlalchemy.orm import Session, selectinload
-from typing import List, Optional
-from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status, Body
+from fastapi.responses import JSONResponse
+from sqlalchemy import insert, or_, select, tuple_
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import List, Optional, Union
+from uuid import UUID, uuid4
 from datetime import datetime, timedelta
 
 from app.core.models.course import Project
@@ -11,19 +13,54 @@ from app.core.models.review import ReviewTask
 from app.core.models.users import Membership, User
 from app.core.models.comments import Comment
 from app.core.models.enums import DepType, CompletionRule, TaskStatus
+from app.core.api.pagination import keyset_page, page_size
 from app.core.schemas.top_schemas import (
     TaskOut,
     TaskCreate,
     TaskUpdate,
+    TaskBatchCreate,
+    TaskBatchOut,
+    TaskBatchUpdate,
     ReviewTaskOut,
     ReviewCreate,
+    JobOut,
+    DeadlineViolation,
+    ScheduleDeltaOut,
+    TaskWindowOut,
     CommentOut,
     CommentCreate,
 )
-from app.db import get_db
+from app.core.scheduling.autoschedule import auto_scheduler
+from app.core.scheduling.cache import bump_version
+from app.core.scheduling.cycles import CycleError, registry as cycle_registry
+from app.core.scheduling.jobs import Job, JobQueueFull, runner as job_runner
+from app.core.scheduling.singleflight import recalc_flights
+from app.core.scheduling.store import (
+    project_clock,
+    project_deadline,
+    recalculate_project,
+    reschedule_downstream,
+    schedule_writer,
+)
+from app.db import SessionLocal, get_db
+from app.query_budget import query_budget
 
 router = APIRouter(prefix="/projects/{project_id}/tasks", tags=["tasks"])
 
+ESTIMATE_FIELDS = (
+    ("durationOptimistic", "duration_optimistic"),
+    ("durationLikely", "duration_likely"),
+    ("durationPessimistic", "duration_pessimistic"),
+)
+
+# Всё, что читает TaskOut, грузится фиксированным числом запросов на любой размер страницы
+TASK_OUT_LOADERS = (
+    joinedload(Task.outcome),
+    selectinload(Task.assignees),
+    selectinload(Task.predecessors),
+    selectinload(Task.reviews).joinedload(ReviewTask.reviewer),
+)
+
 def _ensure_same_project_or_404(db: Session, project_id: UUID):
     proj = db.get(Project, project_id)
     if not proj:
@@ -43,142 +80,47 @@ def _child_must_fit_parent_window(parent_task: Task, start_dt, end_dt):
 
 
 def _recalculate_project_schedule(db: Session, project_id: UUID):
-    """Simple recalculation to enforce base rules."""
-    project = db.get(Project, project_id)
-    project_deadline = project.outcome.deadline if project and project.outcome else None
-    tasks = db.query(Task).filter(Task.project_id == project_id).all()
-    by_id = {t.id: t for t in tasks}
-    movable_tasks = [t for t in tasks if t.status not in (TaskStatus.Done, TaskStatus.Canceled)]
-    deps = (
-        db.query(Dependency)
-        .join(Task, Dependency.successor_task_id == Task.id)
-        .filter(Task.project_id == project_id)
-        .all()
+    """Recalculate the project schedule in one critical-path pass; 409 on a cycle."""
+    result = recalculate_project(db, project_id)
+    if result.cycle:
+        titles = dict(db.query(Task.id, Task.title).filter(Task.id.in_(result.cycle)).all())
+        raise HTTPException(
+            status.HTTP_409_CONFLICT,
+            {
+                "message": "Project dependencies contain a cycle",
+                "tasks": [{"id": str(tid), "title": titles.get(tid)} for tid in result.cycle],
+            },
+        )
+    return result
+
+def _cycle_conflict(exc: CycleError, titles: dict) -> HTTPException:
+    return HTTPException(
+        status.HTTP_409_CONFLICT,
+        {
+            "message": "Dependency would create a cycle: "
+            + " -> ".join(titles.get(tid, str(tid)) for tid in exc.path),
+            "path": [{"id": str(tid), "title": titles.get(tid)} for tid in exc.path],
+        },
     )
-    deps_by_successor = {}
-    deps_by_pred = {}
-    for dep in deps:
-        deps_by_successor.setdefault(dep.successor_task_id, []).append(dep)
-        deps_by_pred.setdefault(dep.predecessor_task_id, []).append(dep)
-
-    def ensure_times(task: Task):
-        if task.status in (TaskStatus.Done, TaskStatus.Canceled):
-            return
-        # duration хранится в днях; переводим в часы для расчётов
-        dur_hours = max(float(task.duration or 0) * 24.0, 1.0 / 60.0)
-        start = task.planned_start
-        end = task.deadline or task.planned_end
-
-        if not start and not end:
-            end = datetime.utcnow()
-            start = end - timedelta(hours=dur_hours)
-        elif start and not end:
-            end = start + timedelta(hours=dur_hours)
-        elif end and not start:
-            start = end - timedelta(hours=dur_hours)
-
-        if task.parent_id:
-            parent = by_id.get(task.parent_id)
-            if parent:
-                parent_start = parent.planned_start
-                parent_end = parent.deadline or parent.planned_end
-
-                if parent_start and start and start < parent_start:
-                    start = parent_start
-                    end = start + timedelta(hours=dur_hours)
-
-                if parent_end and end and end > parent_end:
-                    end = parent_end
-                    start = end - timedelta(hours=dur_hours)
-
-                if parent_start and start and start < parent_start:
-                    start = parent_start
-                    if end and end < start:
-                        end = start
-
-        dep_start_constraint = None
-        dep_end_constraint = None
-        for dep in deps_by_successor.get(task.id, []):
-            pred = by_id.get(dep.predecessor_task_id)
-            if not pred:
-                pred = db.get(Task, dep.predecessor_task_id)
-                if not pred or pred.project_id != project_id:
-                    continue
-            pred_start = pred.planned_start
-            pred_end = pred.deadline or pred.planned_end
-            lag_delta = timedelta(hours=float(dep.lag or 0))
-            if dep.type == DepType.FS and pred_end:
-                candidate = pred_end + lag_delta
-                dep_start_constraint = candidate if dep_start_constraint is None else max(dep_start_constraint, candidate)
-            elif dep.type == DepType.SS and pred_start:
-                candidate = pred_start + lag_delta
-                dep_start_constraint = candidate if dep_start_constraint is None else max(dep_start_constraint, candidate)
-            elif dep.type == DepType.FF and pred_end:
-                candidate = pred_end + lag_delta
-                dep_end_constraint = candidate if dep_end_constraint is None else max(dep_end_constraint, candidate)
-            elif dep.type == DepType.SF and pred_start:
-                candidate = pred_start + lag_delta
-                dep_end_constraint = candidate if dep_end_constraint is None else max(dep_end_constraint, candidate)
-
-        if dep_start_constraint and (not start or start < dep_start_constraint):
-            start = dep_start_constraint
-            end = start + timedelta(hours=dur_hours)
-
-        if dep_end_constraint and (not end or end < dep_end_constraint):
-            end = dep_end_constraint
-            start = end - timedelta(hours=dur_hours)
-
-        if end and start and end < start:
-            end = start
-
-        if project_deadline and end and end > project_deadline:
-            end = project_deadline
-            start = end - timedelta(hours=dur_hours)
-
-        # Re-assert dependency constraints after deadline clamp
-        if dep_start_constraint and start and start < dep_start_constraint:
-            start = dep_start_constraint
-            end = start + timedelta(hours=dur_hours)
-
-        if dep_end_constraint and end and end < dep_end_constraint:
-            end = dep_end_constraint
-            start = end - timedelta(hours=dur_hours)
-
-        task.planned_start = start
-        task.planned_end = end
-
-    # Build simple topological order to process predecessors first when possible
-    indeg = {t.id: 0 for t in movable_tasks}
-    for succ_id, dep_list in deps_by_successor.items():
-        if succ_id not in indeg:
-            continue
-        indeg[succ_id] = indeg.get(succ_id, 0) + len(dep_list)
-    queue = [tid for tid, d in indeg.items() if d == 0]
-    topo: list[UUID] = []
-    while queue:
-        cur = queue.pop(0)
-        topo.append(cur)
-        for dep in deps_by_pred.get(cur, []):
-            succ = dep.successor_task_id
-            if succ in indeg:
-                indeg[succ] -= 1
-                if indeg[succ] == 0:
-                    queue.append(succ)
-    if len(topo) != len(movable_tasks):
-        # Cycle detected; fallback to original order of movable tasks
-        topo = [t.id for t in movable_tasks]
-
-    # Apply dependency propagation multiple passes to stabilize schedules
-    ordered_tasks = [by_id[tid] for tid in topo]
-    for _ in range(max(1, len(ordered_tasks) * 2)):
-        before = [(t.id, t.planned_start, t.deadline or t.planned_end) for t in ordered_tasks]
-        for t in ordered_tasks:
-            ensure_times(t)
-        after = [(t.id, t.planned_start, t.deadline or t.planned_end) for t in ordered_tasks]
-        if before == after:
-            break
 
+def _guard_dependency_cycles(db: Session, project_id: UUID, task_ids: List[UUID]):
+    """Reject the pending dependency changes of ``task_ids`` if they close a loop."""
     db.flush()
+    try:
+        cycle_registry.check_tasks(db, project_id, task_ids)
+    except CycleError as exc:
+        titles = dict(db.query(Task.id, Task.title).filter(Task.id.in_(exc.path)).all())
+        raise _cycle_conflict(exc, titles)
+
+def _queue_auto_scheduling(db: Session, project_id: UUID, task_ids: List[UUID]):
+    """Hand the touched auto-scheduled tasks and their auto-scheduled successors to the auto-scheduler."""
+    successors = select(Dependency.successor_task_id).where(Dependency.predecessor_task_id.in_(task_ids))
+    auto = (
+        db.query(Task.id)
+        .filter(Task.auto_scheduled.is_(True), or_(Task.id.in_(task_ids), Task.id.in_(successors)))
+        .all()
+    )
+    auto_scheduler.enqueue(project_id, [tid for tid, in auto])
 
 def _resolve_assignees(
     db: Session, project: Project, assignee_ids: Optional[List[UUID]]
@@ -260,26 +202,26 @@ def _ensure_dependency_exists(
             )
         )
 
-def _clamp_child_to_parent_window(parent_task: Task, start_dt, end_dt, duration_hours: float):
+def _clamp_child_to_parent_window(parent_task: Task, start_dt, end_dt, dur_delta: timedelta, clock):
     parent_start = parent_task.planned_start
     parent_end = parent_task.deadline or parent_task.planned_end
 
     if parent_start and start_dt and start_dt < parent_start:
         start_dt = parent_start
-        end_dt = start_dt + timedelta(hours=duration_hours)
+        end_dt = clock.add(start_dt, dur_delta)
 
     if parent_end and end_dt and end_dt > parent_end:
         end_dt = parent_end
-        start_dt = end_dt - timedelta(hours=duration_hours)
+        start_dt = clock.add(end_dt, -dur_delta)
         if parent_start and start_dt < parent_start:
             start_dt = parent_start
-            end_dt = start_dt + timedelta(hours=duration_hours)
+            end_dt = clock.add(start_dt, dur_delta)
 
     return start_dt, end_dt
 
 
 def _apply_dependency_constraints(
-    task: Task, deps: list[Dependency], db: Session
+    task: Task, deps: list[Dependency], db: Session, clock
 ) -> tuple[datetime | None, datetime | None]:
     """Return adjusted (start, end) that satisfy dependency lags for the task."""
     dep_start_constraint = None
@@ -293,36 +235,35 @@ def _apply_dependency_constraints(
         lag_delta = timedelta(hours=float(dep.lag or 0))
 
         if dep.type == DepType.FS and pred_end:
-            candidate = pred_end + lag_delta
+            candidate = clock.add(pred_end, lag_delta)
             dep_start_constraint = candidate if dep_start_constraint is None else max(dep_start_constraint, candidate)
         elif dep.type == DepType.SS and pred_start:
-            candidate = pred_start + lag_delta
+            candidate = clock.add(pred_start, lag_delta)
             dep_start_constraint = candidate if dep_start_constraint is None else max(dep_start_constraint, candidate)
         elif dep.type == DepType.FF and pred_end:
-            candidate = pred_end + lag_delta
+            candidate = clock.add(pred_end, lag_delta)
             dep_end_constraint = candidate if dep_end_constraint is None else max(dep_end_constraint, candidate)
         elif dep.type == DepType.SF and pred_start:
-            candidate = pred_start + lag_delta
+            candidate = clock.add(pred_start, lag_delta)
             dep_end_constraint = candidate if dep_end_constraint is None else max(dep_end_constraint, candidate)
 
-    duration_hours = max(float(task.duration or 0) * 24.0, 1.0 / 60.0)
-    dur_delta = timedelta(hours=duration_hours)
+    dur_delta = clock.duration(task.duration)
 
     start = task.planned_start
     end = task.deadline or task.planned_end
 
     if not start and end:
-        start = end - dur_delta
+        start = clock.add(end, -dur_delta)
     elif start and not end:
-        end = start + dur_delta
+        end = clock.add(start, dur_delta)
 
     if dep_start_constraint and start and start < dep_start_constraint:
         start = dep_start_constraint
-        end = start + dur_delta
+        end = clock.add(start, dur_delta)
 
     if dep_end_constraint and end and end < dep_end_constraint:
         end = dep_end_constraint
-        start = end - dur_delta
+        start = clock.add(end, -dur_delta)
 
     if end and start and end < start:
         end = start
@@ -330,6 +271,62 @@ def _apply_dependency_constraints(
     return start, end
 
 
+def _apply_task_fields(t: Task, payload: TaskUpdate, clock):
+    """Copy plain fields of ``payload`` onto the task and rebuild its window from the duration."""
+    duration_changed = False
+    deadline_provided = "deadline" in payload.model_fields_set
+    planned_start_provided = "plannedStart" in payload.model_fields_set
+    planned_end_provided = "plannedEnd" in payload.model_fields_set
+
+    if payload.title is not None:
+        t.title = payload.title
+    if payload.description is not None:
+        t.description = payload.description
+    if payload.duration is not None:
+        t.duration = payload.duration
+        duration_changed = True
+    for field, column in ESTIMATE_FIELDS:
+        if field in payload.model_fields_set:
+            setattr(t, column, getattr(payload, field))
+    estimates = [getattr(t, column) for _, column in ESTIMATE_FIELDS]
+    known = [v for v in estimates if v is not None]
+    if known != sorted(known):
+        raise HTTPException(400, "duration estimates must satisfy optimistic <= likely <= pessimistic")
+    if planned_start_provided and payload.plannedStart is not None:
+        t.planned_start = payload.plannedStart
+    if planned_end_provided and payload.plannedEnd is not None:
+        if payload.plannedStart is None and t.planned_start and payload.plannedEnd < t.planned_start:
+            raise HTTPException(400, "plannedEnd must be >= plannedStart")
+        t.planned_end = payload.plannedEnd
+    if deadline_provided and payload.deadline is not None and t.planned_start and payload.deadline < t.planned_start:
+        raise HTTPException(400, "deadline must be >= plannedStart")
+    if deadline_provided:
+        t.deadline = payload.deadline
+    if payload.autoScheduled is not None:
+        t.auto_scheduled = payload.autoScheduled
+    if payload.scheduleMode is not None:
+        t.schedule_mode = payload.scheduleMode
+    if payload.completionRule is not None:
+        t.completion_rule = payload.completionRule
+    if payload.outcomeResult is not None:
+        t.outcome.result = payload.outcomeResult
+
+    dur_delta = clock.duration(t.duration)
+
+    if planned_start_provided and t.planned_start and not planned_end_provided:
+        t.planned_end = clock.add(t.planned_start, dur_delta)
+    elif planned_end_provided and t.planned_end and not planned_start_provided:
+        t.planned_start = clock.add(t.planned_end, -dur_delta)
+    elif duration_changed:
+        if t.planned_start:
+            t.planned_end = clock.add(t.planned_start, dur_delta)
+        elif t.planned_end:
+            t.planned_start = clock.add(t.planned_end, -dur_delta)
+
+    if t.planned_start and t.planned_end and t.planned_end < t.planned_start:
+        t.planned_end = t.planned_start
+
+
 def _apply_completion_rule(db: Session, task: Task, now: datetime):
     """Update task status according to its completion rule and assignee progress."""
     if task.actual_start is None:
@@ -379,10 +376,14 @@ def create_task(project_id: UUID, payload: TaskCreate, db: Session = Depends(get
         title=payload.title,
         description=payload.description,
         duration=payload.duration,
+        duration_optimistic=payload.durationOptimistic,
+        duration_likely=payload.durationLikely,
+        duration_pessimistic=payload.durationPessimistic,
         planned_start=payload.plannedStart,
         planned_end=payload.plannedEnd,
         deadline=payload.deadline,
         auto_scheduled=payload.autoScheduled,
+        schedule_mode=payload.scheduleMode,
         completion_rule=payload.completionRule,
         outcome_task_id=ot.id,
     )
@@ -424,31 +425,300 @@ def create_task(project_id: UUID, payload: TaskCreate, db: Session = Depends(get
     assignees = _resolve_assignees(db, project, payload.assigneeIds)
     for user_id, membership_id in assignees:
         db.add(TaskAssignee(task_id=task.id, user_id=user_id, membership_id=membership_id))
-    db.commit()
+    with cycle_registry.pending(project_id) as write:
+        _guard_dependency_cycles(db, project_id, [task.id])
+        write.version = bump_version(db, project_id)
+        db.commit()
+    _queue_auto_scheduling(db, project_id, [task.id])
     db.refresh(task)
     return task
 
-@router.get("", response_model=List[TaskOut])
-def list_tasks(project_id: UUID, limit: int = 50, offset: int = 0, db: Session = Depends(get_db)):
+def _resolve_assignees_bulk(
+    db: Session, project: Project, assignee_ids: set[UUID]
+) -> dict[UUID, List[tuple[UUID, UUID]]]:
+    """Set-based variant of ``_resolve_assignees``: maps every raw id to its (user_id, membership_id) pairs."""
+    if not assignee_ids:
+        return {}
+    if not project.team_id:
+        raise HTTPException(400, "Task assignees require the project to have a team")
+
+    team_memberships = (
+        db.query(Membership.id, Membership.user_id).filter(Membership.team_id == project.team_id).all()
+    )
+    by_membership = {mid: [(uid, mid)] for mid, uid in team_memberships if uid}
+    by_user = {uid: [(uid, mid)] for mid, uid in team_memberships if uid}
+    resolved: dict[UUID, List[tuple[UUID, UUID]]] = {}
+    if project.team_id in assignee_ids:
+        if not team_memberships:
+            raise HTTPException(400, "Project team has no members to assign")
+        resolved[project.team_id] = [(uid, mid) for mid, uid in team_memberships if uid]
+
+    unknown = set()
+    for raw_id in assignee_ids - {project.team_id}:
+        pairs = by_membership.get(raw_id) or by_user.get(raw_id)
+        if pairs is None:
+            unknown.add(raw_id)
+        else:
+            resolved[raw_id] = pairs
+    if unknown:
+        if db.query(Membership.id).filter(Membership.id.in_(unknown)).first():
+            raise HTTPException(400, "Membership must belong to the project team")
+        if db.query(User.id).filter(User.id.in_(unknown)).first():
+            raise HTTPException(400, "Assignee must be a member of the project team")
+        raise HTTPException(400, "Assignee must be an existing user or the project team")
+    return resolved
+
+
+def _parents_first(items: list, key_of, parent_key_of) -> list:
+    """Order batch items so every parent precedes its children."""
+    by_key = {key_of(item): item for item in items}
+    ordered, state = [], {}
+    for item in items:
+        chain = []
+        node = item
+        while node is not None and state.get(key_of(node)) != "done":
+            if key_of(node) in chain:
+                raise HTTPException(400, f"parentKey loop at task '{key_of(node)}'")
+            chain.append(key_of(node))
+            node = by_key.get(parent_key_of(node))
+        for key in reversed(chain):
+            state[key] = "done"
+            ordered.append(by_key[key])
+    return ordered
+
+
+@router.post(":batch", response_model=TaskBatchOut, status_code=status.HTTP_201_CREATED)
+def create_tasks_batch(project_id: UUID, payload: TaskBatchCreate, db: Session = Depends(get_db)):
+    """Create many tasks in one transaction; tasks reference each other by client-side keys."""
+    project = _ensure_same_project_or_404(db, project_id)
+
+    keys = [item.key for item in payload.tasks]
+    known_keys = set(keys)
+    if len(known_keys) != len(keys):
+        raise HTTPException(400, "Task keys must be unique within the batch")
+    for item in payload.tasks:
+        if item.parentKey is not None and item.parentKey not in known_keys:
+            raise HTTPException(400, f"Unknown parentKey '{item.parentKey}'")
+        for dep in item.dependencies or []:
+            if dep.predecessorKey is not None and dep.predecessorKey not in known_keys:
+                raise HTTPException(400, f"Unknown predecessorKey '{dep.predecessorKey}'")
+            if dep.predecessorKey == item.key:
+                raise HTTPException(400, f"Task '{item.key}' cannot depend on itself")
+
+    # Существующие задачи, на которые ссылается пачка, читаем одним запросом
+    external_ids = {item.parentId for item in payload.tasks if item.parentId}
+    external_ids |= {
+        dep.predecessorId for item in payload.tasks for dep in item.dependencies or [] if dep.predecessorId
+    }
+    existing = {t.id: t for t in db.query(Task).filter(Task.id.in_(external_ids))} if external_ids else {}
+    for task_id in external_ids:
+        found = existing.get(task_id)
+        if not found or found.project_id != project_id:
+            raise HTTPException(400, "parentId and dependency predecessors must be in the same project")
+
+    assignees = _resolve_assignees_bulk(
+        db, project, {raw_id for item in payload.tasks for raw_id in item.assigneeIds or []}
+    )
+
+    items = _parents_first(payload.tasks, lambda item: item.key, lambda item: item.parentKey)
+    ids = {item.key: uuid4() for item in items}
+    planned: dict[str, Task] = {}
+    outcome_rows, task_rows, dep_rows, assignee_rows = [], [], [], []
+    dep_pairs = set()
+
+    def _queue_dependency(predecessor_id: UUID, successor_id: UUID, dep_type: DepType, lag: int = 0):
+        pair = (predecessor_id, successor_id)
+        if pair in dep_pairs:
+            return
+        dep_pairs.add(pair)
+        dep_rows.append(
+            {
+                "id": uuid4(),
+                "predecessor_task_id": predecessor_id,
+                "successor_task_id": successor_id,
+                "type": dep_type,
+                "lag": lag,
+            }
+        )
+
+    for item in items:
+        task_id = ids[item.key]
+        parent_id = ids[item.parentKey] if item.parentKey else item.parentId
+        # Несохранённая задача нужна только для проверок окна её подзадач
+        planned[item.key] = Task(
+            planned_start=item.plannedStart, planned_end=item.plannedEnd, deadline=item.deadline
+        )
+        if parent_id:
+            parent = planned[item.parentKey] if item.parentKey else existing[item.parentId]
+            _child_must_fit_parent_window(parent, item.plannedStart, item.deadline or item.plannedEnd)
+            _queue_dependency(parent_id, task_id, DepType.SS, 0)
+            _queue_dependency(task_id, parent_id, DepType.FF, 0)
+        for dep in item.dependencies or []:
+            pred_id = ids[dep.predecessorKey] if dep.predecessorKey else dep.predecessorId
+            _queue_dependency(pred_id, task_id, dep.type, dep.lag)
+
+        outcome_id = uuid4()
+        outcome_rows.append(
+            {
+                "id": outcome_id,
+                "description": item.outcome.description,
+                "acceptance_criteria": item.outcome.acceptanceCriteria,
+                "deadline": item.outcome.deadline,
+                "result": item.outcome.result,
+            }
+        )
+        task_rows.append(
+            {
+                "id": task_id,
+                "project_id": project_id,
+                "parent_id": parent_id,
+                "title": item.title,
+                "description": item.description,
+                "status": TaskStatus.Planned,
+                "duration": item.duration,
+                "duration_optimistic": item.durationOptimistic,
+                "duration_likely": item.durationLikely,
+                "duration_pessimistic": item.durationPessimistic,
+                "planned_start": item.plannedStart,
+                "planned_end": item.plannedEnd,
+                "deadline": item.deadline,
+                "auto_scheduled": item.autoScheduled,
+                "schedule_mode": item.scheduleMode,
+                "completion_rule": CompletionRule(item.completionRule),
+                "outcome_task_id": outcome_id,
+            }
+        )
+        seen_users = set()
+        for raw_id in item.assigneeIds or []:
+            for user_id, membership_id in assignees[raw_id]:
+                if user_id not in seen_users:
+                    seen_users.add(user_id)
+                    assignee_rows.append(
+                        {"id": uuid4(), "task_id": task_id, "user_id": user_id, "membership_id": membership_id}
+                    )
+
+    parents = {
+        ids[item.key]: ids[item.parentKey] if item.parentKey else item.parentId for item in items
+    }
+    deps = [(row["predecessor_task_id"], row["successor_task_id"], row["type"]) for row in dep_rows]
+    # Индекс циклов получает задачи пачки до коммита; при любой ошибке он сбрасывается
+    with cycle_registry.pending(project_id) as write:
+        try:
+            cycle_registry.check_batch(db, project_id, parents, deps)
+        except CycleError as exc:
+            titles = {ids[item.key]: item.title for item in items}
+            titles.update((t.id, t.title) for t in existing.values())
+            missing = [tid for tid in exc.path if tid not in titles]
+            if missing:
+                titles.update(db.query(Task.id, Task.title).filter(Task.id.in_(missing)).all())
+            raise _cycle_conflict(exc, titles)
+
+        db.execute(insert(OutcomeTask), outcome_rows)
+        db.execute(insert(Task), task_rows)
+        if dep_rows:
+            db.execute(insert(Dependency), dep_rows)
+        if assignee_rows:
+            db.execute(insert(TaskAssignee), assignee_rows)
+        write.version = bump_version(db, project_id)
+        db.commit()
+    _queue_auto_scheduling(db, project_id, list(ids.values()))
+    return TaskBatchOut(created=len(task_rows), ids={key: ids[key] for key in keys})
+
+@router.get("", response_model=List[TaskOut], dependencies=[Depends(query_budget(8))])
+def list_tasks(
+    project_id: UUID,
+    response: Response,
+    limit: int = page_size(),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Tasks by planned start; the next page is requested with the ``X-Next-Cursor`` header value."""
     _ensure_same_project_or_404(db, project_id)
-    q = (
-        db.query(Task)
-        .options(selectinload(Task.reviews))
-        .filter(Task.project_id == project_id)
-        .order_by(Task.planned_start)
-        .limit(limit)
-        .offset(offset)
+    q = db.query(Task).options(*TASK_OUT_LOADERS).filter(Task.project_id == project_id)
+    return keyset_page(q, (Task.planned_start, Task.id), cursor, limit, response)
+
+def _schedule_delta(db: Session, project_id: UUID, version: int, result) -> ScheduleDeltaOut:
+    deadline = project_deadline(db, project_id) if result.infeasible else None
+    return ScheduleDeltaOut(
+        project_id=project_id,
+        version=version,
+        changed=[
+            TaskWindowOut(id=tid, planned_start=start, planned_end=end)
+            for tid, (start, end) in result.windows.items()
+        ],
+        infeasible=[
+            DeadlineViolation(
+                id=tid,
+                deadline=deadline,
+                planned_end=deadline + overrun,
+                overrun_hours=overrun.total_seconds() / 3600,
+            )
+            for tid, overrun in result.infeasible.items()
+        ],
     )
-    return q.all()
 
-@router.post("/recalculate", response_model=List[TaskOut])
-def recalc_tasks(project_id: UUID, db: Session = Depends(get_db)):
+def _recalculate_and_commit(db: Session, project_id: UUID):
+    """One full recalculation; concurrent callers for a project share a single run."""
+    def run():
+        # Фоновый автопланировщик не должен писать окна посреди полного пересчёта
+        with schedule_writer(db, project_id):
+            result = _recalculate_project_schedule(db, project_id)
+            version = bump_version(db, project_id)
+            db.commit()
+        return result, version
+    return recalc_flights.do(project_id, run)
+
+def _recalculation_job(project_id: UUID):
+    def run(job: Job) -> dict:
+        # Фоновая задача живёт дольше запроса, поэтому открывает свою сессию
+        db = SessionLocal()
+        try:
+            job.progress = 0.1
+            result, version = _recalculate_and_commit(db, project_id)
+            job.progress = 0.9
+            return _schedule_delta(db, project_id, version, result).model_dump(mode="json")
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    return run
+
+@router.post(
+    "/recalculate",
+    response_model=Union[List[TaskOut], ScheduleDeltaOut, JobOut],
+    dependencies=[Depends(query_budget(20))],
+)
+def recalc_tasks(
+    project_id: UUID,
+    view: str = Query(default="full", pattern="^(full|delta)$"),
+    background: bool = False,
+    db: Session = Depends(get_db),
+):
+    """Recalculate the schedule; ``view=delta`` returns only the moved windows.
+
+    With ``background=true`` the work is queued and a job to poll at /jobs/{id} is returned.
+    """
     _ensure_same_project_or_404(db, project_id)
-    _recalculate_project_schedule(db, project_id)
-    db.commit()
+    if background:
+        try:
+            job = job_runner.submit("recalculate", project_id, _recalculation_job(project_id))
+        except JobQueueFull:
+            raise HTTPException(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                "Too many recalculations in progress",
+                headers={"Retry-After": "5"},
+            )
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=JobOut.model_validate(job).model_dump(mode="json"),
+        )
+    result, version = _recalculate_and_commit(db, project_id)
+    if view == "delta":
+        return _schedule_delta(db, project_id, version, result)
     return (
         db.query(Task)
-        .options(selectinload(Task.reviews))
+        .options(*TASK_OUT_LOADERS)
         .filter(Task.project_id == project_id)
         .order_by(Task.planned_start)
         .all()
@@ -456,11 +726,11 @@ def recalc_tasks(project_id: UUID, db: Session = Depends(get_db)):
 
 plain_router = APIRouter(prefix="/tasks", tags=["tasks"])
 
-@plain_router.get("/{task_id}", response_model=TaskOut)
+@plain_router.get("/{task_id}", response_model=TaskOut, dependencies=[Depends(query_budget(6))])
 def get_task(task_id: UUID, db: Session = Depends(get_db)):
     obj = (
         db.query(Task)
-        .options(selectinload(Task.reviews))
+        .options(*TASK_OUT_LOADERS)
         .filter(Task.id == task_id)
         .first()
     )
@@ -469,16 +739,18 @@ def get_task(task_id: UUID, db: Session = Depends(get_db)):
     return obj
 
 @plain_router.patch("/{task_id}", response_model=TaskOut)
-def update_task(task_id: UUID, payload: TaskUpdate, db: Session = Depends(get_db)):
+def update_task(
+    task_id: UUID,
+    payload: TaskUpdate,
+    propagate: bool = True,
+    db: Session = Depends(get_db),
+):
     t = db.get(Task, task_id)
     if not t:
         raise HTTPException(404, "Task not found")
     project = _ensure_same_project_or_404(db, t.project_id)
+    window_before = (t.planned_start, t.planned_end, t.deadline, t.parent_id)
     previous_parent_id = t.parent_id
-    duration_changed = False
-    deadline_provided = "deadline" in payload.model_fields_set
-    planned_start_provided = "plannedStart" in payload.model_fields_set
-    planned_end_provided = "plannedEnd" in payload.model_fields_set
 
     if payload.parentId is not None:
         if payload.parentId:
@@ -502,45 +774,8 @@ def update_task(task_id: UUID, payload: TaskUpdate, db: Session = Depends(get_db
         ).delete()
         pass
 
-    if payload.title is not None:
-        t.title = payload.title
-    if payload.description is not None:
-        t.description = payload.description
-    if payload.duration is not None:
-        t.duration = payload.duration
-        duration_changed = True
-    if planned_start_provided and payload.plannedStart is not None:
-        t.planned_start = payload.plannedStart
-    if planned_end_provided and payload.plannedEnd is not None:
-        if payload.plannedStart is None and t.planned_start and payload.plannedEnd < t.planned_start:
-            raise HTTPException(400, "plannedEnd must be >= plannedStart")
-        t.planned_end = payload.plannedEnd
-    if deadline_provided and payload.deadline is not None and t.planned_start and payload.deadline < t.planned_start:
-        raise HTTPException(400, "deadline must be >= plannedStart")
-    if deadline_provided:
-        t.deadline = payload.deadline
-    if payload.autoScheduled is not None:
-        t.auto_scheduled = payload.autoScheduled
-    if payload.completionRule is not None:
-        t.completion_rule = payload.completionRule
-    if payload.outcomeResult is not None:
-        t.outcome.result = payload.outcomeResult
-
-    duration_hours = max(float(t.duration or 0) * 24.0, 1.0 / 60.0)
-    dur_delta = timedelta(hours=duration_hours)
-
-    if planned_start_provided and t.planned_start and not planned_end_provided:
-        t.planned_end = t.planned_start + dur_delta
-    elif planned_end_provided and t.planned_end and not planned_start_provided:
-        t.planned_start = t.planned_end - dur_delta
-    elif duration_changed:
-        if t.planned_start:
-            t.planned_end = t.planned_start + dur_delta
-        elif t.planned_end:
-            t.planned_start = t.planned_end - dur_delta
-
-    if t.planned_start and t.planned_end and t.planned_end < t.planned_start:
-        t.planned_end = t.planned_start
+    clock = project_clock(db, t.project_id)
+    _apply_task_fields(t, payload, clock)
 
     # Apply predecessor constraints to keep task within dependency windows.
     dep_rows = (
@@ -560,34 +795,33 @@ def update_task(task_id: UUID, payload: TaskUpdate, db: Session = Depends(get_db
             lag_delta = timedelta(hours=float(dep.lag or 0))
 
             if dep.type == DepType.FS and pred_end:
-                candidate = pred_end + lag_delta
+                candidate = clock.add(pred_end, lag_delta)
                 dep_start_constraint = candidate if dep_start_constraint is None else max(dep_start_constraint, candidate)
             elif dep.type == DepType.SS and pred_start:
-                candidate = pred_start + lag_delta
+                candidate = clock.add(pred_start, lag_delta)
                 dep_start_constraint = candidate if dep_start_constraint is None else max(dep_start_constraint, candidate)
             elif dep.type == DepType.FF and pred_end:
-                candidate = pred_end + lag_delta
+                candidate = clock.add(pred_end, lag_delta)
                 dep_end_constraint = candidate if dep_end_constraint is None else max(dep_end_constraint, candidate)
             elif dep.type == DepType.SF and pred_start:
-                candidate = pred_start + lag_delta
+                candidate = clock.add(pred_start, lag_delta)
                 dep_end_constraint = candidate if dep_end_constraint is None else max(dep_end_constraint, candidate)
 
-        duration_hours = max(float(t.duration or 0) * 24.0, 1.0 / 60.0)
-        dur_delta = timedelta(hours=duration_hours)
+        dur_delta = clock.duration(t.duration)
         start = t.planned_start
         end = t.deadline or t.planned_end
         if not start and end:
-            start = end - dur_delta
+            start = clock.add(end, -dur_delta)
         elif start and not end:
-            end = start + dur_delta
+            end = clock.add(start, dur_delta)
 
         if dep_start_constraint and start and start < dep_start_constraint:
             start = dep_start_constraint
-            end = start + dur_delta
+            end = clock.add(start, dur_delta)
 
         if dep_end_constraint and end and end < dep_end_constraint:
             end = dep_end_constraint
-            start = end - dur_delta
+            start = clock.add(end, -dur_delta)
 
         if end and start and end < start:
             end = start
@@ -653,29 +887,161 @@ def update_task(task_id: UUID, payload: TaskUpdate, db: Session = Depends(get_db
         db.query(Dependency).filter(Dependency.successor_task_id == t.id).all()
     )
     if dep_list:
-        dep_start, dep_end = _apply_dependency_constraints(t, dep_list, db)
+        dep_start, dep_end = _apply_dependency_constraints(t, dep_list, db, clock)
         t.planned_start = dep_start
         t.planned_end = dep_end
 
     if t.parent_id and parent_for_deps:
         child_end = t.deadline or t.planned_end
         child_start = t.planned_start
-        duration_hours = max(float(t.duration or 0) * 24.0, 1.0 / 60.0)
-        child_start, child_end = _clamp_child_to_parent_window(parent_for_deps, child_start, child_end, duration_hours)
+        child_start, child_end = _clamp_child_to_parent_window(
+            parent_for_deps, child_start, child_end, clock.duration(t.duration), clock
+        )
         t.planned_start = child_start
         t.planned_end = child_end
 
-    db.commit()
+    # Окна пишутся под теми же блокировками, что и пересчёт с автопланировщиком
+    with cycle_registry.pending(t.project_id) as write, schedule_writer(db, t.project_id):
+        if payload.dependencies is not None or t.parent_id != previous_parent_id:
+            _guard_dependency_cycles(db, t.project_id, [t.id])
+
+        # Сдвиг задачи распространяем только на её последователей и родителей
+        window_after = (t.planned_start, t.planned_end, t.deadline, t.parent_id)
+        if propagate and (window_after != window_before or payload.dependencies is not None):
+            db.flush()
+            reschedule_downstream(db, t.project_id, [t.id])
+
+        write.version = bump_version(db, t.project_id)
+        db.commit()
+    _queue_auto_scheduling(db, t.project_id, [t.id])
     db.refresh(t)
     return t
 
+@router.patch(":batch", response_model=List[TaskOut])
+def update_tasks_batch(
+    project_id: UUID,
+    payload: TaskBatchUpdate,
+    propagate: bool = True,
+    db: Session = Depends(get_db),
+):
+    """Apply many task deltas at once and return the tasks whose windows changed."""
+    project = _ensure_same_project_or_404(db, project_id)
+    items = payload.tasks
+    ids = [item.id for item in items]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(400, "Each task may appear only once in a batch")
+    tasks = {
+        t.id: t
+        for t in db.query(Task)
+        .options(selectinload(Task.outcome))
+        .filter(Task.project_id == project_id, Task.id.in_(ids))
+    }
+    if len(tasks) != len(ids):
+        raise HTTPException(404, "Task not found")
+
+    parent_ids = {item.parentId for item in items if item.parentId}
+    pred_ids = {dep.predecessorId for item in items for dep in item.dependencies or []}
+    refs = parent_ids | pred_ids
+    ref_projects = dict(db.query(Task.id, Task.project_id).filter(Task.id.in_(refs))) if refs else {}
+    if any(ref_projects.get(tid) != project_id for tid in parent_ids):
+        raise HTTPException(400, "parentId must refer to a task within the same project")
+    if any(ref_projects.get(tid) != project_id for tid in pred_ids):
+        raise HTTPException(400, "dependency predecessor must be in the same project")
+    assignees = _resolve_assignees_bulk(
+        db, project, {raw_id for item in items for raw_id in item.assigneeIds or []}
+    )
+
+    windows_before = {tid: (t.planned_start, t.planned_end) for tid, t in tasks.items()}
+    clock = project_clock(db, project_id)
+    stale_pairs = []
+    for item in items:
+        t = tasks[item.id]
+        previous_parent_id = t.parent_id
+        if item.parentId is not None:
+            t.parent_id = item.parentId
+            if previous_parent_id and previous_parent_id != t.parent_id:
+                stale_pairs += [(previous_parent_id, t.id), (t.id, previous_parent_id)]
+        if item.dependencies is not None and t.parent_id:
+            stale_pairs.append((t.id, t.parent_id))
+        _apply_task_fields(t, item, clock)
+
+    # Связи переписываем пачкой: удаление, затем недостающие пары одним запросом
+    replaced = [item.id for item in items if item.dependencies is not None]
+    if replaced:
+        db.query(Dependency).filter(Dependency.successor_task_id.in_(replaced)).delete(
+            synchronize_session=False
+        )
+    if stale_pairs:
+        db.query(Dependency).filter(
+            tuple_(Dependency.predecessor_task_id, Dependency.successor_task_id).in_(stale_pairs)
+        ).delete(synchronize_session=False)
+    wanted: dict[tuple[UUID, UUID], tuple[DepType, int]] = {}
+    for item in items:
+        t = tasks[item.id]
+        if t.parent_id:
+            wanted.setdefault((t.parent_id, t.id), (DepType.SS, 0))
+            wanted.setdefault((t.id, t.parent_id), (DepType.FF, 0))
+        for dep in item.dependencies or []:
+            wanted.setdefault((dep.predecessorId, t.id), (dep.type, dep.lag))
+    if wanted:
+        for dep in db.query(Dependency).filter(
+            tuple_(Dependency.predecessor_task_id, Dependency.successor_task_id).in_(list(wanted))
+        ):
+            dep.type, dep.lag = wanted.pop((dep.predecessor_task_id, dep.successor_task_id))
+        db.add_all(
+            Dependency(predecessor_task_id=pred, successor_task_id=succ, type=dep_type, lag=lag)
+            for (pred, succ), (dep_type, lag) in wanted.items()
+        )
+
+    reassigned = [item for item in items if item.assigneeIds is not None]
+    if reassigned:
+        db.query(TaskAssignee).filter(TaskAssignee.task_id.in_([item.id for item in reassigned])).delete(
+            synchronize_session=False
+        )
+        for item in reassigned:
+            seen_users = set()
+            for raw_id in item.assigneeIds:
+                for user_id, membership_id in assignees[raw_id]:
+                    if user_id not in seen_users:
+                        seen_users.add(user_id)
+                        db.add(TaskAssignee(task_id=item.id, user_id=user_id, membership_id=membership_id))
+
+    relinked = [item.id for item in items if item.dependencies is not None or item.parentId is not None]
+    with cycle_registry.pending(project_id) as write, schedule_writer(db, project_id):
+        if relinked:
+            _guard_dependency_cycles(db, project_id, relinked)
+
+        # Ограничения предшественников и родителей применяем одним проходом по всей пачке
+        db.flush()
+        result = reschedule_downstream(db, project_id, ids, pin=False, downstream=propagate)
+        changed = set(result.changed)
+        changed.update(
+            tid for tid, t in tasks.items() if (t.planned_start, t.planned_end) != windows_before[tid]
+        )
+
+        write.version = bump_version(db, project_id)
+        db.commit()
+    _queue_auto_scheduling(db, project_id, ids)
+    if not changed:
+        return []
+    return (
+        db.query(Task)
+        .options(*TASK_OUT_LOADERS)
+        .filter(Task.id.in_(changed))
+        .order_by(Task.planned_start)
+        .all()
+    )
+
 @plain_router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_task(task_id: UUID, db: Session = Depends(get_db)):
     t = db.get(Task, task_id)
     if not t:
         raise HTTPException(404, "Task not found")
+    project_id = t.project_id
     db.delete(t)
+    bump_version(db, project_id)
     db.commit()
+    cycle_registry.forget(project_id)
 
 
 @plain_router.post("/{task_id}/reviews", response_model=ReviewTaskOut, status_code=status.HTTP_201_CREATED)
@@ -713,17 +1079,18 @@ def add_task_reviewer(task_id: UUID, payload: ReviewCreate, db: Session = Depend
 
 
 @plain_router.get("/{task_id}/comments", response_model=List[CommentOut])
-def list_task_comments(task_id: UUID, db: Session = Depends(get_db)):
+def list_task_comments(
+    task_id: UUID,
+    response: Response,
+    limit: int = page_size(100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
     task = db.get(Task, task_id)
     if not task:
         raise HTTPException(404, "Task not found")
-    return (
-        db.query(Comment)
-        .options(selectinload(Comment.author))
-        .filter(Comment.task_id == task_id)
-        .order_by(Comment.created_at.asc())
-        .all()
-    )
+    q = db.query(Comment).options(selectinload(Comment.author)).filter(Comment.task_id == task_id)
+    return keyset_page(q, (Comment.created_at, Comment.id), cursor, limit, response)
 
 
 @plain_router.post("/{task_id}/comments", response_model=CommentOut, status_code=status.HTTP_201_CREATED)
@@ -786,6 +1153,7 @@ def complete_task_for_assignee(
         task.actual_end = task.actual_end or now
     else:
         _apply_completion_rule(db, task, now)
+    bump_version(db, task.project_id)
     db.commit()
     db.refresh(task)
     return task
@@ -808,6 +1176,7 @@ def cancel_task(
     now = datetime.utcnow()
     task.status = TaskStatus.Canceled
     task.actual_end = task.actual_end or now
+    bump_version(db, task.project_id)
     db.commit()
     db.refresh(task)
     return task
@@ -833,6 +1202,7 @@ def reopen_task(
     db.query(TaskAssignee).filter(TaskAssignee.task_id == task.id).update(
         {"is_completed": False, "completed_at": None}
     )
+    bump_version(db, task.project_id)
     db.commit()
     db.refresh(task)
     return task
@@ -1,17 +1,32 @@
-from typing import List
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app.core import models
+from app.core.api.pagination import keyset_page, page_size
+from app.core.scheduling import earned_value
+from app.core.scheduling.cache import bump_team_versions
+from app.core.scheduling.store import FIXED_STATUSES, load_progress, team_clock
+from app.core.scheduling.workload import team_load
 from app.core.schemas.top_schemas import (
     TeamCreate,
     TeamUpdate,
-    TeamOut
+    TeamOut,
+    EarnedValueOut,
+    EarnedValueTotals,
+    TeamEarnedValueOut,
+    WorkCalendarIn,
+    WorkCalendarOut,
+    WorkloadOut,
 )
 
+MAX_WORKLOAD_BUCKETS = 400
+
 router = APIRouter(prefix="/teams", tags=["teams"])
 
 
@@ -26,17 +41,13 @@ def create_team(payload: TeamCreate, db: Session = Depends(get_db)):
 
 @router.get("", response_model=List[TeamOut])
 def list_teams(
-    limit: int = 50,
-    offset: int = 0,
+    response: Response,
+    limit: int = page_size(),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
-    q = (
-        db.query(models.Team)
-        .order_by(models.Team.created_at)
-        .limit(limit)
-        .offset(offset)
-    )
-    return q.all()
+    q = db.query(models.Team)
+    return keyset_page(q, (models.Team.created_at, models.Team.id), cursor, limit, response)
 
 
 @router.get("/{team_id}", response_model=TeamOut)
@@ -68,4 +79,157 @@ def delete_team(team_id: UUID, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Team not found")
 
     db.delete(team)
-    db.commit()
\ No newline at end of file
+    db.commit()
+
+
+def _team_or_404(db: Session, team_id: UUID) -> models.Team:
+    team = db.get(models.Team, team_id)
+    if not team:
+        raise HTTPException(status_code=404, detail="Team not found")
+    return team
+
+
+def _calendar_out(calendar: models.WorkCalendar) -> WorkCalendarOut:
+    return WorkCalendarOut(
+        team_id=calendar.team_id,
+        timezone=calendar.timezone,
+        work_start=calendar.work_start,
+        work_end=calendar.work_end,
+        work_days=calendar.weekdays,
+        holidays=[h.day for h in calendar.holidays],
+        version=calendar.version,
+    )
+
+
+@router.get("/{team_id}/calendar", response_model=WorkCalendarOut)
+def get_team_calendar(team_id: UUID, db: Session = Depends(get_db)):
+    team = _team_or_404(db, team_id)
+    if team.calendar is None:
+        raise HTTPException(status_code=404, detail="Team has no working calendar")
+    return _calendar_out(team.calendar)
+
+
+@router.put("/{team_id}/calendar", response_model=WorkCalendarOut)
+def put_team_calendar(team_id: UUID, payload: WorkCalendarIn, db: Session = Depends(get_db)):
+    """Create or replace the working calendar the team's projects are scheduled on."""
+    team = _team_or_404(db, team_id)
+    calendar = team.calendar
+    if calendar is None:
+        calendar = models.WorkCalendar(team_id=team.id, version=0)
+        db.add(calendar)
+    calendar.timezone = payload.timezone
+    calendar.work_start = payload.workStart
+    calendar.work_end = payload.workEnd
+    calendar.work_days = "".join(str(d) for d in payload.workDays)
+    # Существующие строки сохраняем, чтобы не нарушить уникальность (calendar_id, day)
+    kept = {h.day: h for h in calendar.holidays}
+    calendar.holidays = [kept.get(day) or models.CalendarHoliday(day=day) for day in sorted(set(payload.holidays))]
+    calendar.version += 1
+    bump_team_versions(db, team.id)
+    db.commit()
+    db.refresh(calendar)
+    return _calendar_out(calendar)
+
+
+@router.delete("/{team_id}/calendar", status_code=status.HTTP_204_NO_CONTENT)
+def delete_team_calendar(team_id: UUID, db: Session = Depends(get_db)):
+    team = _team_or_404(db, team_id)
+    if team.calendar is None:
+        raise HTTPException(status_code=404, detail="Team has no working calendar")
+    db.delete(team.calendar)
+    bump_team_versions(db, team.id)
+    db.commit()
+
+
+@router.get("/{team_id}/workload", response_model=WorkloadOut)
+def get_team_workload(
+    team_id: UUID,
+    from_: date = Query(alias="from"),
+    to: date = Query(),
+    bucket: str = Query(default="day", pattern="^(day|week)$"),
+    db: Session = Depends(get_db),
+):
+    """Load of every team member per day or week, over the tasks of all their projects."""
+    _team_or_404(db, team_id)
+    if to <= from_:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    step = timedelta(days=1 if bucket == "day" else 7)
+    if bucket == "week":
+        # Недели начинаются с понедельника
+        from_ -= timedelta(days=from_.weekday())
+    start = datetime.combine(from_, time.min)
+    end = datetime.combine(to, time.min)
+    starts = []
+    edge = start
+    while edge < end:
+        starts.append(edge)
+        edge += step
+    if len(starts) > MAX_WORKLOAD_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_WORKLOAD_BUCKETS} buckets per request")
+    end = edge
+
+    members = select(models.Membership.user_id).where(models.Membership.team_id == team_id)
+    user_ids = [
+        uid
+        for uid, in db.query(models.User.id)
+        .filter(models.User.id.in_(members))
+        .order_by(models.User.email)
+    ]
+    # Один запрос по task_assignees: все назначения участников, пересекающие окно
+    rows = (
+        db.query(
+            models.TaskAssignee.user_id,
+            models.Task.id,
+            models.Task.planned_start,
+            models.Task.planned_end,
+        )
+        .join(models.Task, models.TaskAssignee.task_id == models.Task.id)
+        .filter(
+            models.TaskAssignee.user_id.in_(members),
+            models.Task.planned_start < end,
+            models.Task.planned_end > start,
+            models.Task.status.not_in(FIXED_STATUSES),
+        )
+        .distinct()
+        .all()
+    )
+    bookings = [(user_id, task_start, task_end) for user_id, _, task_start, task_end in rows]
+    hours, peak = team_load(bookings, user_ids, starts + [end], team_clock(db, team_id))
+    return WorkloadOut(
+        team_id=team_id,
+        bucket=bucket,
+        starts=starts,
+        end=end,
+        user_ids=user_ids,
+        hours=[[round(h, 2) for h in row] for row in hours],
+        peak=peak,
+    )
+
+
+@router.get("/{team_id}/earned-value", response_model=TeamEarnedValueOut)
+def get_team_earned_value(
+    team_id: UUID,
+    as_of: datetime | None = Query(default=None, alias="asOf"),
+    db: Session = Depends(get_db),
+):
+    """Earned value of every team project and of the whole portfolio, in one pass."""
+    _team_or_404(db, team_id)
+    as_of = as_of or datetime.now(timezone.utc)
+    project_ids = [
+        pid
+        for pid, in db.query(models.Project.id)
+        .filter(models.Project.team_id == team_id)
+        .order_by(models.Project.title, models.Project.id)
+    ]
+    values = earned_value.compute(load_progress(db, project_ids), project_ids, as_of)
+    total = earned_value.EarnedValue()
+    for value in values.values():
+        total.add(value)
+    return TeamEarnedValueOut(
+        team_id=team_id,
+        as_of=as_of,
+        total=EarnedValueTotals(**total.as_dict()),
+        projects=[
+            EarnedValueOut(project_id=pid, as_of=as_of, **values[pid].as_dict()) for pid in project_ids
+        ],
+    )
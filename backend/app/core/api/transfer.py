@@ -0,0 +1,544 @@
+"""Streaming export and import of project tasks as NDJSON or CSV.
+
+Export reads rows from server-side cursors (``yield_per``) and writes them out in
+chunks, so memory stays flat whatever the project size and the first bytes leave
+before the query is exhausted. Tasks and their dependencies come from two cursors
+ordered by task id and are merge-joined on the fly.
+
+Import parses the uploaded file line by line (uploads are spooled to disk, not held
+in memory) and inserts outcomes and tasks in fixed-size chunks: COPY on PostgreSQL,
+executemany elsewhere. Parents and dependencies may point to rows further down the
+file, so they are written after all tasks have landed; then the schedule is
+recalculated once. The whole import is one transaction.
+"""
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Dict, Iterator, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.models.course import Project
+from app.core.models.enums import CompletionRule, DepType, ScheduleMode, TaskStatus
+from app.core.models.task import Dependency, OutcomeTask, Task
+from app.core.scheduling.cache import bump_version
+from app.core.scheduling.cycles import registry as cycle_registry
+from app.core.scheduling.store import recalculate_project
+from app.core.schemas.top_schemas import TaskImportOut
+from app.db import SessionLocal, get_db
+
+router = APIRouter(prefix="/projects/{project_id}/tasks", tags=["tasks"])
+
+# Строк на одну выборку курсора и на один отправляемый кусок ответа
+EXPORT_CHUNK_ROWS = 1000
+# Строк на одну пачку вставки при импорте
+IMPORT_CHUNK_ROWS = 1000
+# Размер списка IN при поиске существующих задач, на которые ссылается файл
+LOOKUP_CHUNK = 500
+
+EXPORT_COLUMNS = (
+    Task.id,
+    Task.parent_id,
+    Task.title,
+    Task.description,
+    Task.status,
+    Task.duration,
+    Task.duration_optimistic,
+    Task.duration_likely,
+    Task.duration_pessimistic,
+    Task.planned_start,
+    Task.planned_end,
+    Task.deadline,
+    Task.actual_start,
+    Task.actual_end,
+    Task.auto_scheduled,
+    Task.schedule_mode,
+    Task.completion_rule,
+    OutcomeTask.description.label("outcome_description"),
+    OutcomeTask.acceptance_criteria.label("outcome_acceptance_criteria"),
+    OutcomeTask.deadline.label("outcome_deadline"),
+    OutcomeTask.result.label("outcome_result"),
+)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS] + ["dependencies"]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _task_rows(db: Session, project_id: UUID):
+    return db.execute(
+        select(*EXPORT_COLUMNS)
+        .join(OutcomeTask, Task.outcome_task_id == OutcomeTask.id)
+        .where(Task.project_id == project_id)
+        .order_by(Task.id)
+        .execution_options(yield_per=EXPORT_CHUNK_ROWS)
+    )
+
+
+def _dependency_rows(db: Session, project_id: UUID):
+    return db.execute(
+        select(Dependency.successor_task_id, Dependency.predecessor_task_id, Dependency.type, Dependency.lag)
+        .join(Task, Dependency.successor_task_id == Task.id)
+        .where(Task.project_id == project_id)
+        .order_by(Dependency.successor_task_id, Dependency.predecessor_task_id)
+        .execution_options(yield_per=EXPORT_CHUNK_ROWS)
+    )
+
+
+def _with_dependencies(tasks, dependencies) -> Iterator[Tuple[tuple, List[tuple]]]:
+    """Merge-join two id-ordered streams: each task with its incoming dependencies."""
+    pending = next(dependencies, None)
+    for task in tasks:
+        deps = []
+        while pending is not None and pending[0] <= task.id:
+            if pending[0] == task.id:
+                deps.append(pending)
+            pending = next(dependencies, None)
+        yield task, deps
+
+
+def _ndjson_lines(rows) -> Iterator[str]:
+    for task, deps in rows:
+        record = {key: _plain(value) for key, value in task._mapping.items()}
+        record["dependencies"] = [
+            {"predecessor_task_id": str(pred), "type": dep_type.value, "lag": lag or 0}
+            for _, pred, dep_type, lag in deps
+        ]
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def _csv_lines(rows) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for task, deps in rows:
+        # Зависимости в одной ячейке: "id:тип:лаг" через точку с запятой
+        packed = ";".join(f"{pred}:{dep_type.value}:{lag or 0}" for _, pred, dep_type, lag in deps)
+        writer.writerow([_plain(value) for value in task] + [packed])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _export_stream(project_id: UUID, fmt: str) -> Iterator[str]:
+    # Ответ отдаётся после завершения обработчика, поэтому у потока своя сессия
+    db = SessionLocal()
+    try:
+        rows = _with_dependencies(_task_rows(db, project_id), iter(_dependency_rows(db, project_id)))
+        lines = _ndjson_lines(rows) if fmt == "ndjson" else _csv_lines(rows)
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) >= EXPORT_CHUNK_ROWS:
+                yield "".join(chunk)
+                chunk = []
+        if chunk:
+            yield "".join(chunk)
+    finally:
+        db.close()
+
+
+@router.get("/export")
+def export_tasks(
+    project_id: UUID,
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv)$"),
+    db: Session = Depends(get_db),
+):
+    """Stream all project tasks with their outcomes and dependencies, one row per task."""
+    if db.get(Project, project_id) is None:
+        raise HTTPException(404, "Project not found")
+    return StreamingResponse(
+        _export_stream(project_id, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="project-{project_id}-tasks.{format}"'},
+    )
+
+
+# --- import ---------------------------------------------------------------------
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+def _text(record: dict, key: str) -> Optional[str]:
+    value = record.get(key)
+    if value is None or value == "":
+        return None
+    return str(value)
+
+
+def _datetime(record: dict, key: str, required: bool = False) -> Optional[datetime]:
+    value = _text(record, key)
+    if value is None:
+        if required:
+            raise ImportRowError(f"'{key}' is required")
+        return None
+    try:
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ImportRowError(f"'{key}' is not an ISO datetime")
+    # Даты хранятся как наивное UTC, смещение из файла переводим, а не отбрасываем
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def _float(record: dict, key: str) -> Optional[float]:
+    value = _text(record, key)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ImportRowError(f"'{key}' is not a number")
+
+
+def _choice(record: dict, key: str, enum, default):
+    value = _text(record, key)
+    if value is None:
+        return default
+    try:
+        return enum(value)
+    except ValueError:
+        raise ImportRowError(f"'{key}' must be one of {', '.join(e.value for e in enum)}")
+
+
+def _flag(record: dict, key: str) -> bool:
+    value = record.get(key)
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in ("1", "true", "t", "yes")
+
+
+def _dependencies(record: dict) -> List[Tuple[str, DepType, int]]:
+    """(predecessor key, type, lag) from a JSON list or the packed CSV cell."""
+    raw = record.get("dependencies")
+    if not raw:
+        return []
+    if isinstance(raw, str):
+        items = []
+        for part in raw.split(";"):
+            try:
+                key, dep_type, lag = part.rsplit(":", 2)
+            except ValueError:
+                raise ImportRowError("dependencies must look like 'id:TYPE:lag;...'")
+            items.append({"predecessor_task_id": key, "type": dep_type, "lag": lag})
+        raw = items
+    if not isinstance(raw, list):
+        raise ImportRowError("dependencies must be a list")
+    result = []
+    for dep in raw:
+        if not isinstance(dep, dict):
+            raise ImportRowError("dependencies must be a list of objects")
+        key = _text(dep, "predecessor_task_id") or _text(dep, "predecessorId") or _text(dep, "predecessorKey")
+        if key is None:
+            raise ImportRowError("dependency without predecessor")
+        try:
+            lag = int(dep.get("lag") or 0)
+        except (TypeError, ValueError):
+            raise ImportRowError("dependency lag must be an integer")
+        result.append((key, _choice(dep, "type", DepType, DepType.FS), lag))
+    return result
+
+
+class _Lines:
+    """UTF-8 lines of the upload, decoded one at a time so errors carry a line number."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.number = 0
+
+    def __iter__(self) -> Iterator[str]:
+        for line in self.raw:
+            self.number += 1
+            try:
+                text = line.decode("utf-8")
+            except UnicodeDecodeError:
+                raise HTTPException(400, f"Line {self.number}: file is not valid UTF-8")
+            yield text.removeprefix("\ufeff") if self.number == 1 else text
+
+
+def _records(upload: UploadFile, fmt: str) -> Iterator[Tuple[int, dict]]:
+    """(line number, record) pairs read incrementally from the uploaded file."""
+    upload.file.seek(0)
+    lines = _Lines(upload.file)
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        try:
+            for record in reader:
+                yield reader.line_num, record
+        except csv.Error as exc:
+            raise HTTPException(400, f"Line {lines.number}: {exc}")
+        return
+    for line in lines:
+        number = lines.number
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            raise HTTPException(400, f"Line {number}: invalid JSON")
+        if not isinstance(record, dict):
+            raise HTTPException(400, f"Line {number}: expected a JSON object")
+        yield number, record
+
+
+# Спецсимволы текстового формата COPY; обратная косая черта экранируется первой
+COPY_ESCAPES = (("\\", "\\\\"), ("\t", "\\t"), ("\n", "\\n"), ("\r", "\\r"))
+
+
+def _copy_value(value) -> str:
+    """One field in the text format of COPY (NULL is ``\\N``)."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, Enum):
+        # SQLAlchemy хранит в enum-колонках имена членов
+        value = value.name
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    text = str(value)
+    for char, escaped in COPY_ESCAPES:
+        text = text.replace(char, escaped)
+    return text
+
+
+def _copy_buffer(rows: List[dict], columns: List[str]) -> io.StringIO:
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(row[c]) for c in columns))
+        buffer.write("\n")
+    buffer.seek(0)
+    return buffer
+
+
+def _bulk_insert(db: Session, model, rows: List[dict]) -> None:
+    """Insert a chunk of rows with COPY on PostgreSQL and executemany elsewhere."""
+    if not rows:
+        return
+    if db.get_bind().dialect.name != "postgresql":
+        db.execute(insert(model), rows)
+        return
+    columns = list(rows[0])
+    names = ", ".join(f'"{c}"' for c in columns)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f'COPY "{model.__tablename__}" ({names}) FROM STDIN', _copy_buffer(rows, columns))
+    finally:
+        cursor.close()
+
+
+class _Importer:
+    """Accumulates one import: task rows go out in chunks, references wait for the end."""
+
+    def __init__(self, db: Session, project_id: UUID):
+        self.db = db
+        self.project_id = project_id
+        self.ids: Dict[str, UUID] = {}
+        # id задачи -> (ключ в файле, номер строки) для сообщений об ошибках
+        self.sources: Dict[UUID, Tuple[str, int]] = {}
+        self.outcomes: List[dict] = []
+        self.tasks: List[dict] = []
+        # Ссылки могут указывать вперёд по файлу, поэтому пишутся после всех задач
+        self.parents: List[Tuple[UUID, str, int]] = []
+        self.dependencies: List[Tuple[str, UUID, DepType, int, int]] = []
+
+    def add(self, number: int, record: dict) -> None:
+        key = _text(record, "id") or _text(record, "key") or f"line:{number}"
+        if key in self.ids:
+            raise ImportRowError(f"duplicate task id '{key}'")
+        title = _text(record, "title")
+        if title is None or len(title) > 200:
+            raise ImportRowError("'title' is required and must be at most 200 characters")
+        start = _datetime(record, "planned_start", required=True)
+        end = _datetime(record, "planned_end", required=True)
+        if end < start:
+            raise ImportRowError("'planned_end' is before 'planned_start'")
+        duration = _float(record, "duration")
+        if duration is None:
+            duration = (end - start) / timedelta(days=1)
+
+        task_id = uuid4()
+        outcome_id = uuid4()
+        self.ids[key] = task_id
+        self.sources[task_id] = (key, number)
+        self.outcomes.append(
+            {
+                "id": outcome_id,
+                "description": _text(record, "outcome_description") or "",
+                "acceptance_criteria": _text(record, "outcome_acceptance_criteria") or "",
+                "deadline": _datetime(record, "outcome_deadline") or _datetime(record, "deadline") or end,
+                "result": _text(record, "outcome_result"),
+            }
+        )
+        self.tasks.append(
+            {
+                "id": task_id,
+                "project_id": self.project_id,
+                "parent_id": None,
+                "title": title,
+                "description": _text(record, "description") or "",
+                "status": _choice(record, "status", TaskStatus, TaskStatus.Planned),
+                "duration": duration,
+                "duration_optimistic": _float(record, "duration_optimistic"),
+                "duration_likely": _float(record, "duration_likely"),
+                "duration_pessimistic": _float(record, "duration_pessimistic"),
+                "planned_start": start,
+                "planned_end": end,
+                "deadline": _datetime(record, "deadline"),
+                "actual_start": _datetime(record, "actual_start"),
+                "actual_end": _datetime(record, "actual_end"),
+                "auto_scheduled": _flag(record, "auto_scheduled"),
+                "schedule_mode": _choice(record, "schedule_mode", ScheduleMode, ScheduleMode.ASAP),
+                "completion_rule": _choice(
+                    record, "completion_rule", CompletionRule, CompletionRule.AllAssignees
+                ),
+                "outcome_task_id": outcome_id,
+            }
+        )
+        parent = _text(record, "parent_id") or _text(record, "parentKey")
+        if parent is not None:
+            self.parents.append((task_id, parent, number))
+        for pred, dep_type, lag in _dependencies(record):
+            self.dependencies.append((pred, task_id, dep_type, lag, number))
+        if len(self.tasks) >= IMPORT_CHUNK_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        _bulk_insert(self.db, OutcomeTask, self.outcomes)
+        _bulk_insert(self.db, Task, self.tasks)
+        self.outcomes, self.tasks = [], []
+
+    def _existing(self, keys) -> Dict[str, UUID]:
+        """Keys that are ids of tasks already in the project."""
+        candidates = {}
+        for key in keys:
+            try:
+                candidates[UUID(key)] = key
+            except ValueError:
+                continue
+        found = {}
+        ids = list(candidates)
+        for i in range(0, len(ids), LOOKUP_CHUNK):
+            for (task_id,) in self.db.execute(
+                select(Task.id).where(Task.project_id == self.project_id, Task.id.in_(ids[i:i + LOOKUP_CHUNK]))
+            ):
+                found[candidates[task_id]] = task_id
+        return found
+
+    def _resolve(self, key: str, number: int, known: Dict[str, UUID]) -> UUID:
+        task_id = self.ids.get(key) or known.get(key)
+        if task_id is None:
+            raise HTTPException(400, f"Line {number}: unknown task reference '{key}'")
+        return task_id
+
+    def link(self) -> int:
+        """Write parents and dependencies once every task is stored; returns the edge count."""
+        referenced = {key for _, key, _ in self.parents} | {key for key, *_ in self.dependencies}
+        known = self._existing(referenced - self.ids.keys())
+
+        # (предшественник, последователь) -> (тип, лаг, структурная ли связь родителя)
+        pairs: Dict[Tuple[UUID, UUID], Tuple[DepType, int, bool]] = {}
+        rows: List[dict] = []
+
+        def queue(
+            pred: UUID, succ: UUID, dep_type: DepType, lag: int, number: int, key: str, structural: bool = False
+        ) -> None:
+            if pred == succ:
+                raise HTTPException(400, f"Line {number}: a task cannot depend on itself")
+            queued = pairs.get((pred, succ))
+            if queued is not None:
+                # Повтор допустим только как явная копия связи родителя (так её пишет экспорт)
+                if queued == (dep_type, lag, True):
+                    return
+                raise HTTPException(400, f"Line {number}: conflicting dependencies on '{key}'")
+            pairs[(pred, succ)] = (dep_type, lag, structural)
+            rows.append(
+                {"id": uuid4(), "predecessor_task_id": pred, "successor_task_id": succ, "type": dep_type, "lag": lag}
+            )
+            if len(rows) >= IMPORT_CHUNK_ROWS:
+                _bulk_insert(self.db, Dependency, rows)
+                rows.clear()
+
+        parent_rows = []
+        for task_id, key, number in self.parents:
+            parent_id = self._resolve(key, number, known)
+            parent_rows.append({"id": task_id, "parent_id": parent_id})
+            # Та же связка родителя с подзадачей, что и при обычном создании
+            queue(parent_id, task_id, DepType.SS, 0, number, key, structural=True)
+            queue(task_id, parent_id, DepType.FF, 0, number, key, structural=True)
+        for i in range(0, len(parent_rows), IMPORT_CHUNK_ROWS):
+            self.db.execute(update(Task), parent_rows[i:i + IMPORT_CHUNK_ROWS])
+        for key, succ, dep_type, lag, number in self.dependencies:
+            queue(self._resolve(key, number, known), succ, dep_type, lag, number, key)
+        _bulk_insert(self.db, Dependency, rows)
+        return len(pairs)
+
+
+@router.post("/import", response_model=TaskImportOut, status_code=status.HTTP_201_CREATED)
+def import_tasks(
+    project_id: UUID,
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(default=None, pattern="^(ndjson|csv)$"),
+    db: Session = Depends(get_db),
+):
+    """Create tasks from an NDJSON or CSV file in the export layout, then reschedule once.
+
+    The format is taken from ``format`` or the file extension. ``id`` (or ``key``) of a
+    row is only a reference for ``parent_id`` and ``dependencies`` within the file;
+    imported tasks get new ids. References may also name tasks already in the project.
+    """
+    if db.get(Project, project_id) is None:
+        raise HTTPException(404, "Project not found")
+    fmt = format or ("csv" if (file.filename or "").lower().endswith(".csv") else "ndjson")
+
+    importer = _Importer(db, project_id)
+    for number, record in _records(file, fmt):
+        try:
+            importer.add(number, record)
+        except ImportRowError as exc:
+            raise HTTPException(400, f"Line {number}: {exc}")
+    if not importer.ids:
+        raise HTTPException(400, "No tasks in the file")
+    importer.flush()
+    edges = importer.link()
+
+    # Индекс циклов проекта перечитается из базы при следующей проверке
+    cycle_registry.forget(project_id)
+    result = recalculate_project(db, project_id)
+    if result.cycle:
+        db.rollback()
+        # Новые id откатились вместе с транзакцией, поэтому отвечаем ключами и строками файла
+        tasks = sorted(
+            ({"key": key, "line": number} for key, number in map(importer.sources.get, result.cycle) if key),
+            key=lambda t: t["line"],
+        )
+        tasks += [{"key": str(tid), "line": None} for tid in result.cycle if tid not in importer.sources]
+        lines = ", ".join(str(t["line"]) for t in tasks if t["line"] is not None)
+        raise HTTPException(
+            status.HTTP_409_CONFLICT,
+            {"message": f"Imported dependencies contain a cycle (lines {lines})", "tasks": tasks},
+        )
+    version = bump_version(db, project_id)
+    db.commit()
+    return TaskImportOut(created=len(importer.ids), dependencies=edges, version=version)
@@ -1,8 +1,10 @@
 from .base import Base
-from .enums import TaskStatus, DepType, ReviewStatus, CompletionRule, InviteStatus
+from .enums import TaskStatus, DepType, ReviewStatus, CompletionRule, InviteStatus, ScheduleMode
 
 from .users import *
 from .course import *
 from .task import *
 from .review import *
 from .comments import *
+from .calendar import *
+from .baseline import *
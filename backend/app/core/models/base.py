@@ -1 +1,12 @@
-from app.db import Base
\ No newline at end of file
+from datetime import datetime, timezone
+
+from app.db import Base
+
+
+def utcnow() -> datetime:
+    """Python-side default for keyset-paginated timestamps.
+
+    ``now()`` on SQLite is CURRENT_TIMESTAMP with whole seconds in another text format,
+    so cursors over such columns would not compare with the stored values.
+    """
+    return datetime.now(timezone.utc)
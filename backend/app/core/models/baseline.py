@@ -0,0 +1,29 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, LargeBinary, String, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.core.models.base import Base
+
+__all__ = ["ScheduleBaseline"]
+
+
+class ScheduleBaseline(Base):
+    __tablename__ = "schedule_baselines"
+    __table_args__ = (
+        UniqueConstraint("project_id", "name", name="uq_schedule_baseline_name"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("projects.id", ondelete="CASCADE"), nullable=False
+    )
+    name: Mapped[str] = mapped_column(String(200), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    task_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Окна задач в упакованном виде, см. app.core.scheduling.baselines
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+    project: Mapped["Project"] = relationship(back_populates="baselines")
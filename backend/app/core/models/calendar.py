@@ -0,0 +1,51 @@
+import uuid
+from datetime import date, time
+from typing import List
+
+from sqlalchemy import Date, ForeignKey, Integer, String, Time, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.core.models.base import Base
+
+__all__ = ["WorkCalendar", "CalendarHoliday"]
+
+
+class WorkCalendar(Base):
+    __tablename__ = "work_calendars"
+
+    id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    team_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("teams.id", ondelete="CASCADE"), unique=True, nullable=False
+    )
+    timezone: Mapped[str] = mapped_column(String(64), default="UTC", nullable=False)
+    work_start: Mapped[time] = mapped_column(Time, default=time(9), nullable=False)
+    work_end: Mapped[time] = mapped_column(Time, default=time(18), nullable=False)
+    # Рабочие дни недели по ISO (1 — понедельник), например "12345"
+    work_days: Mapped[str] = mapped_column(String(7), default="12345", nullable=False)
+    # Растёт при каждом изменении; по нему инвалидируется индекс рабочего времени
+    version: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
+
+    team: Mapped["Team"] = relationship(back_populates="calendar")
+    holidays: Mapped[List["CalendarHoliday"]] = relationship(
+        back_populates="calendar", cascade="all, delete-orphan", lazy="selectin", order_by="CalendarHoliday.day"
+    )
+
+    @property
+    def weekdays(self) -> List[int]:
+        return [int(d) for d in self.work_days]
+
+
+class CalendarHoliday(Base):
+    __tablename__ = "calendar_holidays"
+    __table_args__ = (
+        UniqueConstraint("calendar_id", "day", name="uq_calendar_holiday_day"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    calendar_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("work_calendars.id", ondelete="CASCADE"), nullable=False
+    )
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+
+    calendar: Mapped["WorkCalendar"] = relationship(back_populates="holidays")
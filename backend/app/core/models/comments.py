@@ -2,11 +2,11 @@ import uuid
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import String, ForeignKey, DateTime, func, CheckConstraint, Text
+from sqlalchemy import String, ForeignKey, DateTime, func, CheckConstraint, Index, Text
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.core.models.base import Base
+from app.core.models.base import Base, utcnow
 
 
 class Comment(Base):
@@ -16,12 +16,15 @@ class Comment(Base):
             "(task_id IS NOT NULL) OR (project_id IS NOT NULL)",
             name="ck_comment_target_present"
         ),
+        Index("ix_comments_task_created_id", "task_id", "created_at", "id"),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
     text: Mapped[str] = mapped_column(Text, nullable=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=utcnow, server_default=func.now(), nullable=False
+    )
 
     task_id: Mapped[Optional[uuid.UUID]] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"))
     project_id: Mapped[Optional[uuid.UUID]] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"))
@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import String, ForeignKey, DateTime, Text
+from sqlalchemy import String, ForeignKey, DateTime, Text, Integer, Index, text
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -23,6 +23,9 @@ class OutcomeProject(Base):
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        Index("ix_projects_team_title_id", "team_id", "title", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title: Mapped[str] = mapped_column(String(200), nullable=False)
@@ -32,10 +35,15 @@ class Project(Base):
     outcome_project_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("outcome_projects.id", ondelete="RESTRICT"), nullable=False
     )
+    # Растёт при каждой записи задач/зависимостей проекта; ключ кэшей расписания
+    schedule_version: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"), nullable=False)
 
     team: Mapped[Optional["Team"]] = relationship(back_populates="projects")
     outcome: Mapped["OutcomeProject"] = relationship(back_populates="project")
     tasks: Mapped[List["Task"]] = relationship(back_populates="project", cascade="all, delete-orphan")
     comments: Mapped[List["Comment"]] = relationship(back_populates="project", cascade="all, delete-orphan")
+    baselines: Mapped[List["ScheduleBaseline"]] = relationship(
+        back_populates="project", cascade="all, delete-orphan", passive_deletes=True
+    )
 
     reviews: Mapped[List["ReviewProject"]] = relationship(back_populates="project", cascade="all, delete-orphan")
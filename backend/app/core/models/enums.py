@@ -15,6 +15,11 @@ class DepType(str, enum.Enum):
     SF = "SF"
 
 
+class ScheduleMode(str, enum.Enum):
+    ASAP = "ASAP"
+    ALAP = "ALAP"
+
+
 class ReviewStatus(str, enum.Enum):
     Pending = "Pending"
     Accepted = "Accepted"
@@ -1,16 +1,20 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, DateTime, func, Enum, Text
+from sqlalchemy import ForeignKey, DateTime, func, Enum, Index, Text
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.core.models.base import Base
+from app.core.models.base import Base, utcnow
 from app.core.models.enums import ReviewStatus
 
 
 class ReviewProject(Base):
     __tablename__ = "review_projects"
+    __table_args__ = (
+        # Ревью пользователя от новых к старым, постранично по (created_at, id)
+        Index("ix_review_projects_reviewer_created_id", "reviewer_id", "created_at", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     project_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
@@ -20,7 +24,9 @@ class ReviewProject(Base):
                                                  nullable=False)
     comment: Mapped[str] = mapped_column(Text, nullable=True)
     com_reviewer: Mapped[str] = mapped_column(Text, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=utcnow, server_default=func.now(), nullable=False
+    )
 
     project: Mapped["Project"] = relationship(back_populates="reviews")
     reviewer: Mapped["User"] = relationship(back_populates="reviews_projects")
@@ -38,6 +44,9 @@ class ReviewProject(Base):
 
 class ReviewTask(Base):
     __tablename__ = "review_tasks"
+    __table_args__ = (
+        Index("ix_review_tasks_reviewer_created_id", "reviewer_id", "created_at", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     task_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
@@ -47,7 +56,9 @@ class ReviewTask(Base):
                                                  nullable=False)
     comment: Mapped[str] = mapped_column(Text, nullable=True)
     com_reviewer: Mapped[str] = mapped_column(Text, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=utcnow, server_default=func.now(), nullable=False
+    )
 
     task: Mapped["Task"] = relationship(back_populates="reviews")
     reviewer: Mapped["User"] = relationship(back_populates="reviews_tasks")
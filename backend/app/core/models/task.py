@@ -13,6 +13,7 @@ from sqlalchemy import (
     Integer,
     Float,
     CheckConstraint,
+    Index,
     text,
 )
 
@@ -20,7 +21,7 @@ from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.models.base import Base
-from app.core.models.enums import TaskStatus, CompletionRule, DepType
+from app.core.models.enums import TaskStatus, CompletionRule, DepType, ScheduleMode
 from app.core.models.review import ReviewTask
 from app.core.models.comments import Comment
 
@@ -39,6 +40,10 @@ class OutcomeTask(Base):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Постраничный список задач проекта: WHERE project_id = ? AND (planned_start, id) > ?
+        Index("ix_tasks_project_start_id", "project_id", "planned_start", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     project_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
@@ -59,6 +64,10 @@ class Task(Base):
     status: Mapped[TaskStatus] = mapped_column(Enum(TaskStatus, name="task_status"), default=TaskStatus.Planned,
                                                nullable=False)
     duration: Mapped[float] = mapped_column(Float, nullable=False)
+    # Трёхточечная оценка длительности (дни) для анализа рисков; по умолчанию берётся duration
+    duration_optimistic: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    duration_likely: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    duration_pessimistic: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
 
     outcome_task_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("outcome_tasks.id", ondelete="RESTRICT"), nullable=False
@@ -70,6 +79,10 @@ class Task(Base):
     actual_end: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     deadline: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     auto_scheduled: Mapped[bool] = mapped_column(Boolean, default=False, server_default=text("false"), nullable=False)
+    # ASAP — как можно раньше, ALAP — как можно позже без сдвига последователей
+    schedule_mode: Mapped[ScheduleMode] = mapped_column(
+        Enum(ScheduleMode, name="schedule_mode"), default=ScheduleMode.ASAP, server_default="ASAP", nullable=False
+    )
 
     completion_rule: Mapped[CompletionRule] = mapped_column(
         Enum(CompletionRule, name="completion_rule"), default=CompletionRule.AllAssignees, nullable=False
@@ -108,6 +121,8 @@ class TaskAssignee(Base):
 
     __table_args__ = (
         UniqueConstraint("task_id", "membership_id", name="uq_task_membership"),
+        # Загрузка исполнителя по всем проектам выбирается по user_id
+        Index("ix_task_assignees_user_task", "user_id", "task_id"),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
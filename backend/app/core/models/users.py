@@ -2,11 +2,11 @@ import uuid
 from datetime import datetime
 from typing import List
 
-from sqlalchemy import String, UniqueConstraint, ForeignKey, DateTime, func, Column, Boolean, Enum
+from sqlalchemy import String, UniqueConstraint, ForeignKey, DateTime, func, Column, Boolean, Enum, Index
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.core.models.base import Base
+from app.core.models.base import Base, utcnow
 from app.core.models.enums import InviteStatus
 
 
@@ -29,16 +29,22 @@ class User(Base):
 
 class Team(Base):
     __tablename__ = "teams"
+    __table_args__ = (
+        Index("ix_teams_created_id", "created_at", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name: Mapped[str] = mapped_column(String(200), nullable=False)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False
+        DateTime(timezone=True), default=utcnow, server_default=func.now(), nullable=False
     )
 
     memberships: Mapped[List["Membership"]] = relationship(back_populates="team", cascade="all, delete-orphan")
     projects: Mapped[List["Project"]] = relationship(back_populates="team")
     invites: Mapped[List["TeamInvite"]] = relationship(back_populates="team", cascade="all, delete-orphan")
+    calendar: Mapped["WorkCalendar | None"] = relationship(
+        back_populates="team", cascade="all, delete-orphan", uselist=False
+    )
 
 
 class Membership(Base):
@@ -0,0 +1,107 @@
+"""Debounced background scheduling of ``auto_scheduled`` tasks.
+
+Writes report the auto-scheduled tasks they touched; the project is rescheduled once
+nothing new has arrived for ``delay`` seconds, so a burst of edits costs a single
+incremental pass over the union of the touched tasks. A pass holds the project's
+``schedule_writer`` locks, so it never interleaves with a recalculation or an edit.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, Set
+from uuid import UUID
+
+from app.core.scheduling.cache import bump_version
+from app.core.scheduling.store import reschedule_downstream, schedule_writer
+from app.db import SessionLocal, settings
+
+logger = logging.getLogger(__name__)
+
+
+class AutoScheduler:
+    def __init__(self, delay: float, run: Callable[[UUID, Set[UUID]], None]):
+        self.delay = delay
+        self._run = run
+        self._pending: Dict[UUID, Set[UUID]] = {}
+        self._due: Dict[UUID, float] = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+
+    def enqueue(self, project_id: UUID, task_ids: Iterable[UUID]) -> None:
+        task_ids = set(task_ids)
+        if not task_ids:
+            return
+        with self._cond:
+            self._pending.setdefault(project_id, set()).update(task_ids)
+            # Каждая новая правка откладывает пересчёт проекта ещё на delay секунд
+            self._due[project_id] = time.monotonic() + self.delay
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._loop, name="auto-scheduler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def flush(self) -> int:
+        """Run every pending project now; returns how many were scheduled."""
+        with self._cond:
+            batch = self._take(list(self._pending))
+        for project_id, task_ids in batch:
+            self._run_safely(project_id, task_ids)
+        return len(batch)
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5)
+        self.flush()
+
+    def _take(self, project_ids) -> list:
+        batch = []
+        for project_id in project_ids:
+            self._due.pop(project_id, None)
+            batch.append((project_id, self._pending.pop(project_id)))
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    now = time.monotonic()
+                    ready = [pid for pid, due in self._due.items() if due <= now]
+                    if ready:
+                        break
+                    timeout = min(self._due.values()) - now if self._due else None
+                    self._cond.wait(timeout)
+                if self._stopping:
+                    return
+                batch = self._take(ready)
+            for project_id, task_ids in batch:
+                self._run_safely(project_id, task_ids)
+
+    def _run_safely(self, project_id: UUID, task_ids: Set[UUID]) -> None:
+        try:
+            self._run(project_id, task_ids)
+        except Exception:
+            # Фоновый пересчёт не должен ронять поток планировщика
+            logger.exception("auto-scheduling failed for project %s", project_id)
+
+
+def _reschedule(project_id: UUID, task_ids: Set[UUID]) -> None:
+    db = SessionLocal()
+    try:
+        with schedule_writer(db, project_id):
+            reschedule_downstream(db, project_id, task_ids, pin=False)
+            bump_version(db, project_id)
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+auto_scheduler = AutoScheduler(settings.AUTO_SCHEDULE_DELAY_SECONDS, _reschedule)
@@ -0,0 +1,184 @@
+"""Compact storage of schedule baselines and variance against the live schedule.
+
+A baseline is one blob: a small header, then zlib-compressed task ids (16 bytes each,
+in a fixed order) followed by two little-endian int64 arrays of planned start and end
+in microseconds since epoch (UTC). Variance aligns the live windows to the baseline
+order once and compares whole arrays; with numpy the comparison and the sort by slip
+size are vectorized, without it the same is done with plain lists.
+"""
+from __future__ import annotations
+
+import struct
+import sys
+import zlib
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+from uuid import UUID
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional dependency
+    np = None
+
+MAGIC = b"BSL"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<3sBI")
+EPOCH = datetime(1970, 1, 1)
+ONE_US = timedelta(microseconds=1)
+
+
+def _to_us(value: datetime) -> int:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - EPOCH) // ONE_US
+
+
+def _from_us(value: int, aware: bool) -> datetime:
+    dt = EPOCH + timedelta(microseconds=int(value))
+    return dt.replace(tzinfo=timezone.utc) if aware else dt
+
+
+def _int64s(values: Iterable[int]) -> bytes:
+    packed = array("q", values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _from_int64s(raw: bytes) -> array:
+    values = array("q")
+    values.frombytes(raw)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def pack(windows: Iterable[Tuple[UUID, datetime, datetime]]) -> Tuple[bytes, int]:
+    """Blob of ``(task_id, start, end)`` rows and the number of tasks in it."""
+    rows = list(windows)
+    payload = b"".join(
+        (
+            b"".join(tid.bytes for tid, _, _ in rows),
+            _int64s(_to_us(start) for _, start, _ in rows),
+            _int64s(_to_us(end) for _, _, end in rows),
+        )
+    )
+    return HEADER.pack(MAGIC, FORMAT_VERSION, len(rows)) + zlib.compress(payload), len(rows)
+
+
+def unpack(blob: bytes) -> Tuple[List[UUID], array, array]:
+    """Task ids and their start/end microseconds, in the stored order."""
+    magic, fmt, count = HEADER.unpack_from(blob)
+    if magic != MAGIC or fmt != FORMAT_VERSION:
+        raise ValueError("Unsupported baseline format")
+    payload = zlib.decompress(blob[HEADER.size:])
+    ids_size = 16 * count
+    if len(payload) != ids_size + 16 * count:
+        raise ValueError("Corrupted baseline")
+    ids = [UUID(bytes=payload[i:i + 16]) for i in range(0, ids_size, 16)]
+    starts = _from_int64s(payload[ids_size:ids_size + 8 * count])
+    ends = _from_int64s(payload[ids_size + 8 * count:])
+    return ids, starts, ends
+
+
+@dataclass
+class Slip:
+    id: UUID
+    baseline_start: datetime
+    baseline_end: datetime
+    planned_start: datetime
+    planned_end: datetime
+    start_slip: timedelta
+    finish_slip: timedelta
+
+
+@dataclass
+class Variance:
+    # Задачи, окна которых отличаются от базового плана, крупнейшие сдвиги первыми
+    slips: List[Slip] = field(default_factory=list)
+    compared: int = 0
+    late: int = 0
+    early: int = 0
+    added: List[UUID] = field(default_factory=list)
+    removed: List[UUID] = field(default_factory=list)
+    baseline_finish: Optional[datetime] = None
+    planned_finish: Optional[datetime] = None
+
+
+def variance(
+    blob: bytes,
+    live: Iterable[Tuple[UUID, datetime, datetime]],
+    limit: Optional[int] = None,
+) -> Variance:
+    """Compare the live ``(task_id, start, end)`` windows with a packed baseline.
+
+    Slips are ordered by the absolute finish slip, then the absolute start slip;
+    ``limit`` caps how many of them are returned, the counters cover all tasks.
+    """
+    ids, base_starts, base_ends = unpack(blob)
+    rows = list(live)
+    aware = any(start.tzinfo is not None for _, start, _ in rows[:1])
+    position = {tid: i for i, (tid, _, _) in enumerate(rows)}
+    live_starts = [_to_us(start) for _, start, _ in rows]
+    live_ends = [_to_us(end) for _, _, end in rows]
+
+    matched = [(i, position[tid]) for i, tid in enumerate(ids) if tid in position]
+    seen = {j for _, j in matched}
+    result = Variance(
+        compared=len(matched),
+        added=[tid for j, (tid, _, _) in enumerate(rows) if j not in seen],
+        removed=[tid for tid in ids if tid not in position],
+    )
+    if base_ends:
+        result.baseline_finish = _from_us(max(base_ends), aware)
+    if live_ends:
+        result.planned_finish = _from_us(max(live_ends), aware)
+    if not matched:
+        return result
+
+    if np is not None:
+        base_idx = np.fromiter((i for i, _ in matched), dtype=np.int64, count=len(matched))
+        live_idx = np.fromiter((j for _, j in matched), dtype=np.int64, count=len(matched))
+        b_start = np.frombuffer(base_starts, dtype=np.int64)[base_idx]
+        b_end = np.frombuffer(base_ends, dtype=np.int64)[base_idx]
+        l_start = np.asarray(live_starts, dtype=np.int64)[live_idx]
+        l_end = np.asarray(live_ends, dtype=np.int64)[live_idx]
+        start_slip = l_start - b_start
+        finish_slip = l_end - b_end
+        result.late = int(np.count_nonzero(finish_slip > 0))
+        result.early = int(np.count_nonzero(finish_slip < 0))
+        changed = np.flatnonzero((start_slip != 0) | (finish_slip != 0))
+        # lexsort сортирует по последнему ключу, при равенстве — по предыдущему
+        order = changed[np.lexsort((-np.abs(start_slip[changed]), -np.abs(finish_slip[changed])))]
+        if limit is not None:
+            order = order[:limit]
+        picked = [
+            (matched[k], int(b_start[k]), int(b_end[k]), int(l_start[k]), int(l_end[k]))
+            for k in order.tolist()
+        ]
+    else:
+        windows = [
+            ((i, j), base_starts[i], base_ends[i], live_starts[j], live_ends[j]) for i, j in matched
+        ]
+        result.late = sum(1 for w in windows if w[4] > w[2])
+        result.early = sum(1 for w in windows if w[4] < w[2])
+        picked = sorted(
+            (w for w in windows if w[1] != w[3] or w[2] != w[4]),
+            key=lambda w: (-abs(w[4] - w[2]), -abs(w[3] - w[1])),
+        )[:limit]
+
+    for (i, _), b_start_us, b_end_us, l_start_us, l_end_us in picked:
+        result.slips.append(
+            Slip(
+                id=ids[i],
+                baseline_start=_from_us(b_start_us, aware),
+                baseline_end=_from_us(b_end_us, aware),
+                planned_start=_from_us(l_start_us, aware),
+                planned_end=_from_us(l_end_us, aware),
+                start_slip=(l_start_us - b_start_us) * ONE_US,
+                finish_slip=(l_end_us - b_end_us) * ONE_US,
+            )
+        )
+    return result
@@ -0,0 +1,74 @@
+"""Project schedule versions and the version-keyed LRU caches built on them."""
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from uuid import UUID
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.models.course import Project
+
+MAX_ENTRIES = 512
+
+
+def bump_version(db: Session, project_id: UUID) -> Optional[int]:
+    """Mark the project schedule as changed and return the new version.
+
+    Every task/dependency write calls this inside its transaction.
+    """
+    return db.execute(
+        update(Project)
+        .where(Project.id == project_id)
+        .values(schedule_version=Project.schedule_version + 1)
+        .returning(Project.schedule_version)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+
+def bump_team_versions(db: Session, team_id: UUID) -> None:
+    """Mark the schedules of all team projects as changed (e.g. after a calendar edit)."""
+    db.execute(
+        update(Project)
+        .where(Project.team_id == team_id)
+        .values(schedule_version=Project.schedule_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def current_version(db: Session, project_id: UUID) -> Optional[int]:
+    return db.query(Project.schedule_version).filter(Project.id == project_id).scalar()
+
+
+class VersionedLRU:
+    """Bounded LRU whose entries are valid only for the version they were built at."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple[int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: int) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != version:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Hashable, version: int, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+schedule_cache = VersionedLRU()
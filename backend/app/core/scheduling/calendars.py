@@ -0,0 +1,182 @@
+"""Working-time arithmetic over team calendars.
+
+A calendar is turned into a sorted list of working intervals (one per working day,
+absolute UTC microseconds) with the cumulative working time before each interval. A
+moment maps to its working-time position with one bisect, and a position maps back to
+a moment with another, so adding working hours or measuring the working time between
+two moments is O(log n) whatever the distance. The index covers a window of days and
+grows on demand; indexes are cached per calendar version and shared by all requests.
+"""
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+from app.core.scheduling.cache import VersionedLRU
+from app.core.scheduling.engine import MIN_DURATION_HOURS
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+NAIVE_EPOCH = datetime(1970, 1, 1)
+ONE_US = timedelta(microseconds=1)
+# Сколько дней добавляем к индексу за одно расширение
+GROW_DAYS = 366
+
+
+class CalendarIndex:
+    """Clock that only counts working hours of one calendar.
+
+    Implements the same interface as ``engine.WallClock``: ``duration``, ``add`` and
+    ``between``. Naive datetimes are read and returned as UTC.
+    """
+
+    def __init__(
+        self,
+        work_start: time,
+        work_end: time,
+        weekdays: Iterable[int],
+        holidays: Iterable[date] = (),
+        tz: str = "UTC",
+    ):
+        if work_end <= work_start:
+            raise ValueError("work_end must be after work_start")
+        self.weekdays = frozenset(weekdays)
+        if not self.weekdays <= set(range(1, 8)) or not self.weekdays:
+            raise ValueError("weekdays must be a non-empty subset of 1..7")
+        self.work_start = work_start
+        self.work_end = work_end
+        self.holidays = frozenset(holidays)
+        self.tz = ZoneInfo(tz)
+        day = datetime.combine(date.min, work_end) - datetime.combine(date.min, work_start)
+        self.hours_per_day = day.total_seconds() / 3600
+        self._lock = threading.Lock()
+        # (первый день, последний день, начала интервалов, рабочее время до интервала,
+        # рабочее время до конца интервала, границы покрытия с запасом в микросекундах);
+        # заменяется целиком, чтобы читать без блокировки
+        self._index: Optional[Tuple[date, date, List[int], List[int], List[int], int, int]] = None
+
+    # --- index --------------------------------------------------------------------
+
+    def _intervals(self, first: date, last: date):
+        day = first
+        while day <= last:
+            if day.isoweekday() in self.weekdays and day not in self.holidays:
+                start = datetime.combine(day, self.work_start, self.tz)
+                end = datetime.combine(day, self.work_end, self.tz)
+                yield (start - EPOCH) // ONE_US, (end - EPOCH) // ONE_US
+            day += timedelta(days=1)
+
+    def _build(self, first: date, last: date) -> None:
+        starts: List[int] = []
+        cum: List[int] = []
+        cum_end: List[int] = []
+        total = 0
+        for start, end in self._intervals(first, last):
+            starts.append(start)
+            cum.append(total)
+            total += end - start
+            cum_end.append(total)
+        margin = timedelta(days=GROW_DAYS)
+        lo = self._to_us(datetime.combine(first + margin, time.min))
+        hi = self._to_us(datetime.combine(last - margin, time.max))
+        self._index = (first, last, starts, cum, cum_end, lo, hi)
+
+    def _covering(self, *days: date):
+        """Index with at least a year of margin around ``days``, grown when needed."""
+        margin = timedelta(days=GROW_DAYS)
+        index = self._index
+        if index is not None and all(index[0] + margin <= day <= index[1] - margin for day in days):
+            return index
+        with self._lock:
+            first = min(days) - 2 * margin
+            last = max(days) + 2 * margin
+            if self._index is not None:
+                first = min(first, self._index[0])
+                last = max(last, self._index[1])
+            self._build(first, last)
+            return self._index
+
+    def _extend(self, forward: bool):
+        """Double the indexed span in one direction."""
+        with self._lock:
+            first, last = self._index[:2]
+            if forward:
+                self._build(first, last + (last - first))
+            else:
+                self._build(first - (last - first), last)
+            return self._index
+
+    # --- positions ----------------------------------------------------------------
+
+    @staticmethod
+    def _to_us(moment: datetime) -> int:
+        if moment.tzinfo is None:
+            return (moment - NAIVE_EPOCH) // ONE_US
+        return (moment - EPOCH) // ONE_US
+
+    @staticmethod
+    def _from_us(value: int, aware: bool) -> datetime:
+        return (EPOCH if aware else NAIVE_EPOCH) + timedelta(microseconds=value)
+
+    def _position(self, index, value: int) -> int:
+        starts, cum, cum_end = index[2:5]
+        i = bisect_right(starts, value) - 1
+        if i < 0:
+            return 0
+        return min(cum[i] + value - starts[i], cum_end[i])
+
+    def _moment(self, index, position: int, finish: bool) -> int:
+        """Moment of a working-time position; at a day boundary ``finish`` picks the evening."""
+        starts, cum, cum_end = index[2:5]
+        if finish:
+            i = bisect_left(cum_end, position)
+        else:
+            i = bisect_right(cum, position) - 1
+        i = min(max(i, 0), len(starts) - 1)
+        return starts[i] + position - cum[i]
+
+    # --- clock interface ----------------------------------------------------------
+
+    def duration(self, days: Optional[float]) -> timedelta:
+        # duration хранится в рабочих днях календаря
+        return timedelta(hours=max(float(days or 0) * self.hours_per_day, MIN_DURATION_HOURS))
+
+    def add(self, moment: datetime, delta: timedelta) -> datetime:
+        """Move ``moment`` by ``delta`` of working time (backwards when negative)."""
+        if not delta:
+            return moment
+        step = delta // ONE_US
+        value = self._to_us(moment)
+        index = self._index
+        if index is None or not index[5] <= value <= index[6]:
+            index = self._covering(moment.date())
+        while True:
+            target = self._position(index, value) + step
+            if index[4] and 0 <= target <= index[4][-1]:
+                break
+            # Цель за пределами индекса: расширяем его в нужную сторону
+            index = self._extend(forward=step > 0)
+        return self._from_us(self._moment(index, target, finish=step > 0), moment.tzinfo is not None)
+
+    def between(self, start: datetime, end: datetime) -> timedelta:
+        """Working time from ``start`` to ``end`` (negative when ``end`` is earlier)."""
+        a, b = self._to_us(start), self._to_us(end)
+        index = self._index
+        if index is None or not (index[5] <= min(a, b) and max(a, b) <= index[6]):
+            index = self._covering(start.date(), end.date())
+        return (self._position(index, b) - self._position(index, a)) * ONE_US
+
+
+calendar_cache = VersionedLRU(max_entries=64)
+
+
+def cached_index(calendar_id: UUID, version: int, load) -> CalendarIndex:
+    """Index of a stored calendar, rebuilt only when its version changes."""
+    index = calendar_cache.get(calendar_id, version)
+    if index is None:
+        index = load()
+        calendar_cache.put(calendar_id, version, index)
+    return index
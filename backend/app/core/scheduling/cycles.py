@@ -0,0 +1,377 @@
+"""Per-project dynamic topological order for incremental cycle detection.
+
+The order is kept over the same open/close events the engine schedules, so a
+parent/child SS+FF pair is not a cycle while any real loop is. New edges are
+checked with the Pearce–Kelly algorithm: only events whose position lies between
+the two endpoints are visited and reordered.
+
+The index is a per-process cache of the stored graph. It remembers the project's
+``schedule_version`` it reflects and is rebuilt when the database holds another one,
+so edges written by other workers are picked up. Callers wrap guard and commit in
+``registry.pending``: a failed transaction drops the index, a committed one moves it
+to the version it wrote. The full recalculation rejects cycles on its own as well.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.models.enums import DepType
+from app.core.models.task import Dependency, Task
+from app.core.scheduling.cache import current_version
+from app.core.scheduling.engine import CLOSE, OPEN, ROLLUP_TYPES, event_phases
+
+Event = Tuple[UUID, int]
+Pair = Tuple[UUID, UUID]
+
+MAX_PROJECTS = 256
+
+
+class CycleError(Exception):
+    def __init__(self, path: List[UUID]):
+        super().__init__("Dependency would create a cycle")
+        self.path = path
+
+
+def _task_path(events: List[Event]) -> List[UUID]:
+    path: List[UUID] = []
+    for task_id, _ in events:
+        if not path or path[-1] != task_id:
+            path.append(task_id)
+    return path
+
+
+class DynamicTopoOrder:
+    """Topological order of a project's events maintained under edge inserts."""
+
+    def __init__(self):
+        self.ord: Dict[Event, int] = {}
+        self.out: Dict[Event, Dict[Event, int]] = {}
+        self.inc: Dict[Event, Dict[Event, int]] = {}
+        self.parent_of: Dict[UUID, Optional[UUID]] = {}
+        self.dep_edges: Dict[Pair, Tuple[Event, Event]] = {}
+        self.task_deps: Dict[UUID, Set[Pair]] = {}
+        # False when the stored graph already had a cycle: checks then fall back to a
+        # full reachability search and the order is not maintained.
+        self.valid = True
+        # Версия расписания проекта, которой соответствует индекс
+        self.version: Optional[int] = None
+        self._next = 0
+
+    # --- building -----------------------------------------------------------------
+
+    @classmethod
+    def build(
+        cls,
+        tasks: Iterable[Tuple[UUID, Optional[UUID]]],
+        deps: Iterable[Tuple[UUID, UUID, DepType]],
+    ) -> "DynamicTopoOrder":
+        index = cls()
+        for task_id, parent_id in tasks:
+            index.parent_of[task_id] = parent_id
+        edges: List[Tuple[Event, Event]] = []
+        for task_id, parent_id in index.parent_of.items():
+            edges.append(((task_id, OPEN), (task_id, CLOSE)))
+            if parent_id in index.parent_of:
+                edges.extend(index._hierarchy_edges(task_id, parent_id))
+        for pred, succ, dep_type in deps:
+            if pred not in index.parent_of or succ not in index.parent_of:
+                continue
+            edge = index._dependency_edge(pred, succ, dep_type)
+            index._remember_dependency((pred, succ), edge)
+            edges.append(edge)
+
+        indeg: Dict[Event, int] = {}
+        for task_id in index.parent_of:
+            indeg[(task_id, OPEN)] = 0
+            indeg[(task_id, CLOSE)] = 0
+        for x, y in edges:
+            index._link(x, y)
+            indeg[y] += 1
+        queue = deque(ev for ev, d in indeg.items() if d == 0)
+        while queue:
+            ev = queue.popleft()
+            index.ord[ev] = index._next
+            index._next += 1
+            for nxt in index.out.get(ev, {}):
+                indeg[nxt] -= index.out[ev][nxt]
+                if indeg[nxt] == 0:
+                    queue.append(nxt)
+        for ev in indeg:
+            if ev not in index.ord:
+                index.valid = False
+                index.ord[ev] = index._next
+                index._next += 1
+        return index
+
+    def _hierarchy_edges(self, task_id: UUID, parent_id: UUID) -> List[Tuple[Event, Event]]:
+        return [((parent_id, OPEN), (task_id, OPEN)), ((task_id, CLOSE), (parent_id, CLOSE))]
+
+    def _dependency_edge(self, pred: UUID, succ: UUID, dep_type: DepType) -> Tuple[Event, Event]:
+        rollup = self.parent_of.get(pred) == succ and dep_type in ROLLUP_TYPES
+        src_phase, dst_phase = event_phases(dep_type, rollup)
+        return (pred, src_phase), (succ, dst_phase)
+
+    def _remember_dependency(self, pair: Pair, edge: Tuple[Event, Event]) -> None:
+        self.dep_edges[pair] = edge
+        self.task_deps.setdefault(pair[0], set()).add(pair)
+        self.task_deps.setdefault(pair[1], set()).add(pair)
+
+    def _forget_dependency(self, pair: Pair) -> None:
+        x, y = self.dep_edges.pop(pair)
+        self.task_deps.get(pair[0], set()).discard(pair)
+        self.task_deps.get(pair[1], set()).discard(pair)
+        self._unlink(x, y)
+
+    # --- raw edges ----------------------------------------------------------------
+
+    def _add_task(self, task_id: UUID, parent_id: Optional[UUID]) -> None:
+        self.parent_of[task_id] = parent_id
+        for phase in (OPEN, CLOSE):
+            self.ord[(task_id, phase)] = self._next
+            self._next += 1
+        self._link((task_id, OPEN), (task_id, CLOSE))
+
+    def _link(self, x: Event, y: Event) -> None:
+        self.out.setdefault(x, {})
+        self.inc.setdefault(y, {})
+        self.out[x][y] = self.out[x].get(y, 0) + 1
+        self.inc[y][x] = self.inc[y].get(x, 0) + 1
+
+    def _unlink(self, x: Event, y: Event) -> None:
+        count = self.out[x][y] - 1
+        if count:
+            self.out[x][y] = count
+            self.inc[y][x] = count
+        else:
+            del self.out[x][y]
+            del self.inc[y][x]
+
+    def add_edge(self, x: Event, y: Event) -> None:
+        """Insert x -> y, raising CycleError (nothing changed) when it closes a loop."""
+        if y in self.out.get(x, {}):
+            self._link(x, y)
+            return
+        lb, ub = self.ord[y], self.ord[x]
+        if self.valid and lb > ub:
+            self._link(x, y)
+            return
+
+        limit = ub if self.valid else None
+        parents: Dict[Event, Optional[Event]] = {y: None}
+        stack = [y]
+        while stack:
+            node = stack.pop()
+            if node == x:
+                path = [node]
+                while parents[path[-1]] is not None:
+                    path.append(parents[path[-1]])
+                raise CycleError(_task_path([x] + path[::-1]))
+            for nxt in self.out.get(node, {}):
+                if nxt not in parents and (limit is None or self.ord[nxt] <= limit):
+                    parents[nxt] = node
+                    stack.append(nxt)
+
+        self._link(x, y)
+        if not self.valid:
+            return
+
+        backward: Set[Event] = {x}
+        stack = [x]
+        while stack:
+            node = stack.pop()
+            for prev in self.inc.get(node, {}):
+                if prev not in backward and self.ord[prev] >= lb:
+                    backward.add(prev)
+                    stack.append(prev)
+
+        moved = sorted(backward, key=self.ord.__getitem__) + sorted(parents, key=self.ord.__getitem__)
+        slots = sorted(self.ord[ev] for ev in moved)
+        for ev, slot in zip(moved, slots):
+            self.ord[ev] = slot
+
+    # --- task level ---------------------------------------------------------------
+
+    def sync_task(
+        self,
+        task_id: UUID,
+        parent_id: Optional[UUID],
+        deps: Iterable[Tuple[UUID, UUID, DepType]],
+    ) -> None:
+        """Bring the edges incident to ``task_id`` in line with the stored rows."""
+        pending = []
+        for pred, succ, dep_type in deps:
+            for other in (pred, succ):
+                if other not in self.parent_of:
+                    self._add_task(other, None)
+            pending.append((pred, succ, dep_type))
+        if task_id not in self.parent_of:
+            self._add_task(task_id, None)
+
+        old_parent = self.parent_of.get(task_id)
+        for pair in list(self.task_deps.get(task_id, ())):
+            self._forget_dependency(pair)
+        if old_parent != parent_id:
+            if old_parent in self.parent_of:
+                for x, y in self._hierarchy_edges(task_id, old_parent):
+                    self._unlink(x, y)
+            self.parent_of[task_id] = parent_id
+            if parent_id is not None:
+                if parent_id not in self.parent_of:
+                    self._add_task(parent_id, None)
+                for x, y in self._hierarchy_edges(task_id, parent_id):
+                    self.add_edge(x, y)
+        for pred, succ, dep_type in pending:
+            edge = self._dependency_edge(pred, succ, dep_type)
+            self.add_edge(*edge)
+            self._remember_dependency((pred, succ), edge)
+
+    def insert_tasks(
+        self,
+        parents: Dict[UUID, Optional[UUID]],
+        deps: Iterable[Tuple[UUID, UUID, DepType]],
+    ) -> None:
+        """Add brand-new tasks (parent-first) with their dependencies."""
+        for task_id in parents:
+            self._add_task(task_id, None)
+        for task_id, parent_id in parents.items():
+            self.parent_of[task_id] = parent_id
+            if parent_id is not None:
+                if parent_id not in self.parent_of:
+                    self._add_task(parent_id, None)
+                for x, y in self._hierarchy_edges(task_id, parent_id):
+                    self.add_edge(x, y)
+        for pred, succ, dep_type in deps:
+            edge = self._dependency_edge(pred, succ, dep_type)
+            self.add_edge(*edge)
+            self._remember_dependency((pred, succ), edge)
+
+
+class PendingWrite:
+    """Handle of ``TopoRegistry.pending``: the caller stores the version it committed."""
+
+    def __init__(self):
+        self.version: Optional[int] = None
+
+
+class TopoRegistry:
+    """Bounded LRU of per-project indexes shared by the request threads."""
+
+    def __init__(self, max_projects: int = MAX_PROJECTS):
+        self.max_projects = max_projects
+        self._indexes: "OrderedDict[UUID, DynamicTopoOrder]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def forget(self, project_id: UUID) -> None:
+        with self._lock:
+            self._indexes.pop(project_id, None)
+
+    @contextmanager
+    def pending(self, project_id: UUID) -> Iterator[PendingWrite]:
+        """Wrap the check and the commit; set ``.version`` of the handle to the bumped version.
+
+        Checked edges enter the index before the transaction commits; when it does not
+        commit they must not stay there, or other requests would see loops that are not
+        in the database. After a commit the index is moved to the new version only if
+        nobody else wrote in between (the new version directly follows its own).
+        """
+        write = PendingWrite()
+        try:
+            yield write
+        except BaseException:
+            self.forget(project_id)
+            raise
+        with self._lock:
+            index = self._indexes.get(project_id)
+            if index is None:
+                return
+            if write.version is not None and index.version is not None and write.version == index.version + 1:
+                index.version = write.version
+            else:
+                self._indexes.pop(project_id, None)
+
+    def check_tasks(self, db: Session, project_id: UUID, task_ids: Iterable[UUID]) -> None:
+        """Re-sync the given (already flushed) tasks in the project index.
+
+        Raises CycleError when their dependencies close a loop; the index is dropped
+        then, since the transaction will be rolled back.
+        """
+        task_ids = set(task_ids)
+        if not task_ids:
+            return
+        deps = (
+            db.query(Dependency.predecessor_task_id, Dependency.successor_task_id, Dependency.type)
+            .filter(
+                or_(
+                    Dependency.predecessor_task_id.in_(task_ids),
+                    Dependency.successor_task_id.in_(task_ids),
+                )
+            )
+            .all()
+        )
+        parents = dict(db.query(Task.id, Task.parent_id).filter(Task.id.in_(task_ids)).all())
+
+        with self._lock:
+            index = self._index(db, project_id, task_ids)
+            try:
+                for task_id in task_ids:
+                    own = [d for d in deps if task_id in (d[0], d[1])]
+                    index.sync_task(task_id, parents.get(task_id), own)
+            except CycleError:
+                self._indexes.pop(project_id, None)
+                raise
+
+    def check_batch(
+        self,
+        db: Session,
+        project_id: UUID,
+        parents: Dict[UUID, Optional[UUID]],
+        deps: Iterable[Tuple[UUID, UUID, DepType]],
+    ) -> None:
+        """Same check for tasks that are not stored yet; ``parents`` is in parent-first order."""
+        with self._lock:
+            index = self._index(db, project_id, set(parents))
+            try:
+                index.insert_tasks(parents, deps)
+            except CycleError:
+                self._indexes.pop(project_id, None)
+                raise
+
+    def _index(self, db: Session, project_id: UUID, skip: Set[UUID]) -> DynamicTopoOrder:
+        version = current_version(db, project_id)
+        index = self._indexes.get(project_id)
+        if index is None or index.version != version:
+            # Граф менялся мимо этого процесса (другой воркер, пересчёт): строим заново
+            index = self._load(db, project_id, skip)
+            index.version = version
+            self._indexes[project_id] = index
+            while len(self._indexes) > self.max_projects:
+                self._indexes.popitem(last=False)
+        self._indexes.move_to_end(project_id)
+        return index
+
+    def _load(self, db: Session, project_id: UUID, skip: Set[UUID]) -> DynamicTopoOrder:
+        """Full build, leaving out tasks about to be synced so their edges get checked."""
+        tasks = [
+            (tid, parent_id if tid not in skip else None)
+            for tid, parent_id in db.query(Task.id, Task.parent_id).filter(Task.project_id == project_id)
+        ]
+        deps = [
+            (pred, succ, dep_type)
+            for pred, succ, dep_type in db.query(
+                Dependency.predecessor_task_id, Dependency.successor_task_id, Dependency.type
+            )
+            .join(Task, Dependency.successor_task_id == Task.id)
+            .filter(Task.project_id == project_id)
+            if pred not in skip and succ not in skip
+        ]
+        return DynamicTopoOrder.build(tasks, deps)
+
+
+registry = TopoRegistry()
@@ -0,0 +1,166 @@
+"""Earned-value metrics of projects from their leaf tasks.
+
+The budget of a task is its duration in days, so all values are in task-days:
+
+* planned value (PV) — the part of the budget that the plan expected done by ``as_of``
+  (linear over the planned window);
+* earned value (EV) — budget times the real progress: 1 when the task finished by
+  ``as_of``, otherwise the share of completed assignees (any one of them for
+  ``AnyOne`` tasks);
+* actual cost (AC) — days spent from ``actual_start`` to ``actual_end`` or ``as_of``.
+
+Rows come from one grouped SQL query (see ``store.load_progress``); all projects are
+computed in one pass over arrays and summed per project with ``bincount``.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Sequence
+from uuid import UUID
+
+from app.core.models.enums import CompletionRule, TaskStatus
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional dependency
+    np = None
+
+NONE = -(2 ** 63)
+US_PER_DAY = 86_400_000_000
+EPOCH = datetime(1970, 1, 1)
+ONE_US = timedelta(microseconds=1)
+
+
+def _to_us(value: Optional[datetime]) -> int:
+    if value is None:
+        return NONE
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - EPOCH) // ONE_US
+
+
+@dataclass
+class EarnedValue:
+    tasks: int = 0
+    budget: float = 0.0
+    planned_value: float = 0.0
+    earned_value: float = 0.0
+    actual_cost: float = 0.0
+
+    @property
+    def schedule_variance(self) -> float:
+        return self.earned_value - self.planned_value
+
+    @property
+    def cost_variance(self) -> float:
+        return self.earned_value - self.actual_cost
+
+    @property
+    def spi(self) -> Optional[float]:
+        return self.earned_value / self.planned_value if self.planned_value else None
+
+    @property
+    def cpi(self) -> Optional[float]:
+        return self.earned_value / self.actual_cost if self.actual_cost else None
+
+    @property
+    def percent_complete(self) -> Optional[float]:
+        return self.earned_value / self.budget if self.budget else None
+
+    def as_dict(self) -> dict:
+        return {
+            "tasks": self.tasks,
+            "budget_at_completion": self.budget,
+            "planned_value": self.planned_value,
+            "earned_value": self.earned_value,
+            "actual_cost": self.actual_cost,
+            "schedule_variance": self.schedule_variance,
+            "cost_variance": self.cost_variance,
+            "spi": self.spi,
+            "cpi": self.cpi,
+            "percent_complete": self.percent_complete,
+        }
+
+    def add(self, other: "EarnedValue") -> None:
+        self.tasks += other.tasks
+        self.budget += other.budget
+        self.planned_value += other.planned_value
+        self.earned_value += other.earned_value
+        self.actual_cost += other.actual_cost
+
+
+def _task_values(row, now: int):
+    """(PV, EV, AC) of one task; the reference for the vectorized pass below."""
+    _, budget, start, end, actual_start, actual_end, status, rule, assigned, completed = row
+    budget = float(budget or 0)
+    start, end = _to_us(start), _to_us(end)
+    actual_start, actual_end = _to_us(actual_start), _to_us(actual_end)
+    planned = budget * min(max((now - start) / max(end - start, 1), 0.0), 1.0)
+    finished = actual_end <= now if actual_end != NONE else status == TaskStatus.Done
+    if finished:
+        progress = 1.0
+    elif assigned and rule == CompletionRule.AnyOne:
+        progress = 1.0 if completed else 0.0
+    elif assigned:
+        progress = completed / assigned
+    else:
+        progress = 0.0
+    cost = 0.0
+    if actual_start != NONE:
+        stop = min(actual_end, now) if actual_end != NONE else now
+        cost = max(stop - actual_start, 0) / US_PER_DAY
+    return planned, budget * progress, cost
+
+
+def compute(rows: Iterable[tuple], project_ids: Sequence[UUID], as_of: datetime) -> Dict[UUID, EarnedValue]:
+    """Metrics per project from ``store.load_progress`` rows, at ``as_of``."""
+    rows = list(rows)
+    now = _to_us(as_of)
+    result = {pid: EarnedValue() for pid in project_ids}
+    if not rows:
+        return result
+
+    if np is None:
+        for row in rows:
+            planned, earned, cost = _task_values(row, now)
+            value = result[row[0]]
+            value.add(EarnedValue(1, float(row[1] or 0), planned, earned, cost))
+        return result
+
+    position = {pid: i for i, pid in enumerate(project_ids)}
+    n = len(rows)
+
+    def column(i, convert=lambda v: v, dtype=np.int64):
+        return np.fromiter((convert(row[i]) for row in rows), dtype=dtype, count=n)
+
+    project = column(0, position.__getitem__)
+    budget = column(1, lambda v: float(v or 0), np.float64)
+    start, end = column(2, _to_us), column(3, _to_us)
+    actual_start, actual_end = column(4, _to_us), column(5, _to_us)
+    done = column(6, lambda v: v == TaskStatus.Done, bool)
+    any_one = column(7, lambda v: v == CompletionRule.AnyOne, bool)
+    assigned = column(8, int)
+    completed = column(9, lambda v: int(v or 0))
+
+    planned = budget * np.clip((now - start) / np.maximum(end - start, 1), 0.0, 1.0)
+    has_end = actual_end != NONE
+    finished = np.where(has_end, actual_end <= now, done)
+    share = np.where(any_one, completed > 0, completed / np.maximum(assigned, 1))
+    progress = np.where(finished, 1.0, np.where(assigned > 0, share, 0.0))
+    stop = np.where(has_end, np.minimum(actual_end, now), now)
+    # Для не начатых задач подставляем stop, чтобы не вычитать NONE
+    elapsed = stop - np.where(actual_start != NONE, actual_start, stop)
+    cost = np.maximum(elapsed, 0) / US_PER_DAY
+
+    size = len(project_ids)
+    sums = [
+        np.bincount(project, weights=weights, minlength=size)
+        for weights in (budget, planned, budget * progress, cost)
+    ]
+    counts = np.bincount(project, minlength=size)
+    for pid, i in position.items():
+        result[pid] = EarnedValue(
+            int(counts[i]), float(sums[0][i]), float(sums[1][i]), float(sums[2][i]), float(sums[3][i])
+        )
+    return result
@@ -0,0 +1,525 @@
+"""Critical-path scheduling engine.
+
+The engine works on plain in-memory nodes, so it does not depend on a DB session.
+Every task is split into two events: ``open`` (own window, parent clamp, dependency
+constraints) and ``close`` (roll-up of child finishes into a summary task). The events
+form a DAG even for parent/child pairs linked with SS/FF, so both passes are a single
+topological sweep, O(V+E).
+
+The forward pass places every task as soon as possible. The backward pass computes
+late dates from the project deadline and, in the same sweep, shifts ALAP tasks as late
+as their successors allow. The project deadline is never forced onto the forward
+dates: tasks that cannot meet it are reported in ``ScheduleResult.infeasible``.
+
+Durations and lags are measured by a clock: ``WallClock`` counts every hour, a team
+calendar (``calendars.CalendarIndex``) only working hours.
+"""
+from __future__ import annotations
+
+import heapq
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from uuid import UUID
+
+from app.core.models.enums import DepType
+
+MIN_DURATION_HOURS = 1.0 / 60.0
+
+# Типы связей, которые читают старт предшественника (остальные читают его окончание)
+PRED_START_TYPES = (DepType.SS, DepType.SF)
+# Типы связей, которые ограничивают старт последователя (остальные ограничивают окончание)
+SUCC_START_TYPES = (DepType.FS, DepType.SS)
+# Связи ребёнок -> родитель этих типов растягивают окончание родителя
+ROLLUP_TYPES = (DepType.FF, DepType.SF)
+
+
+OPEN, CLOSE = 0, 1
+
+
+def event_phases(dep_type: DepType, rollup: bool) -> tuple[int, int]:
+    """Phases (predecessor event, successor event) linked by a dependency."""
+    return (OPEN if dep_type in PRED_START_TYPES else CLOSE, CLOSE if rollup else OPEN)
+
+
+def duration_hours(duration: float | None) -> float:
+    # duration хранится в днях; переводим в часы для расчётов
+    return max(float(duration or 0) * 24.0, MIN_DURATION_HOURS)
+
+
+class WallClock:
+    """Elapsed time: every hour of the day counts."""
+
+    def duration(self, days: Optional[float]) -> timedelta:
+        return timedelta(hours=duration_hours(days))
+
+    def add(self, moment: datetime, delta: timedelta) -> datetime:
+        return moment + delta
+
+    def between(self, start: datetime, end: datetime) -> timedelta:
+        return end - start
+
+
+WALL_CLOCK = WallClock()
+
+
+@dataclass(slots=True)
+class TaskNode:
+    id: UUID
+    duration: float = 0.0
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    deadline: Optional[datetime] = None
+    parent_id: Optional[UUID] = None
+    fixed: bool = False
+    alap: bool = False
+
+    @property
+    def effective_end(self) -> Optional[datetime]:
+        return self.deadline or self.end
+
+
+@dataclass(slots=True)
+class DependencyEdge:
+    predecessor_id: UUID
+    successor_id: UUID
+    type: DepType
+    lag: float = 0
+
+
+@dataclass
+class ScheduleResult:
+    order: List[UUID]
+    changed: Set[UUID]
+    cycle: List[UUID] = field(default_factory=list)
+    windows: Dict[UUID, tuple] = field(default_factory=dict)
+    # Ранние даты до сдвига ALAP-задач: от них считаются резервы и критический путь
+    early_start: Dict[UUID, datetime] = field(default_factory=dict)
+    early_finish: Dict[UUID, datetime] = field(default_factory=dict)
+    late_start: Dict[UUID, datetime] = field(default_factory=dict)
+    late_finish: Dict[UUID, datetime] = field(default_factory=dict)
+    total_float: Dict[UUID, timedelta] = field(default_factory=dict)
+    free_float: Dict[UUID, timedelta] = field(default_factory=dict)
+    critical: Set[UUID] = field(default_factory=set)
+    # Насколько задачи заканчиваются позже дедлайна проекта
+    infeasible: Dict[UUID, timedelta] = field(default_factory=dict)
+
+
+class ScheduleGraph:
+    """Tasks and dependency edges of one project, indexed for the passes."""
+
+    def __init__(
+        self,
+        nodes: Iterable[TaskNode],
+        edges: Iterable[DependencyEdge],
+        project_deadline: Optional[datetime] = None,
+        clock=None,
+    ):
+        self.nodes: Dict[UUID, TaskNode] = {n.id: n for n in nodes}
+        self.project_deadline = project_deadline
+        self.clock = clock or WALL_CLOCK
+        self.preds: Dict[UUID, List[DependencyEdge]] = {}
+        self.rollups: Dict[UUID, List[DependencyEdge]] = {}
+        self.succs: Dict[UUID, List[DependencyEdge]] = {}
+        self.children: Dict[UUID, List[UUID]] = {}
+
+        for node in self.nodes.values():
+            if node.parent_id in self.nodes:
+                self.children.setdefault(node.parent_id, []).append(node.id)
+        for edge in edges:
+            pred = self.nodes.get(edge.predecessor_id)
+            if pred is None or edge.successor_id not in self.nodes:
+                continue
+            self.succs.setdefault(edge.predecessor_id, []).append(edge)
+            if self.is_rollup(edge):
+                self.rollups.setdefault(edge.successor_id, []).append(edge)
+            else:
+                self.preds.setdefault(edge.successor_id, []).append(edge)
+
+    def is_rollup(self, edge: DependencyEdge) -> bool:
+        pred = self.nodes[edge.predecessor_id]
+        return pred.parent_id == edge.successor_id and edge.type in ROLLUP_TYPES
+
+    def snapshot(self) -> Dict[UUID, tuple]:
+        return {tid: (n.start, n.end) for tid, n in self.nodes.items()}
+
+    # --- ordering -----------------------------------------------------------------
+
+    def event_order(
+        self, priority: Optional[Callable[[UUID], Any]] = None
+    ) -> tuple[List[tuple[UUID, int]], List[UUID]]:
+        """Topological order of (task_id, phase) events; phase 0 is open, 1 is close.
+
+        Returns the order and the ids of tasks caught in a cycle (their events are
+        appended at the end in insertion order). With ``priority`` the ready event of
+        the task with the smallest key goes first instead of the oldest one.
+        """
+        ids = list(self.nodes)
+        index = {tid: i for i, tid in enumerate(ids)}
+        size = 2 * len(ids)
+        out: List[List[int]] = [[] for _ in range(size)]
+        indeg = [0] * size
+
+        def link(src: int, dst: int):
+            out[src].append(dst)
+            indeg[dst] += 1
+
+        for tid, i in index.items():
+            link(2 * i, 2 * i + 1)
+            node = self.nodes[tid]
+            if node.parent_id in index:
+                p = index[node.parent_id]
+                link(2 * p, 2 * i)
+                link(2 * i + 1, 2 * p + 1)
+        for edges in self.succs.values():
+            for edge in edges:
+                src_phase, dst_phase = event_phases(edge.type, self.is_rollup(edge))
+                link(2 * index[edge.predecessor_id] + src_phase, 2 * index[edge.successor_id] + dst_phase)
+
+        ready = [ev for ev in range(size) if indeg[ev] == 0]
+        order: List[int] = []
+        if priority is None:
+            queue = deque(ready)
+            while queue:
+                ev = queue.popleft()
+                order.append(ev)
+                for nxt in out[ev]:
+                    indeg[nxt] -= 1
+                    if indeg[nxt] == 0:
+                        queue.append(nxt)
+        else:
+            keys = [priority(tid) for tid in ids]
+            heap = [(keys[ev // 2], ev) for ev in ready]
+            heapq.heapify(heap)
+            while heap:
+                ev = heapq.heappop(heap)[1]
+                order.append(ev)
+                for nxt in out[ev]:
+                    indeg[nxt] -= 1
+                    if indeg[nxt] == 0:
+                        heapq.heappush(heap, (keys[nxt // 2], nxt))
+
+        cycle: List[UUID] = []
+        if len(order) != size:
+            seen = set(order)
+            stuck = [ev for ev in range(size) if ev not in seen]
+            cycle = list(dict.fromkeys(ids[ev // 2] for ev in stuck))
+            order.extend(stuck)
+        return [(ids[ev // 2], ev % 2) for ev in order], cycle
+
+    # --- forward pass -------------------------------------------------------------
+
+    def _dependency_bounds(self, edges: Iterable[DependencyEdge]):
+        dep_start = None
+        dep_end = None
+        for edge in edges:
+            pred = self.nodes[edge.predecessor_id]
+            anchor = pred.start if edge.type in PRED_START_TYPES else pred.effective_end
+            if not anchor:
+                continue
+            candidate = self.clock.add(anchor, timedelta(hours=float(edge.lag or 0)))
+            if edge.type in SUCC_START_TYPES:
+                dep_start = candidate if dep_start is None else max(dep_start, candidate)
+            else:
+                dep_end = candidate if dep_end is None else max(dep_end, candidate)
+        return dep_start, dep_end
+
+    def evaluate_open(self, node: TaskNode) -> None:
+        clock = self.clock
+        dur = clock.duration(node.duration)
+        start = node.start
+        end = node.effective_end
+
+        if not start and not end:
+            end = datetime.utcnow()
+            start = clock.add(end, -dur)
+        elif start and not end:
+            end = clock.add(start, dur)
+        elif end and not start:
+            start = clock.add(end, -dur)
+
+        parent = self.nodes.get(node.parent_id) if node.parent_id else None
+        if parent:
+            parent_start = parent.start
+            parent_end = parent.effective_end
+
+            if parent_start and start and start < parent_start:
+                start = parent_start
+                end = clock.add(start, dur)
+
+            if parent_end and end and end > parent_end:
+                end = parent_end
+                start = clock.add(end, -dur)
+
+            if parent_start and start and start < parent_start:
+                start = parent_start
+                if end and end < start:
+                    end = start
+
+        dep_start, dep_end = self._dependency_bounds(self.preds.get(node.id, ()))
+
+        if dep_start and (not start or start < dep_start):
+            start = dep_start
+            end = clock.add(start, dur)
+
+        if dep_end and (not end or end < dep_end):
+            end = dep_end
+            start = clock.add(end, -dur)
+
+        if end and start and end < start:
+            end = start
+
+        node.start = start
+        node.end = end
+
+    def evaluate_close(self, node: TaskNode) -> None:
+        """Stretch a summary task so it finishes after its rolled-up children."""
+        edges = self.rollups.get(node.id)
+        if not edges:
+            return
+        _, rollup_end = self._dependency_bounds(edges)
+        if rollup_end and node.end and rollup_end > node.end:
+            node.end = rollup_end
+
+    def evaluate(self, node: TaskNode, phase: int) -> None:
+        """Evaluate one event of ``node`` against the current windows of its inputs."""
+        if phase == OPEN:
+            start = node.start
+            self.evaluate_open(node)
+            if node.deadline and node.start != start:
+                # Окно задачи с дедлайном пересчитывается от дедлайна, поэтому
+                # после сдвига старта окончание нужно пересчитать ещё раз
+                self.evaluate_open(node)
+        else:
+            self.evaluate_close(node)
+
+    def forward_pass(
+        self,
+        order: List[tuple[UUID, int]],
+        seeds: Optional[Set[UUID]] = None,
+    ) -> Set[UUID]:
+        """Apply constraints in event order and return ids whose window changed.
+
+        With ``seeds`` only those tasks and tasks downstream of a change are evaluated;
+        everything else is taken as is.
+        """
+        before = self.snapshot()
+        touched: Set[UUID] = set(seeds or ())
+        for task_id, phase in order:
+            node = self.nodes[task_id]
+            if node.fixed:
+                continue
+            if seeds is not None and not self._inputs_touched(node, phase, touched):
+                continue
+            self.evaluate(node, phase)
+            if (node.start, node.end) != before[task_id]:
+                touched.add(task_id)
+        return {tid for tid, n in self.nodes.items() if (n.start, n.end) != before[tid]}
+
+    def _inputs_touched(self, node: TaskNode, phase: int, touched: Set[UUID]) -> bool:
+        if node.id in touched:
+            return True
+        if phase == 0:
+            if node.parent_id in touched:
+                return True
+            edges = self.preds.get(node.id, ())
+        else:
+            edges = self.rollups.get(node.id, ())
+        return any(edge.predecessor_id in touched for edge in edges)
+
+    # --- backward pass ------------------------------------------------------------
+
+    def backward_pass(
+        self,
+        order: List[tuple[UUID, int]],
+        result: ScheduleResult,
+        place_alap: bool = False,
+    ) -> None:
+        """Late dates against the project deadline (or the latest finish when unset).
+
+        With ``place_alap`` ALAP tasks are moved to their latest position on the way.
+        Floats are measured from the windows as they were before that move, kept in
+        ``result.early_start`` / ``result.early_finish``.
+        """
+        ends = [n.end for n in self.nodes.values() if n.end]
+        anchor = self.project_deadline or (max(ends) if ends else None)
+        if anchor is None:
+            return
+        for task_id, node in self.nodes.items():
+            if node.start and node.end:
+                result.early_start[task_id] = node.start
+                result.early_finish[task_id] = node.end
+        late_start = result.late_start
+        late_finish = result.late_finish
+
+        for task_id, phase in reversed(order):
+            node = self.nodes[task_id]
+            if node.fixed or not node.start or not node.end:
+                if node.start and node.end:
+                    late_start[task_id] = node.start
+                    late_finish[task_id] = node.end
+                continue
+            span = self.clock.between(node.start, node.end)
+            if phase == 1:
+                lf = anchor
+                if node.deadline and node.deadline < lf:
+                    lf = node.deadline
+                parent_lf = late_finish.get(node.parent_id) if node.parent_id else None
+                if parent_lf and parent_lf < lf:
+                    lf = parent_lf
+                for edge in self.succs.get(task_id, ()):
+                    if edge.type in PRED_START_TYPES:
+                        continue
+                    bound = self._late_bound(edge, result)
+                    if bound is not None and bound < lf:
+                        lf = bound
+                late_finish[task_id] = lf
+            else:
+                lf = late_finish[task_id]
+                ls = self.clock.add(lf, -span)
+                for child_id in self.children.get(task_id, ()):
+                    child_ls = late_start.get(child_id)
+                    if child_ls and child_ls < ls:
+                        ls = child_ls
+                for edge in self.succs.get(task_id, ()):
+                    if edge.type not in PRED_START_TYPES:
+                        continue
+                    bound = self._late_bound(edge, result)
+                    if bound is not None and bound < ls:
+                        ls = bound
+                late_start[task_id] = ls
+                if task_id not in self.children and self.clock.add(ls, span) < lf:
+                    late_finish[task_id] = self.clock.add(ls, span)
+                if place_alap and node.alap and task_id not in self.children:
+                    # Все события последователей и родителя уже пройдены
+                    self._place_late(node, anchor)
+
+        for task_id in self.nodes:
+            if task_id in late_start and task_id in result.early_start:
+                result.total_float[task_id] = late_start[task_id] - result.early_start[task_id]
+                result.free_float[task_id] = self._free_float(task_id, result)
+        floats = [tf for tid, tf in result.total_float.items() if not self.nodes[tid].fixed]
+        if floats:
+            least = min(floats)
+            slack = timedelta(seconds=1)
+            result.critical = {
+                tid
+                for tid, tf in result.total_float.items()
+                if not self.nodes[tid].fixed and tf - least < slack
+            }
+
+    def _place_late(self, node: TaskNode, anchor: datetime) -> None:
+        """Shift an ALAP task as late as its successors, parent and deadlines allow."""
+        clock = self.clock
+        span = clock.between(node.start, node.end)
+        finish = anchor
+        if node.deadline and node.deadline < finish:
+            finish = node.deadline
+        parent = self.nodes.get(node.parent_id) if node.parent_id else None
+        if parent and parent.effective_end and parent.effective_end < finish:
+            finish = parent.effective_end
+        for edge in self.succs.get(node.id, ()):
+            if self.is_rollup(edge):
+                continue
+            succ = self.nodes[edge.successor_id]
+            bound = succ.start if edge.type in SUCC_START_TYPES else succ.end
+            if bound is None:
+                continue
+            bound = clock.add(bound, -timedelta(hours=float(edge.lag or 0)))
+            if edge.type in PRED_START_TYPES:
+                bound = clock.add(bound, span)
+            if bound < finish:
+                finish = bound
+        if finish > node.end:
+            node.start, node.end = clock.add(finish, -span), finish
+
+    def overruns(self) -> Dict[UUID, timedelta]:
+        """How far non-fixed tasks finish past the project deadline."""
+        deadline = self.project_deadline
+        if not deadline:
+            return {}
+        return {
+            tid: node.end - deadline
+            for tid, node in self.nodes.items()
+            if not node.fixed and node.end and node.end > deadline
+        }
+
+    def _free_float(self, task_id: UUID, result: ScheduleResult) -> timedelta:
+        """How far the task may slip without moving the early dates of any successor."""
+        free = result.total_float[task_id]
+        early_start, early_finish = result.early_start, result.early_finish
+        for edge in self.succs.get(task_id, ()):
+            succ_id = edge.successor_id
+            if self.is_rollup(edge) or succ_id not in early_start:
+                continue
+            anchor = early_start[task_id] if edge.type in PRED_START_TYPES else early_finish[task_id]
+            bound = early_start[succ_id] if edge.type in SUCC_START_TYPES else early_finish[succ_id]
+            gap = bound - self.clock.add(anchor, timedelta(hours=float(edge.lag or 0)))
+            if gap < free:
+                free = gap
+        return max(free, timedelta(0))
+
+    def _late_bound(self, edge: DependencyEdge, result: ScheduleResult) -> Optional[datetime]:
+        """Latest value of the predecessor anchor (start or finish) allowed by an edge."""
+        if self.is_rollup(edge):
+            # Окончание ребёнка уже ограничено поздним окончанием родителя
+            return None
+        if edge.type in SUCC_START_TYPES:
+            succ_late = result.late_start.get(edge.successor_id)
+        else:
+            succ_late = result.late_finish.get(edge.successor_id)
+        if succ_late is None:
+            return None
+        return self.clock.add(succ_late, -timedelta(hours=float(edge.lag or 0)))
+
+    def release_alap(self) -> None:
+        """Let the forward pass find the early dates of ALAP tasks.
+
+        A stored ALAP window is already the late one, and the forward pass never moves a
+        task before its start; so ALAP tasks restart from the project start, and their
+        parents and predecessors push them to the early position. ``schedule`` then
+        places them late again.
+        """
+        starts = [n.start for n in self.nodes.values() if n.start and not n.alap]
+        if not starts:
+            return
+        origin = min(starts)
+        for node in self.nodes.values():
+            if node.alap and not node.fixed and node.start and node.end and node.start > origin:
+                span = self.clock.between(node.start, node.end)
+                node.start, node.end = origin, self.clock.add(origin, span)
+
+    # --- entry point --------------------------------------------------------------
+
+    def analyze(self) -> ScheduleResult:
+        """Late dates, float and the critical chain of the windows as they are stored."""
+        order, cycle = self.event_order()
+        result = ScheduleResult(
+            order=list(dict.fromkeys(tid for tid, _ in order)),
+            changed=set(),
+            cycle=cycle,
+            infeasible=self.overruns(),
+        )
+        self.backward_pass(order, result)
+        return result
+
+    def schedule(self, seeds: Optional[Set[UUID]] = None) -> ScheduleResult:
+        """Run both passes; with ``seeds`` only the forward pass over a partial graph.
+
+        ALAP tasks are placed by the backward pass, so only a full run moves them late.
+        """
+        order, cycle = self.event_order()
+        before = self.snapshot()
+        self.forward_pass(order, seeds)
+        result = ScheduleResult(
+            order=list(dict.fromkeys(tid for tid, _ in order)),
+            changed=set(),
+            cycle=cycle,
+        )
+        if seeds is None:
+            self.backward_pass(order, result, place_alap=True)
+        result.changed = {tid for tid, n in self.nodes.items() if (n.start, n.end) != before[tid]}
+        result.windows = {tid: (self.nodes[tid].start, self.nodes[tid].end) for tid in result.changed}
+        result.infeasible = self.overruns()
+        return result
@@ -0,0 +1,95 @@
+"""In-process background jobs for long schedule computations.
+
+Jobs run on a small thread pool so a recalculation storm cannot take every request
+thread and DB connection; the number of queued plus running jobs is capped as well.
+Job state lives in memory and the most recent finished jobs are kept for polling.
+"""
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+from app.db import settings
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+KEEP_FINISHED = 1000
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: UUID
+    kind: str
+    project_id: UUID
+    status: str = QUEUED
+    progress: float = 0.0
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class JobRunner:
+    def __init__(self, workers: int, max_pending: int, keep: int = KEEP_FINISHED):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.keep = keep
+        self._jobs: "OrderedDict[UUID, Job]" = OrderedDict()
+        self._pending = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, project_id: UUID, fn: Callable[[Job], Any]) -> Job:
+        """Queue ``fn(job)``; raises JobQueueFull when the pool is saturated."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull()
+            job = Job(id=uuid.uuid4(), kind=kind, project_id=project_id)
+            self._jobs[job.id] = job
+            self._pending += 1
+            self._prune()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="schedule-job")
+            self._executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id: UUID) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]) -> None:
+        job.status = RUNNING
+        job.started_at = datetime.utcnow()
+        try:
+            job.result = fn(job)
+            job.progress = 1.0
+            job.status = DONE
+        except Exception as exc:
+            job.error = str(exc) or exc.__class__.__name__
+            job.status = FAILED
+        finally:
+            job.finished_at = datetime.utcnow()
+            with self._lock:
+                self._pending -= 1
+
+    def _prune(self) -> None:
+        finished = [jid for jid, j in self._jobs.items() if j.status in (DONE, FAILED)]
+        for jid in finished[: max(0, len(finished) - self.keep)]:
+            del self._jobs[jid]
+
+
+runner = JobRunner(settings.RECALC_WORKERS, settings.RECALC_QUEUE_LIMIT)
@@ -0,0 +1,124 @@
+"""Resource leveling: delay tasks so that no assignee works on two tasks at once.
+
+Serial schedule generation over the engine's events. Events are taken in topological
+order, and among the ready ones the task with the earliest late start (least slack)
+goes first. Each task is first fitted to its dependencies and parent by the engine,
+then moved to the first slot where all of its assignees are free. The busy time of
+every user is a sorted list of disjoint intervals, so a conflict check is one bisect
+and booking a slot merges it with its neighbours.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from app.core.scheduling.engine import OPEN, ScheduleGraph
+
+
+class Timeline:
+    """Busy time of one user as sorted, disjoint intervals."""
+
+    def __init__(self):
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+
+    def conflict(self, start: datetime, end: datetime) -> Optional[datetime]:
+        """End of the first busy interval overlapping [start, end), if any."""
+        i = bisect_right(self.ends, start)
+        if i < len(self.starts) and self.starts[i] < end:
+            return self.ends[i]
+        return None
+
+    def book(self, start: datetime, end: datetime) -> None:
+        if end <= start:
+            return
+        # Интервалы, которые пересекаются с новым или касаются его, сливаются в один
+        i = bisect_left(self.ends, start)
+        j = bisect_right(self.starts, end)
+        if i < j:
+            start = min(start, self.starts[i])
+            end = max(end, self.ends[j - 1])
+        self.starts[i:j] = [start]
+        self.ends[i:j] = [end]
+
+
+@dataclass
+class LevelingResult:
+    # Сдвиг старта каждой задачи относительно расписания без учёта ресурсов
+    delays: Dict[UUID, timedelta] = field(default_factory=dict)
+    # Новые окна задач, отличающиеся от исходных
+    windows: Dict[UUID, tuple] = field(default_factory=dict)
+    early_starts: Dict[UUID, datetime] = field(default_factory=dict)
+    finish_before: Optional[datetime] = None
+    finish_after: Optional[datetime] = None
+
+
+def _finish(graph: ScheduleGraph) -> Optional[datetime]:
+    ends = [n.end for n in graph.nodes.values() if n.end]
+    return max(ends) if ends else None
+
+
+def level(
+    graph: ScheduleGraph,
+    assignees: Dict[UUID, Set[UUID]],
+    busy: Iterable[Tuple[UUID, datetime, datetime]] = (),
+) -> LevelingResult:
+    """Level ``graph`` in place.
+
+    ``assignees`` maps task ids to user ids; ``busy`` are (user, start, end) bookings
+    outside the graph (other projects), which are never moved.
+    """
+    stored = graph.snapshot()
+    graph.release_alap()
+    base = graph.schedule()
+    if base.cycle:
+        raise ValueError("Project dependencies contain a cycle")
+    # Окна без учёта ресурсов (ALAP-задачи уже сдвинуты) — от них меряются задержки;
+    # ранние даты прямого прохода задают порядок и попадают в отчёт
+    unleveled = {tid: n.start for tid, n in graph.nodes.items()}
+    early = {tid: base.early_start.get(tid, start) for tid, start in unleveled.items()}
+    result = LevelingResult(early_starts=early, finish_before=_finish(graph))
+
+    timelines: Dict[UUID, Timeline] = defaultdict(Timeline)
+    for user_id, start, end in sorted(busy, key=lambda b: b[1]):
+        timelines[user_id].book(start, end)
+
+    def priority(tid: UUID):
+        return base.late_start.get(tid) or early[tid], early[tid]
+
+    order, _ = graph.event_order(priority)
+    clock = graph.clock
+    for task_id, phase in order:
+        node = graph.nodes[task_id]
+        if node.fixed:
+            continue
+        graph.evaluate(node, phase)
+        users = assignees.get(task_id)
+        if phase != OPEN or not users or task_id in graph.children or not node.start:
+            continue
+        span = clock.between(node.start, node.end)
+        start, end = node.start, node.end
+        lines = [timelines[u] for u in users]
+        moved = True
+        while moved:
+            moved = False
+            for line in lines:
+                busy_until = line.conflict(start, end)
+                if busy_until is not None:
+                    start, end = busy_until, clock.add(busy_until, span)
+                    moved = True
+        node.start, node.end = start, end
+        for line in lines:
+            line.book(start, end)
+
+    for tid, node in graph.nodes.items():
+        if node.start and unleveled[tid] and node.start > unleveled[tid]:
+            result.delays[tid] = node.start - unleveled[tid]
+        if (node.start, node.end) != stored[tid]:
+            result.windows[tid] = (node.start, node.end)
+    result.finish_after = _finish(graph)
+    return result
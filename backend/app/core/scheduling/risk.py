@@ -0,0 +1,214 @@
+"""Monte Carlo schedule risk analysis over three-point (PERT) duration estimates.
+
+Durations are drawn from the PERT beta distribution for a whole batch of samples at
+once, so every task is a column of an (samples x tasks) matrix. The event order of the
+engine is walked a single time per batch and each event updates its column for all
+samples with vectorized max-reductions. Each sample remembers which constraint drove
+every start and finish; walking those drivers back from the project finish gives the
+critical tasks of the sample and, averaged, the criticality index.
+
+Times are positions on the graph's clock: hours of working time since the earliest
+task start (plain hours with ``WallClock``). Durations and lags are added as such
+positions and mapped back to moments through the clock at the end, so a team
+calendar skips nights, weekends and holidays exactly as the deterministic passes do.
+
+Unlike ``ScheduleGraph.forward_pass`` the model ignores deadlines and the project
+deadline clamp: the point is to see how late the work would actually finish.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+
+from app.core.scheduling.engine import (
+    CLOSE,
+    OPEN,
+    PRED_START_TYPES,
+    SUCC_START_TYPES,
+    ScheduleGraph,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional dependency
+    np = None
+
+PERCENTILES = (50, 80, 95)
+# Сколько ячеек матрицы (выборки x задачи) держим в памяти за раз
+BATCH_CELLS = 2_000_000
+NO_DRIVER = -1
+
+Estimate = Tuple[Optional[float], Optional[float], Optional[float]]
+
+
+def available() -> bool:
+    return np is not None
+
+
+@dataclass
+class RiskResult:
+    samples: int
+    percentiles: Dict[int, datetime]
+    mean_finish: datetime
+    criticality: Dict[UUID, float]
+
+
+class RiskModel:
+    """Array form of a project graph for repeated sampling."""
+
+    def __init__(self, graph: ScheduleGraph, estimates: Dict[UUID, Estimate]):
+        if np is None:
+            raise RuntimeError("numpy is required for schedule risk analysis")
+        order, cycle = graph.event_order()
+        if cycle:
+            raise ValueError("Project dependencies contain a cycle")
+        self.graph = graph
+        self.clock = graph.clock
+        self.order = [(tid, phase) for tid, phase in order]
+        self.ids = list(graph.nodes)
+        self.index = {tid: i for i, tid in enumerate(self.ids)}
+        nodes = [graph.nodes[tid] for tid in self.ids]
+        starts = [n.start for n in nodes if n.start]
+        self.base: Optional[datetime] = min(starts) if starts else None
+        self.start0 = np.array([self._hours(n.start) for n in nodes], dtype=np.float64)
+        self.end0 = np.array([self._hours(n.end) for n in nodes], dtype=np.float64)
+        self.fixed = np.array([n.fixed for n in nodes], dtype=bool)
+
+        likely = np.array([self._span(n.duration) for n in nodes], dtype=np.float64)
+        low, mode, high = likely.copy(), likely.copy(), likely.copy()
+        for tid, (optimistic, most_likely, pessimistic) in estimates.items():
+            i = self.index.get(tid)
+            if i is None:
+                continue
+            m = self._span(most_likely) if most_likely is not None else likely[i]
+            low[i] = self._span(optimistic) if optimistic is not None else m
+            high[i] = self._span(pessimistic) if pessimistic is not None else m
+            mode[i] = min(max(m, low[i]), high[i])
+        self.uncertain = np.flatnonzero((high > low) & ~self.fixed)
+        self.low, self.mode, self.high = low, mode, high
+
+    def _span(self, days: Optional[float]) -> float:
+        """Duration in hours of the clock (working hours with a calendar)."""
+        return self.clock.duration(days).total_seconds() / 3600
+
+    def _hours(self, value: Optional[datetime]) -> float:
+        if value is None or self.base is None:
+            return 0.0
+        return self.clock.between(self.base, value).total_seconds() / 3600
+
+    def _at(self, hours: float) -> datetime:
+        return self.clock.add(self.base or datetime.utcnow(), timedelta(hours=float(hours)))
+
+    def sample_durations(self, rng, samples: int):
+        dur = np.broadcast_to(self.mode, (samples, len(self.ids))).copy()
+        k = self.uncertain
+        if k.size:
+            span = self.high[k] - self.low[k]
+            alpha = 1 + 4 * (self.mode[k] - self.low[k]) / span
+            beta = 1 + 4 * (self.high[k] - self.mode[k]) / span
+            dur[:, k] = self.low[k] + span * rng.beta(alpha, beta, size=(samples, k.size))
+        return dur
+
+    def _propagate(self, dur):
+        """Forward pass for a batch; returns start/end matrices and the driver arrays."""
+        samples, n = dur.shape
+        start = np.broadcast_to(self.start0, (samples, n)).copy()
+        end = np.broadcast_to(self.end0, (samples, n)).copy()
+        drivers = {}
+        graph = self.graph
+
+        for tid, phase in self.order:
+            j = self.index[tid]
+            if self.fixed[j]:
+                continue
+            node = graph.nodes[tid]
+            if phase == OPEN:
+                values = [np.full(samples, self.start0[j])]
+                sources = [(NO_DRIVER, OPEN)]
+                p = self.index.get(node.parent_id) if node.parent_id else None
+                if p is not None:
+                    values.append(start[:, p])
+                    sources.append((p, OPEN))
+                for edge in graph.preds.get(tid, ()):
+                    d = self.index[edge.predecessor_id]
+                    src_phase = OPEN if edge.type in PRED_START_TYPES else CLOSE
+                    anchor = start[:, d] if src_phase == OPEN else end[:, d]
+                    value = anchor + float(edge.lag or 0)
+                    if edge.type not in SUCC_START_TYPES:
+                        value = value - dur[:, j]
+                    values.append(value)
+                    sources.append((d, src_phase))
+                start[:, j], drivers[(j, OPEN)] = self._pick(values, sources)
+                end[:, j] = start[:, j] + dur[:, j]
+            else:
+                edges = graph.rollups.get(tid, ())
+                if not edges:
+                    continue
+                values = [end[:, j]]
+                sources = [(j, OPEN)]
+                for edge in edges:
+                    c = self.index[edge.predecessor_id]
+                    src_phase = OPEN if edge.type in PRED_START_TYPES else CLOSE
+                    anchor = start[:, c] if src_phase == OPEN else end[:, c]
+                    values.append(anchor + float(edge.lag or 0))
+                    sources.append((c, src_phase))
+                end[:, j], drivers[(j, CLOSE)] = self._pick(values, sources)
+        return start, end, drivers
+
+    @staticmethod
+    def _pick(values, sources):
+        stacked = np.column_stack(values)
+        choice = np.argmax(stacked, axis=1)
+        best = stacked[np.arange(stacked.shape[0]), choice]
+        tasks = np.array([s[0] for s in sources], dtype=np.int64)[choice]
+        phases = np.array([s[1] for s in sources], dtype=np.int8)[choice]
+        return best, (tasks, phases)
+
+    def _critical(self, end, drivers):
+        """Walk the drivers back from the finishing task of every sample."""
+        samples, n = end.shape
+        finish = end.max(axis=1)
+        crit = {
+            OPEN: np.zeros((samples, n), dtype=bool),
+            CLOSE: end >= finish[:, None],
+        }
+        rows = np.arange(samples)
+        for tid, phase in reversed(self.order):
+            j = self.index[tid]
+            if (j, phase) not in drivers:
+                if phase == CLOSE:
+                    # Окончание задачи задаёт её собственный старт
+                    crit[OPEN][:, j] |= crit[CLOSE][:, j]
+                continue
+            tasks, phases = drivers[(j, phase)]
+            active = crit[phase][:, j] & (tasks != NO_DRIVER)
+            for src_phase in (OPEN, CLOSE):
+                m = active & (phases == src_phase)
+                crit[src_phase][rows[m], tasks[m]] = True
+        return finish, crit[OPEN] | crit[CLOSE]
+
+    def run(self, samples: int, seed: Optional[int] = None) -> RiskResult:
+        rng = np.random.default_rng(seed)
+        n = max(len(self.ids), 1)
+        batch = max(1, min(samples, BATCH_CELLS // n))
+        finishes = []
+        critical_counts = np.zeros(len(self.ids), dtype=np.int64)
+        done = 0
+        while done < samples:
+            size = min(batch, samples - done)
+            dur = self.sample_durations(rng, size)
+            _, end, drivers = self._propagate(dur)
+            finish, critical = self._critical(end, drivers)
+            finishes.append(finish)
+            critical_counts += critical.sum(axis=0)
+            done += size
+
+        finish = np.concatenate(finishes)
+        return RiskResult(
+            samples=samples,
+            percentiles={q: self._at(np.percentile(finish, q)) for q in PERCENTILES},
+            mean_finish=self._at(finish.mean()),
+            criticality={tid: float(critical_counts[i]) / samples for i, tid in enumerate(self.ids)},
+        )
@@ -0,0 +1,91 @@
+"""Per-key coalescing of expensive calls (single flight).
+
+Callers that arrive while a call for the same key is running do not start their own:
+they all wait for one follow-up call, started as soon as the running one finishes,
+so every caller gets a result that reflects the state at the time it asked.
+
+``schedule_locks`` serializes the different kinds of schedule writers of a project in
+this process (edits, coalesced recalculations, the auto-scheduler), which cannot share
+one flight because they return different results; see ``store.schedule_writer``.
+"""
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional
+
+
+@dataclass
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Any = None
+    error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running: Dict[Hashable, _Flight] = {}
+        self._next: Dict[Hashable, _Flight] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        wait_for: Optional[_Flight] = None
+        with self._lock:
+            running = self._running.get(key)
+            if running is None:
+                flight = self._running[key] = _Flight()
+                leader = True
+            elif key in self._next:
+                flight, leader = self._next[key], False
+            else:
+                # Первый опоздавший запускает догоняющий прогон, остальные его ждут
+                flight = self._next[key] = _Flight()
+                leader, wait_for = True, running
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        if wait_for is not None:
+            wait_for.done.wait()
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                if key in self._next:
+                    self._running[key] = self._next.pop(key)
+                else:
+                    self._running.pop(key, None)
+            flight.done.set()
+
+
+class KeyedLocks:
+    """One lock per key, kept only while somebody holds or waits for it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # ключ -> [блокировка, число владельцев и ожидающих]
+        self._locks: Dict[Hashable, List] = {}
+
+    @contextmanager
+    def hold(self, key: Hashable) -> Iterator[None]:
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+
+recalc_flights = SingleFlight()
+schedule_locks = KeyedLocks()
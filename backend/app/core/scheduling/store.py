@@ -0,0 +1,345 @@
+"""Glue between the ORM and the scheduling engine."""
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import case, exists, func, select, text, union_all, update
+from sqlalchemy.orm import Session, aliased
+
+from app.core.models.calendar import WorkCalendar
+from app.core.models.course import Project
+from app.core.models.enums import ScheduleMode, TaskStatus
+from app.core.models.task import Dependency, Task, TaskAssignee
+from app.core.scheduling import vectorized
+from app.core.scheduling.calendars import CalendarIndex, cached_index
+from app.core.scheduling.engine import WALL_CLOCK, DependencyEdge, ScheduleGraph, ScheduleResult, TaskNode
+from app.core.scheduling.singleflight import schedule_locks
+from app.db import settings
+
+FIXED_STATUSES = (TaskStatus.Done, TaskStatus.Canceled)
+
+
+def task_node(task: Task) -> TaskNode:
+    return TaskNode(
+        id=task.id,
+        duration=task.duration,
+        start=task.planned_start,
+        end=task.planned_end,
+        deadline=task.deadline,
+        parent_id=task.parent_id,
+        fixed=task.status in FIXED_STATUSES,
+        alap=task.schedule_mode == ScheduleMode.ALAP,
+    )
+
+
+def project_deadline(db: Session, project_id: UUID):
+    project = db.get(Project, project_id)
+    return project.outcome.deadline if project and project.outcome else None
+
+
+def load_calendar(calendar: WorkCalendar) -> CalendarIndex:
+    return CalendarIndex(
+        calendar.work_start,
+        calendar.work_end,
+        calendar.weekdays,
+        [h.day for h in calendar.holidays],
+        calendar.timezone,
+    )
+
+
+def _calendar_clock(db: Session, row):
+    if row is None:
+        return WALL_CLOCK
+    return cached_index(row.id, row.version, lambda: load_calendar(db.get(WorkCalendar, row.id)))
+
+
+def project_clock(db: Session, project_id: UUID):
+    """Working-time clock of the project's team calendar, wall-clock time without one."""
+    row = (
+        db.query(WorkCalendar.id, WorkCalendar.version)
+        .join(Project, Project.team_id == WorkCalendar.team_id)
+        .filter(Project.id == project_id)
+        .first()
+    )
+    return _calendar_clock(db, row)
+
+
+def team_clock(db: Session, team_id: UUID):
+    row = db.query(WorkCalendar.id, WorkCalendar.version).filter(WorkCalendar.team_id == team_id).first()
+    return _calendar_clock(db, row)
+
+
+def _edge_query(db: Session):
+    return db.query(
+        Dependency.predecessor_task_id,
+        Dependency.successor_task_id,
+        Dependency.type,
+        Dependency.lag,
+    )
+
+
+def _edges(rows) -> list[DependencyEdge]:
+    return [DependencyEdge(pred, succ, dep_type, lag or 0) for pred, succ, dep_type, lag in rows]
+
+
+def load_project_edges(db: Session, project_id: UUID) -> list[DependencyEdge]:
+    return _edges(
+        _edge_query(db)
+        .join(Task, Dependency.successor_task_id == Task.id)
+        .filter(Task.project_id == project_id)
+    )
+
+
+def load_schedule_graph(db: Session, project_id: UUID) -> ScheduleGraph:
+    """Project graph built from plain column rows, for read-only analysis."""
+    rows = db.query(
+        Task.id,
+        Task.duration,
+        Task.planned_start,
+        Task.planned_end,
+        Task.deadline,
+        Task.parent_id,
+        Task.status,
+        Task.schedule_mode,
+    ).filter(Task.project_id == project_id)
+    nodes = [
+        TaskNode(
+            tid, duration, start, end, deadline, parent_id, status in FIXED_STATUSES, mode == ScheduleMode.ALAP
+        )
+        for tid, duration, start, end, deadline, parent_id, status, mode in rows
+    ]
+    return ScheduleGraph(
+        nodes, load_project_edges(db, project_id), project_deadline(db, project_id), project_clock(db, project_id)
+    )
+
+
+def load_assignments(db: Session, project_id: UUID) -> Tuple[Dict[UUID, Set[UUID]], List[tuple]]:
+    """Assignees of the project's open tasks and the time those users are booked elsewhere."""
+    assignees: Dict[UUID, Set[UUID]] = defaultdict(set)
+    for task_id, user_id in (
+        db.query(TaskAssignee.task_id, TaskAssignee.user_id)
+        .join(Task, TaskAssignee.task_id == Task.id)
+        .filter(Task.project_id == project_id, Task.status.not_in(FIXED_STATUSES))
+    ):
+        assignees[task_id].add(user_id)
+    users = set().union(*assignees.values()) if assignees else set()
+    if not users:
+        return assignees, []
+    busy = (
+        db.query(TaskAssignee.user_id, Task.planned_start, Task.planned_end)
+        .join(Task, TaskAssignee.task_id == Task.id)
+        .filter(
+            TaskAssignee.user_id.in_(users),
+            Task.project_id != project_id,
+            Task.status.not_in(FIXED_STATUSES),
+        )
+        .all()
+    )
+    return assignees, busy
+
+
+def load_progress(db: Session, project_ids: Iterable[UUID]):
+    """One row per leaf task of the projects with its assignee counts, for earned value.
+
+    Canceled tasks are left out; parents are skipped so their work is not counted twice.
+    """
+    child = aliased(Task)
+    completed = func.sum(case((TaskAssignee.is_completed.is_(True), 1), else_=0))
+    return (
+        db.query(
+            Task.project_id,
+            Task.duration,
+            Task.planned_start,
+            Task.planned_end,
+            Task.actual_start,
+            Task.actual_end,
+            Task.status,
+            Task.completion_rule,
+            func.count(TaskAssignee.id),
+            completed,
+        )
+        .outerjoin(TaskAssignee, TaskAssignee.task_id == Task.id)
+        .filter(
+            Task.project_id.in_(list(project_ids)),
+            Task.status != TaskStatus.Canceled,
+            ~exists().where(child.parent_id == Task.id),
+        )
+        .group_by(Task.id)
+        .all()
+    )
+
+
+def apply_schedule(graph: ScheduleGraph, tasks_by_id: Dict[UUID, Task], changed: Iterable[UUID]) -> None:
+    for task_id in changed:
+        task = tasks_by_id.get(task_id)
+        if task is None:
+            continue
+        node = graph.nodes[task_id]
+        task.planned_start = node.start
+        task.planned_end = node.end
+
+
+def write_windows(db: Session, windows: Dict[UUID, tuple]) -> None:
+    """Write back only the moved tasks, as one executemany UPDATE by primary key."""
+    if windows:
+        db.execute(
+            update(Task),
+            [{"id": tid, "planned_start": start, "planned_end": end} for tid, (start, end) in windows.items()],
+        )
+
+
+def _recalculate_vectorized(db: Session, project_id: UUID) -> Optional[ScheduleResult]:
+    """Run the NumPy kernel without materializing ORM tasks.
+
+    Returns ``None`` on a cycle or when the project has ALAP tasks: the kernel only
+    has the forward pass, so those go to the Python engine. Projects on a team calendar
+    never get here, the kernel only does wall-clock arithmetic.
+    """
+    rows = (
+        db.query(
+            Task.id,
+            Task.parent_id,
+            Task.duration,
+            Task.planned_start,
+            Task.planned_end,
+            Task.deadline,
+            Task.status,
+            Task.schedule_mode,
+        )
+        .filter(Task.project_id == project_id)
+        .all()
+    )
+    if any(r.schedule_mode == ScheduleMode.ALAP for r in rows):
+        return None
+    edges = [(e.predecessor_id, e.successor_id, e.type, e.lag) for e in load_project_edges(db, project_id)]
+    kernel = vectorized.ArraySchedule(
+        [r.id for r in rows],
+        [r.parent_id for r in rows],
+        [r.duration or 0 for r in rows],
+        [r.planned_start for r in rows],
+        [r.planned_end for r in rows],
+        [r.deadline for r in rows],
+        [r.status in FIXED_STATUSES for r in rows],
+        edges,
+        project_deadline(db, project_id),
+    )
+    changed = kernel.run()
+    if changed is None:
+        return None
+
+    windows = {kernel.ids[i]: kernel.window(i) for i in changed.tolist()}
+    write_windows(db, windows)
+    infeasible = {kernel.ids[i]: overrun for i, overrun in kernel.overruns().items()}
+    return ScheduleResult(order=[], changed=set(windows), windows=windows, infeasible=infeasible)
+
+
+def lock_project_schedule(db: Session, project_id: UUID) -> None:
+    """Serialize full recalculations of one project across workers (Postgres only).
+
+    The advisory lock is transaction-scoped and released on commit or rollback.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    key = int.from_bytes(project_id.bytes[:8], "big", signed=True)
+    db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": key})
+
+
+@contextmanager
+def schedule_writer(db: Session, project_id: UUID) -> Iterator[None]:
+    """Exclusive right to write the project's windows until the block ends.
+
+    Holds the in-process lock of the project and, on Postgres, the advisory lock of
+    the transaction; the caller commits inside the block. Every writer of windows
+    (edits, recalculation, auto-scheduling) takes both in this order.
+    """
+    with schedule_locks.hold(project_id):
+        lock_project_schedule(db, project_id)
+        yield
+
+
+def recalculate_project(db: Session, project_id: UUID) -> ScheduleResult:
+    """Full recalculation of the project's windows.
+
+    On a cycle nothing is written (the order of the looped tasks is arbitrary) and
+    ``result.cycle`` lists them; callers must not commit the result as a schedule.
+    """
+    lock_project_schedule(db, project_id)
+    wall_clock = project_clock(db, project_id) is WALL_CLOCK
+    if wall_clock and settings.SCHEDULE_KERNEL == "numpy" and vectorized.available():
+        result = _recalculate_vectorized(db, project_id)
+        if result is not None:
+            return result
+    graph = load_schedule_graph(db, project_id)
+    result = graph.schedule()
+    if not result.cycle:
+        write_windows(db, result.windows)
+    return result
+
+
+def affected_task_ids(db: Session, project_id: UUID, seeds: Iterable[UUID]) -> Set[UUID]:
+    """Seeds plus their transitive successors and parent chains, in one recursive query."""
+    seeds = list(seeds)
+    if not seeds:
+        return set()
+    links = union_all(
+        select(
+            Dependency.predecessor_task_id.label("src"),
+            Dependency.successor_task_id.label("dst"),
+        ),
+        select(Task.id.label("src"), Task.parent_id.label("dst")).where(Task.parent_id.is_not(None)),
+    ).subquery("links")
+    affected = (
+        select(Task.id.label("id"))
+        .where(Task.id.in_(seeds), Task.project_id == project_id)
+        .cte("affected", recursive=True)
+    )
+    affected = affected.union(
+        select(links.c.dst).join(affected, links.c.src == affected.c.id)
+    )
+    return set(db.execute(select(affected.c.id)).scalars())
+
+
+def reschedule_downstream(
+    db: Session,
+    project_id: UUID,
+    dirty: Iterable[UUID],
+    pin: bool = True,
+    downstream: bool = True,
+) -> ScheduleResult:
+    """Propagate edits of ``dirty`` tasks to the affected subgraph only.
+
+    With ``pin`` dirty tasks keep the values they were given, otherwise they are first
+    fitted to their own predecessors and parent. Their successors and ancestors are
+    then evaluated in topological order; ``downstream=False`` stops at the dirty tasks.
+    """
+    dirty = set(dirty)
+    affected = affected_task_ids(db, project_id, dirty) if downstream else dirty
+    if not affected:
+        return ScheduleResult(order=[], changed=set())
+    tasks = db.query(Task).filter(Task.project_id == project_id, Task.id.in_(affected)).all()
+    by_id = {t.id: t for t in tasks}
+    edges = _edges(_edge_query(db).filter(Dependency.successor_task_id.in_(by_id)))
+
+    # Предшественники вне затронутой области участвуют только как неподвижные значения
+    outside = {e.predecessor_id for e in edges} - by_id.keys()
+    context = []
+    if outside:
+        rows = db.query(
+            Task.id, Task.duration, Task.planned_start, Task.planned_end, Task.deadline, Task.parent_id
+        ).filter(Task.id.in_(outside), Task.project_id == project_id)
+        context = [
+            TaskNode(tid, duration, start, end, deadline, parent_id, fixed=True)
+            for tid, duration, start, end, deadline, parent_id in rows
+        ]
+
+    nodes = [task_node(t) for t in tasks]
+    if pin:
+        for node in nodes:
+            if node.id in dirty:
+                node.fixed = True
+    graph = ScheduleGraph(nodes + context, edges, project_deadline(db, project_id), project_clock(db, project_id))
+    result = graph.schedule(seeds=dirty)
+    apply_schedule(graph, by_id, result.changed)
+    db.flush()
+    return result
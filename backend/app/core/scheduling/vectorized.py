@@ -0,0 +1,268 @@
+"""NumPy kernel for the forward scheduling pass on very large projects.
+
+Tasks are loaded into int64 arrays (microseconds since epoch, so results match the
+pure-Python engine exactly) and dependency edges into a CSR adjacency keyed by the
+source event. Events are processed level by level over the topological frontier;
+dependency constraints are pushed to successors with vectorized max-reductions.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional, Sequence
+from uuid import UUID
+
+from app.core.models.enums import DepType
+from app.core.scheduling.engine import MIN_DURATION_HOURS, ScheduleGraph
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional dependency
+    np = None
+
+NONE = -(2 ** 63)
+US_PER_HOUR = 3_600_000_000
+EPOCH = datetime(1970, 1, 1)
+ONE_US = timedelta(microseconds=1)
+
+TYPE_CODES = {DepType.FS: 0, DepType.SS: 1, DepType.FF: 2, DepType.SF: 3}
+
+# Вид ребра событий: какое поле последователя ограничивает значение предшественника
+KIND_NONE, KIND_START, KIND_END, KIND_ROLLUP = 0, 1, 2, 3
+
+
+def available() -> bool:
+    return np is not None
+
+
+def _to_utc_naive(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _to_us(values: Sequence[Optional[datetime]]):
+    return np.fromiter(
+        ((_to_utc_naive(v) - EPOCH) // ONE_US if v is not None else NONE for v in values),
+        dtype=np.int64,
+        count=len(values),
+    )
+
+
+def _from_us(value: int, aware: bool) -> datetime:
+    dt = EPOCH + timedelta(microseconds=int(value))
+    return dt.replace(tzinfo=timezone.utc) if aware else dt
+
+
+def _ranges(indptr, rows):
+    """Flat indices of CSR rows ``rows``."""
+    lo = indptr[rows]
+    counts = indptr[rows + 1] - lo
+    total = int(counts.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(lo - np.cumsum(counts) + counts, counts)
+    return offsets + np.arange(total, dtype=np.int64)
+
+
+class ArraySchedule:
+    """Array form of one project schedule."""
+
+    def __init__(
+        self,
+        ids: Sequence[UUID],
+        parent_ids: Sequence[Optional[UUID]],
+        durations: Sequence[float],
+        starts: Sequence[datetime],
+        ends: Sequence[datetime],
+        deadlines: Sequence[Optional[datetime]],
+        fixed: Sequence[bool],
+        edges: Iterable[tuple[UUID, UUID, DepType, float]],
+        project_deadline: Optional[datetime] = None,
+    ):
+        if np is None:
+            raise RuntimeError("numpy is required for the vectorized schedule kernel")
+        self.ids = list(ids)
+        n = len(self.ids)
+        index = {tid: i for i, tid in enumerate(self.ids)}
+        self.aware = any(v is not None and v.tzinfo is not None for v in starts)
+
+        self.parent = np.fromiter(
+            (index.get(p, -1) if p is not None else -1 for p in parent_ids), dtype=np.int64, count=n
+        )
+        hours = np.maximum(np.asarray(durations, dtype=np.float64) * 24.0, MIN_DURATION_HOURS)
+        self.dur = np.rint(hours * US_PER_HOUR).astype(np.int64)
+        self.start = _to_us(starts)
+        self.end = _to_us(ends)
+        self.deadline = _to_us(deadlines)
+        self.has_deadline = self.deadline != NONE
+        self.fixed = np.asarray(fixed, dtype=bool)
+        self.project_deadline = (
+            int(_to_us([project_deadline])[0]) if project_deadline is not None else None
+        )
+        self.orig_start = self.start.copy()
+        self.orig_end = self.end.copy()
+        self._build_events(index, edges)
+
+    @classmethod
+    def from_graph(cls, graph: ScheduleGraph) -> "ArraySchedule":
+        nodes = list(graph.nodes.values())
+        edges = [
+            (e.predecessor_id, e.successor_id, e.type, e.lag)
+            for edge_list in graph.succs.values()
+            for e in edge_list
+        ]
+        return cls(
+            [n.id for n in nodes],
+            [n.parent_id for n in nodes],
+            [n.duration or 0 for n in nodes],
+            [n.start for n in nodes],
+            [n.end for n in nodes],
+            [n.deadline for n in nodes],
+            [n.fixed for n in nodes],
+            edges,
+            graph.project_deadline,
+        )
+
+    def _build_events(self, index, edges) -> None:
+        n = len(self.ids)
+        pred, succ, code, lag = [], [], [], []
+        for p, s, dep_type, dep_lag in edges:
+            pi = index.get(p)
+            si = index.get(s)
+            if pi is None or si is None:
+                continue
+            pred.append(pi)
+            succ.append(si)
+            code.append(TYPE_CODES[dep_type])
+            lag.append(dep_lag or 0)
+        pred = np.asarray(pred, dtype=np.int64)
+        succ = np.asarray(succ, dtype=np.int64)
+        code = np.asarray(code, dtype=np.int8)
+        lag_us = np.rint(np.asarray(lag, dtype=np.float64) * US_PER_HOUR).astype(np.int64)
+
+        reads_start = (code == 1) | (code == 3)
+        limits_start = (code == 0) | (code == 1)
+        rollup = (self.parent[pred] == succ) & ((code == 2) | (code == 3))
+
+        task = np.arange(n, dtype=np.int64)
+        child = task[self.parent >= 0]
+        parent = self.parent[child]
+
+        src = np.concatenate([2 * task, 2 * parent, 2 * child + 1, 2 * pred + np.where(reads_start, 0, 1)])
+        dst = np.concatenate([2 * task + 1, 2 * child, 2 * parent + 1, 2 * succ + rollup])
+        kind = np.concatenate([
+            np.zeros(n + 2 * child.size, dtype=np.int8),
+            np.where(rollup, KIND_ROLLUP, np.where(limits_start, KIND_START, KIND_END)).astype(np.int8),
+        ])
+        lags = np.concatenate([np.zeros(n + 2 * child.size, dtype=np.int64), lag_us])
+
+        order = np.argsort(src, kind="stable")
+        self.edge_dst = dst[order]
+        self.edge_kind = kind[order]
+        self.edge_lag = lags[order]
+        self.indptr = np.zeros(2 * n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=2 * n), out=self.indptr[1:])
+        self.indeg = np.bincount(dst, minlength=2 * n).astype(np.int64)
+
+    def _effective_end(self, idx):
+        return np.where(self.has_deadline[idx], self.deadline[idx], self.end[idx])
+
+    def _open(self, idx) -> None:
+        s = self.start[idx]
+        e = self._effective_end(idx)
+        d = self.dur[idx]
+
+        p = self.parent[idx]
+        has_parent = p >= 0
+        p = np.where(has_parent, p, 0)
+        ps = self.start[p]
+        pe = self._effective_end(p)
+        m = has_parent & (s < ps)
+        s = np.where(m, ps, s)
+        e = np.where(m, s + d, e)
+        m = has_parent & (e > pe)
+        e = np.where(m, pe, e)
+        s = np.where(m, e - d, s)
+        m = has_parent & (s < ps)
+        s = np.where(m, ps, s)
+        e = np.where(m & (e < s), s, e)
+
+        ds = self.dep_start[idx]
+        de = self.dep_end[idx]
+        m = s < ds
+        s = np.where(m, ds, s)
+        e = np.where(m, s + d, e)
+        m = e < de
+        e = np.where(m, de, e)
+        s = np.where(m, e - d, s)
+        e = np.maximum(e, s)
+
+        self.start[idx] = s
+        self.end[idx] = e
+
+    def _close(self, idx) -> None:
+        r = self.rollup_end[idx]
+        e = self.end[idx]
+        self.end[idx] = np.where(r > e, r, e)
+
+    def run(self):
+        """Forward pass; returns indices of changed tasks or ``None`` on a cycle."""
+        n = len(self.ids)
+        self.dep_start = np.full(n, NONE, dtype=np.int64)
+        self.dep_end = np.full(n, NONE, dtype=np.int64)
+        self.rollup_end = np.full(n, NONE, dtype=np.int64)
+        indeg = self.indeg.copy()
+        frontier = np.flatnonzero(indeg == 0)
+        processed = 0
+
+        while frontier.size:
+            processed += frontier.size
+            opens = frontier[(frontier % 2 == 0)] // 2
+            opens = opens[~self.fixed[opens]]
+            if opens.size:
+                self._open(opens)
+                again = opens[self.has_deadline[opens] & (self.start[opens] != self.orig_start[opens])]
+                if again.size:
+                    self._open(again)
+            closes = frontier[(frontier % 2 == 1)] // 2
+            closes = closes[~self.fixed[closes]]
+            if closes.size:
+                self._close(closes)
+
+            out = _ranges(self.indptr, frontier)
+            if not out.size:
+                break
+            fanout = self.indptr[frontier + 1] - self.indptr[frontier]
+            src_task = np.repeat(frontier // 2, fanout)
+            src_is_open = np.repeat(frontier % 2 == 0, fanout)
+            dst = self.edge_dst[out]
+            kind = self.edge_kind[out]
+            anchor = np.where(src_is_open, self.start[src_task], self._effective_end(src_task))
+            value = anchor + self.edge_lag[out]
+            targets_by_kind = (
+                (KIND_START, self.dep_start),
+                (KIND_END, self.dep_end),
+                (KIND_ROLLUP, self.rollup_end),
+            )
+            for code, target in targets_by_kind:
+                m = kind == code
+                if m.any():
+                    np.maximum.at(target, dst[m] // 2, value[m])
+
+            targets, counts = np.unique(dst, return_counts=True)
+            indeg[targets] -= counts
+            frontier = targets[indeg[targets] == 0]
+
+        if processed != 2 * n:
+            return None
+        return np.flatnonzero((self.start != self.orig_start) | (self.end != self.orig_end))
+
+    def overruns(self) -> dict[int, timedelta]:
+        """Non-fixed tasks finishing past the project deadline, by index."""
+        if self.project_deadline is None:
+            return {}
+        late = np.flatnonzero(~self.fixed & (self.end > self.project_deadline))
+        return {int(i): int(self.end[i] - self.project_deadline) * ONE_US for i in late}
+
+    def window(self, i: int) -> tuple[datetime, datetime]:
+        return _from_us(self.start[i], self.aware), _from_us(self.end[i], self.aware)
@@ -0,0 +1,74 @@
+"""Per-user load over time buckets by a sweep line over task windows.
+
+Every booking contributes +1 at its start and -1 at its end. After sorting the events
+of a user, the number of concurrent tasks is constant between two neighbouring events,
+so each such segment adds ``concurrency * hours`` to the buckets it overlaps. Sorting
+dominates: O(n log n) for n bookings plus the buckets each segment spans.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Sequence, Tuple
+from uuid import UUID
+
+from app.core.scheduling.engine import WALL_CLOCK
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def user_load(
+    bookings: Iterable[Tuple[datetime, datetime]],
+    edges: Sequence[datetime],
+    clock=WALL_CLOCK,
+) -> Tuple[List[float], List[int]]:
+    """Task-hours and peak concurrency of one user per bucket ``[edges[i], edges[i + 1])``."""
+    hours = [0.0] * (len(edges) - 1)
+    peak = [0] * (len(edges) - 1)
+    events = []
+    for start, end in bookings:
+        start, end = max(_naive_utc(start), edges[0]), min(_naive_utc(end), edges[-1])
+        if start < end:
+            events.append((start, 1))
+            events.append((end, -1))
+    # При равном времени окончания идут раньше начал, чтобы стык не считался пересечением
+    events.sort(key=lambda e: (e[0], e[1]))
+
+    level = 0
+    prev = None
+    for moment, delta in events:
+        if level and prev < moment:
+            first = bisect_right(edges, prev) - 1
+            last = bisect_left(edges, moment) - 1
+            for i in range(first, last + 1):
+                a = max(prev, edges[i])
+                b = min(moment, edges[i + 1])
+                hours[i] += level * clock.between(a, b).total_seconds() / 3600
+                if level > peak[i]:
+                    peak[i] = level
+        level += delta
+        prev = moment
+    return hours, peak
+
+
+def team_load(
+    rows: Iterable[Tuple[UUID, datetime, datetime]],
+    user_ids: Sequence[UUID],
+    edges: Sequence[datetime],
+    clock=WALL_CLOCK,
+) -> Tuple[List[List[float]], List[List[int]]]:
+    """Matrices (users x buckets) of task-hours and peak concurrency."""
+    per_user: Dict[UUID, List[Tuple[datetime, datetime]]] = defaultdict(list)
+    for user_id, start, end in rows:
+        per_user[user_id].append((start, end))
+    hours, peak = [], []
+    for user_id in user_ids:
+        user_hours, user_peak = user_load(per_user.get(user_id, ()), edges, clock)
+        hours.append(user_hours)
+        peak.append(user_peak)
+    return hours, peak
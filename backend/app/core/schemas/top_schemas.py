@@ -1,9 +1,10 @@
 from __future__ import annotations
-from datetime import datetime
-from typing import Optional, List
-from pydantic import BaseModel, Field, ConfigDict, field_validator, ValidationInfo
+from datetime import date, datetime, time
+from typing import Optional, List, Dict
+from pydantic import BaseModel, Field, ConfigDict, field_validator, model_validator, ValidationInfo
 from uuid import UUID
-from app.core.models.enums import DepType, ReviewStatus
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from app.core.models.enums import DepType, ReviewStatus, ScheduleMode
 
 class ORM(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -91,10 +92,14 @@ class TaskCreate(BaseModel):
     title: str = Field(min_length=1, max_length=200)
     description: Optional[str] = None
     duration: float = Field(ge=0, default=0)
+    durationOptimistic: Optional[float] = Field(default=None, ge=0)
+    durationLikely: Optional[float] = Field(default=None, ge=0)
+    durationPessimistic: Optional[float] = Field(default=None, ge=0)
     plannedStart: datetime
     plannedEnd: datetime
     deadline: Optional[datetime] = None
     autoScheduled: bool = False
+    scheduleMode: ScheduleMode = ScheduleMode.ASAP
     completionRule: str = Field(pattern="^(AnyOne|AllAssignees)$")
     parentId: Optional[UUID] = None
     dependencies: Optional[List["TaskDependencyIn"]] = None
@@ -117,14 +122,61 @@ class TaskCreate(BaseModel):
             raise ValueError("deadline must be >= plannedStart")
         return v
 
+    @model_validator(mode="after")
+    def _estimates_ordered(self):
+        estimates = [self.durationOptimistic, self.durationLikely, self.durationPessimistic]
+        known = [v for v in estimates if v is not None]
+        if known != sorted(known):
+            raise ValueError("duration estimates must satisfy optimistic <= likely <= pessimistic")
+        return self
+
+class TaskBatchDependencyIn(BaseModel):
+    predecessorKey: Optional[str] = None
+    predecessorId: Optional[UUID] = None
+    type: DepType
+    lag: int = 0
+
+    @model_validator(mode="after")
+    def _one_predecessor(self):
+        if (self.predecessorKey is None) == (self.predecessorId is None):
+            raise ValueError("exactly one of predecessorKey and predecessorId is required")
+        return self
+
+class TaskBatchItem(TaskCreate):
+    key: str = Field(min_length=1, max_length=100)
+    parentKey: Optional[str] = None
+    dependencies: Optional[List[TaskBatchDependencyIn]] = None
+
+    @model_validator(mode="after")
+    def _one_parent(self):
+        if self.parentKey is not None and self.parentId is not None:
+            raise ValueError("parentKey and parentId are mutually exclusive")
+        return self
+
+class TaskBatchCreate(BaseModel):
+    tasks: List[TaskBatchItem] = Field(min_length=1, max_length=5000)
+
+class TaskBatchOut(BaseModel):
+    created: int
+    ids: Dict[str, UUID]
+
+class TaskImportOut(BaseModel):
+    created: int
+    dependencies: int
+    version: int
+
 class TaskUpdate(BaseModel):
     title: Optional[str] = Field(default=None, min_length=1, max_length=200)
     description: Optional[str] = None
     duration: Optional[float] = Field(default=None, ge=0)
+    durationOptimistic: Optional[float] = Field(default=None, ge=0)
+    durationLikely: Optional[float] = Field(default=None, ge=0)
+    durationPessimistic: Optional[float] = Field(default=None, ge=0)
     plannedStart: Optional[datetime] = None
     plannedEnd: Optional[datetime] = None
     deadline: Optional[datetime] = None
     autoScheduled: Optional[bool] = None
+    scheduleMode: Optional[ScheduleMode] = None
     completionRule: Optional[str] = Field(default=None, pattern="^(AnyOne|AllAssignees)$")
     parentId: Optional[UUID] = None
     dependencies: Optional[List["TaskDependencyIn"]] = None
@@ -147,6 +199,12 @@ class TaskUpdate(BaseModel):
             raise ValueError("deadline must be >= plannedStart")
         return v
 
+class TaskBatchUpdateItem(TaskUpdate):
+    id: UUID
+
+class TaskBatchUpdate(BaseModel):
+    tasks: List[TaskBatchUpdateItem] = Field(min_length=1, max_length=5000)
+
 class TaskOut(ORM):
     id: UUID
     project_id: UUID
@@ -155,12 +213,16 @@ class TaskOut(ORM):
     description: Optional[str] = None
     status: str
     duration: float
+    duration_optimistic: Optional[float] = None
+    duration_likely: Optional[float] = None
+    duration_pessimistic: Optional[float] = None
     planned_start: datetime
     planned_end: datetime
     deadline: Optional[datetime]
     actual_start: Optional[datetime]
     actual_end: Optional[datetime]
     auto_scheduled: bool
+    schedule_mode: str
     completion_rule: str
     outcome: OutcomeTaskOut
     dependencies: List[TaskDependencyOut] = []
@@ -169,6 +231,234 @@ class TaskOut(ORM):
     reviews: List["ReviewTaskOut"] = []
 
 
+class DeadlineViolation(BaseModel):
+    id: UUID
+    deadline: datetime
+    planned_end: datetime
+    overrun_hours: float
+
+
+class ScheduleTaskOut(BaseModel):
+    id: UUID
+    planned_start: datetime
+    planned_end: datetime
+    critical: bool
+    slack_hours: float
+
+
+class GanttOut(BaseModel):
+    """Timeline in parallel arrays: row ``i`` of every task list describes one task.
+
+    Times are milliseconds since epoch (UTC); parents and edge ends are row indexes,
+    ``-1`` for a top-level task.
+    """
+    project_id: UUID
+    version: int
+    ids: List[UUID] = []
+    parents: List[int] = []
+    titles: List[str] = []
+    statuses: List[str] = []
+    starts: List[int] = []
+    ends: List[int] = []
+    edge_from: List[int] = []
+    edge_to: List[int] = []
+    edge_types: List[str] = []
+    edge_lags: List[int] = []
+
+
+class ProjectScheduleOut(BaseModel):
+    project_id: UUID
+    version: int
+    tasks: List[ScheduleTaskOut] = []
+    infeasible: List[DeadlineViolation] = []
+
+
+class TaskWindowOut(BaseModel):
+    id: UUID
+    planned_start: datetime
+    planned_end: datetime
+
+
+class ScheduleDeltaOut(BaseModel):
+    project_id: UUID
+    version: int
+    changed: List[TaskWindowOut] = []
+    infeasible: List[DeadlineViolation] = []
+
+
+class JobOut(ORM):
+    id: UUID
+    kind: str
+    project_id: UUID
+    status: str
+    progress: float
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class CriticalPathTaskOut(BaseModel):
+    id: UUID
+    early_start: Optional[datetime] = None
+    early_finish: Optional[datetime] = None
+    late_start: Optional[datetime] = None
+    late_finish: Optional[datetime] = None
+    total_float_hours: Optional[float] = None
+    free_float_hours: Optional[float] = None
+    critical: bool
+
+
+class CriticalPathOut(BaseModel):
+    project_id: UUID
+    version: int
+    project_finish: Optional[datetime] = None
+    chain: List[UUID] = []
+    tasks: List[CriticalPathTaskOut] = []
+
+
+class SimulatedTaskEdit(BaseModel):
+    id: UUID
+    shiftHours: Optional[float] = None
+    plannedStart: Optional[datetime] = None
+    duration: Optional[float] = Field(default=None, ge=0)
+    deadline: Optional[datetime] = None
+
+
+class SimulatedDependency(BaseModel):
+    predecessorId: UUID
+    successorId: UUID
+    type: DepType = DepType.FS
+    lag: int = 0
+
+
+class DependencyRef(BaseModel):
+    predecessorId: UUID
+    successorId: UUID
+
+
+class ScheduleSimulationIn(BaseModel):
+    tasks: List[SimulatedTaskEdit] = []
+    addDependencies: List[SimulatedDependency] = []
+    removeDependencies: List[DependencyRef] = []
+
+
+class SimulatedTaskDelta(BaseModel):
+    id: UUID
+    planned_start: Optional[datetime] = None
+    planned_end: Optional[datetime] = None
+    new_start: Optional[datetime] = None
+    new_end: Optional[datetime] = None
+    shift_hours: float
+
+
+class ScheduleSimulationOut(BaseModel):
+    project_id: UUID
+    version: int
+    project_finish: Optional[datetime] = None
+    project_overrun_hours: Optional[float] = None
+    deltas: List[SimulatedTaskDelta] = []
+    violations: List[DeadlineViolation] = []
+
+
+class LevelingDelayOut(BaseModel):
+    id: UUID
+    early_start: datetime
+    leveled_start: datetime
+    leveled_end: datetime
+    delay_hours: float
+
+
+class LevelingOut(BaseModel):
+    project_id: UUID
+    version: int
+    applied: bool
+    finish_before: Optional[datetime] = None
+    finish_after: Optional[datetime] = None
+    delays: List[LevelingDelayOut] = []
+
+
+class RiskTaskOut(BaseModel):
+    id: UUID
+    criticality: float
+
+
+class ProjectRiskOut(BaseModel):
+    project_id: UUID
+    version: int
+    samples: int
+    p50: datetime
+    p80: datetime
+    p95: datetime
+    mean_finish: datetime
+    planned_finish: Optional[datetime] = None
+    tasks: List[RiskTaskOut] = []
+
+
+class EarnedValueTotals(BaseModel):
+    tasks: int
+    budget_at_completion: float
+    planned_value: float
+    earned_value: float
+    actual_cost: float
+    schedule_variance: float
+    cost_variance: float
+    spi: Optional[float] = None
+    cpi: Optional[float] = None
+    percent_complete: Optional[float] = None
+
+
+class EarnedValueOut(EarnedValueTotals):
+    project_id: UUID
+    as_of: datetime
+
+
+class TeamEarnedValueOut(BaseModel):
+    team_id: UUID
+    as_of: datetime
+    total: EarnedValueTotals
+    projects: List[EarnedValueOut] = []
+
+
+class BaselineIn(BaseModel):
+    name: str = Field(min_length=1, max_length=200)
+
+
+class BaselineOut(ORM):
+    id: UUID
+    project_id: UUID
+    name: str
+    created_at: datetime
+    task_count: int
+
+
+class BaselineSlipOut(BaseModel):
+    id: UUID
+    baseline_start: datetime
+    baseline_end: datetime
+    planned_start: datetime
+    planned_end: datetime
+    start_slip_hours: float
+    finish_slip_hours: float
+
+
+class BaselineVarianceOut(BaseModel):
+    project_id: UUID
+    baseline_id: UUID
+    name: str
+    version: int
+    baseline_finish: Optional[datetime] = None
+    planned_finish: Optional[datetime] = None
+    finish_slip_hours: Optional[float] = None
+    compared: int
+    late: int
+    early: int
+    slips: List[BaselineSlipOut] = []
+    added: List[UUID] = []
+    removed: List[UUID] = []
+
+
 class TeamCreate(BaseModel):
     name: str = Field(min_length=1, max_length=200)
 
@@ -183,6 +473,58 @@ class TeamOut(ORM):
     created_at: datetime
 
 
+class WorkCalendarIn(BaseModel):
+    timezone: str = "UTC"
+    workStart: time = time(9)
+    workEnd: time = time(18)
+    workDays: List[int] = Field(default_factory=lambda: [1, 2, 3, 4, 5], min_length=1, max_length=7)
+    holidays: List[date] = []
+
+    @field_validator("timezone")
+    @classmethod
+    def _known_timezone(cls, v: str):
+        try:
+            ZoneInfo(v)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError("unknown timezone")
+        return v
+
+    @field_validator("workDays")
+    @classmethod
+    def _iso_weekdays(cls, v: List[int]):
+        if any(d < 1 or d > 7 for d in v) or len(set(v)) != len(v):
+            raise ValueError("workDays must be distinct ISO weekdays 1..7")
+        return sorted(v)
+
+    @model_validator(mode="after")
+    def _end_after_start(self):
+        if self.workEnd <= self.workStart:
+            raise ValueError("workEnd must be after workStart")
+        return self
+
+
+class WorkCalendarOut(BaseModel):
+    team_id: UUID
+    timezone: str
+    work_start: time
+    work_end: time
+    work_days: List[int]
+    holidays: List[date] = []
+    version: int
+
+
+class WorkloadOut(BaseModel):
+    team_id: UUID
+    bucket: str
+    # Начала корзин; последняя корзина заканчивается в ``end``
+    starts: List[datetime]
+    end: datetime
+    user_ids: List[UUID]
+    # Матрицы пользователи x корзины: часы задач и пик одновременных задач
+    hours: List[List[float]]
+    peak: List[List[int]]
+
+
 class TeamMemberAdd(BaseModel):
     userId: UUID
 
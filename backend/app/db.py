@@ -6,6 +6,15 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str =  os.getenv("DATABASE_URL", "sqlite:///./sql_app.db")
+    # "python" or "numpy" (vectorized kernel for very large projects)
+    SCHEDULE_KERNEL: str = os.getenv("SCHEDULE_KERNEL", "python")
+    # Background recalculation pool: worker threads and max queued+running jobs
+    RECALC_WORKERS: int = int(os.getenv("RECALC_WORKERS", "2"))
+    RECALC_QUEUE_LIMIT: int = int(os.getenv("RECALC_QUEUE_LIMIT", "32"))
+    # Quiet period before auto_scheduled tasks of an edited project are rescheduled
+    AUTO_SCHEDULE_DELAY_SECONDS: float = float(os.getenv("AUTO_SCHEDULE_DELAY_SECONDS", "2"))
+    # Raise instead of logging when an endpoint issues more SQL statements than its budget
+    QUERY_BUDGET_STRICT: bool = os.getenv("QUERY_BUDGET_STRICT", "0") == "1"
 
 settings = Settings()
 
@@ -1,8 +1,12 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
-from .core.api import projects, tasks, teams, members, invites, reviews
-from .db import init_db, engine, Base
+from .core.api import projects, tasks, teams, members, invites, reviews, schedule, jobs, transfer
+from .core.api.pagination import NEXT_CURSOR_HEADER
+from .core.scheduling.autoschedule import auto_scheduler
+from .core.scheduling.jobs import runner as job_runner
+from .db import init_db, engine, Base, settings
+from . import query_budget
 from sqlalchemy import text
 
 from .auth.api import auth, users
@@ -10,28 +14,46 @@ from .auth.api import auth, users
 # Base.metadata.create_all(bind=engine)
 
 app = FastAPI()
+query_budget.install(engine)
 
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(projects.router)
 app.include_router(tasks.router)
+app.include_router(transfer.router)
 app.include_router(tasks.plain_router)
 app.include_router(teams.router)
 app.include_router(members.router)
 app.include_router(invites.router)
 app.include_router(reviews.router)
+app.include_router(schedule.router)
+app.include_router(jobs.router)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+@app.middleware("http")
+async def count_queries(request: Request, call_next):
+    with query_budget.counting() as counter:
+        response = await call_next(request)
+    response.headers[query_budget.QUERY_COUNT_HEADER] = str(counter.count)
+    query_budget.check(counter, request.url.path, settings.QUERY_BUDGET_STRICT)
+    return response
+
 @app.on_event("startup")
 def on_startup():
     init_db()
 
+@app.on_event("shutdown")
+def on_shutdown():
+    job_runner.shutdown()
+    auto_scheduler.shutdown()
+
 @app.get("/ping")
 def ping():
     with engine.begin() as conn:
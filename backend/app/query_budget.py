@@ -0,0 +1,76 @@
+"""Per-request count of SQL statements and the budget an endpoint may spend.
+
+Every statement sent through the engine increments the counter of the current request
+(a ``ContextVar`` set by the middleware in ``app.main``). Endpoints declare their
+budget with ``Depends(query_budget(n))``; after the response is built the middleware
+compares the count with it. Over budget is logged, or raised when
+``QUERY_BUDGET_STRICT`` is on (the test suite runs that way, so N+1 regressions fail).
+"""
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.budget: Optional[int] = None
+
+    @property
+    def exceeded(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+
+_current: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+
+
+def _count(conn, cursor, statement, parameters, context, executemany):
+    counter = _current.get()
+    if counter is not None:
+        counter.count += 1
+
+
+def install(engine: Engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _count):
+        event.listen(engine, "before_cursor_execute", _count)
+
+
+@contextmanager
+def counting() -> Iterator[QueryCounter]:
+    """Count the statements issued inside the block (and the tasks it spawns)."""
+    counter = QueryCounter()
+    token = _current.set(counter)
+    try:
+        yield counter
+    finally:
+        _current.reset(token)
+
+
+def query_budget(limit: int):
+    """Dependency that sets the statement budget of the current request."""
+    def dependency() -> None:
+        counter = _current.get()
+        if counter is not None:
+            counter.budget = limit
+    return dependency
+
+
+def check(counter: QueryCounter, path: str, strict: bool) -> None:
+    if not counter.exceeded:
+        return
+    message = f"{path} issued {counter.count} SQL statements, budget is {counter.budget}"
+    if strict:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
@@ -0,0 +1,96 @@
+"""Compare the pure-Python schedule engine with the NumPy kernel.
+
+Run from the backend directory:
+
+    python -m benchmarks.schedule_kernels --tasks 50000
+"""
+import argparse
+import copy
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from app.core.models.enums import DepType
+from app.core.scheduling.engine import DependencyEdge, ScheduleGraph, TaskNode
+from app.core.scheduling.vectorized import ArraySchedule
+
+
+def build_graph(n_tasks: int, seed: int = 0) -> ScheduleGraph:
+    """Random layered project with summary tasks and all four dependency types."""
+    rnd = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    nodes = []
+    edges = []
+    for i in range(n_tasks):
+        start = base + timedelta(hours=rnd.randint(0, 24 * 90))
+        parent_id = None
+        if i > 10 and rnd.random() < 0.2:
+            parent = nodes[rnd.randrange(max(0, i - 50), i)]
+            if parent.parent_id is None:
+                parent_id = parent.id
+                start = parent.start
+        node = TaskNode(
+            id=uuid.UUID(int=i + 1),
+            duration=rnd.choice([0.5, 1, 2, 3, 5]),
+            start=start,
+            end=start + timedelta(days=rnd.randint(1, 5)),
+            deadline=None,
+            parent_id=parent_id,
+            fixed=rnd.random() < 0.05,
+        )
+        nodes.append(node)
+        if parent_id:
+            edges.append(DependencyEdge(parent_id, node.id, DepType.SS, 0))
+            edges.append(DependencyEdge(node.id, parent_id, DepType.FF, 0))
+        for _ in range(rnd.randint(0, 3)):
+            if i < 2:
+                break
+            pred = nodes[rnd.randrange(max(0, i - 200), i)]
+            # Подзадачи связываем только с соседями, иначе легко получить цикл через родителя
+            if pred.parent_id != parent_id or pred.id == parent_id:
+                continue
+            edges.append(DependencyEdge(pred.id, node.id, rnd.choice(list(DepType)), rnd.randint(0, 48)))
+    deadline = base + timedelta(days=365)
+    return ScheduleGraph(nodes, edges, deadline)
+
+
+def run_python(graph: ScheduleGraph):
+    order, _ = graph.event_order()
+    return graph.forward_pass(order)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    graph = build_graph(args.tasks, args.seed)
+    py_graph = copy.deepcopy(graph)
+
+    started = time.perf_counter()
+    py_changed = run_python(py_graph)
+    py_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    kernel = ArraySchedule.from_graph(graph)
+    load_time = time.perf_counter() - started
+    started = time.perf_counter()
+    changed = kernel.run()
+    np_time = time.perf_counter() - started
+
+    np_changed = {kernel.ids[i] for i in changed}
+    mismatched = [
+        tid
+        for i, tid in enumerate(kernel.ids)
+        if kernel.window(i) != (py_graph.nodes[tid].start, py_graph.nodes[tid].end)
+    ]
+    print(f"tasks={args.tasks} edges={sum(len(v) for v in graph.succs.values())}")
+    print(f"python engine: {py_time * 1000:.1f} ms, changed={len(py_changed)}")
+    print(f"numpy kernel:  {np_time * 1000:.1f} ms (+{load_time * 1000:.1f} ms load), changed={len(np_changed)}")
+    print(f"mismatched windows: {len(mismatched)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,8 @@ from sqlalchemy import event, text
 TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL") or "sqlite:///./test_sql_app.db"
 
 os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+# Превышение бюджета запросов эндпоинта валит тест, а не только пишется в лог
+os.environ.setdefault("QUERY_BUDGET_STRICT", "1")
 
 BACKEND_ROOT = Path(__file__).resolve().parents[1]
 if str(BACKEND_ROOT) not in sys.path:
@@ -30,6 +32,8 @@ if engine.dialect.name == "sqlite":
 
 @pytest.fixture(scope="session", autouse=True)
 def _create_schema():
+    # Схему пересоздаём: create_all не добавляет новые колонки в таблицы старой базы
+    Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
     init_db()
     yield
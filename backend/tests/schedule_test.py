@@ -0,0 +1,1008 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import insert, update
+
+from app.core.scheduling import baselines, earned_value
+from app.core.scheduling.cycles import registry as cycle_registry
+from app.core.scheduling.singleflight import SingleFlight, schedule_locks
+from app.core.models.course import Project
+from app.core.models.enums import DepType
+from app.core.models.task import Dependency
+from app.db import engine, settings
+
+
+def _create_team(client, name):
+    res = client.post("/teams", json={"name": name})
+    assert res.status_code == 201
+    return res.json()
+
+
+def _register(client, email, password):
+    return client.post("/auth/register", json={"email": email, "password": password})
+
+
+def _login(client, email, password):
+    return client.post(
+        "/auth/token",
+        data={"username": email, "password": password},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+
+
+def _auth_headers(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _create_project(client, email="planner@example.com", deadline_days=60):
+    user = _register(client, email, "Passw0rd1").json()
+    tokens = _login(client, email, "Passw0rd1").json()
+    team = _create_team(client, "Planners")
+    client.post(f"/teams/{team['id']}/members", json={"userId": user["id"]})
+    deadline = (datetime.utcnow() + timedelta(days=deadline_days)).isoformat()
+    res = client.post(
+        "/projects",
+        headers=_auth_headers(tokens["access_token"]),
+        json={
+            "title": "Schedule",
+            "description": "Schedule project",
+            "teamId": team["id"],
+            "outcome": {
+                "description": "Deliverable",
+                "acceptanceCriteria": "Done",
+                "deadline": deadline,
+                "result": None,
+            },
+        },
+    )
+    assert res.status_code == 201
+    return res.json()
+
+
+def _create_task(client, project_id, title, start, days=2, parent_id=None, dependencies=None):
+    end = start + timedelta(days=days)
+    res = client.post(
+        f"/projects/{project_id}/tasks",
+        json={
+            "title": title,
+            "description": "Task description",
+            "duration": days,
+            "plannedStart": start.isoformat(),
+            "plannedEnd": end.isoformat(),
+            "deadline": None,
+            "autoScheduled": False,
+            "completionRule": "AnyOne",
+            "parentId": parent_id,
+            "dependencies": dependencies,
+            "assigneeIds": None,
+            "outcome": {
+                "description": "Outcome",
+                "acceptanceCriteria": "AC",
+                "deadline": (end + timedelta(days=1)).isoformat(),
+                "result": None,
+            },
+        },
+    )
+    assert res.status_code == 201, res.text
+    return res.json()
+
+
+def _dt(value):
+    return datetime.fromisoformat(value.replace("Z", "")).replace(tzinfo=None)
+
+
+def _by_title(items):
+    return {t["title"]: t for t in items}
+
+
+def _write_dependency(project_id, predecessor_id, successor_id):
+    """Dependency written straight to the database, as another worker would, with the version bump."""
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Dependency),
+            {
+                "id": uuid4(),
+                "predecessor_task_id": UUID(predecessor_id),
+                "successor_task_id": UUID(successor_id),
+                "type": DepType.FS,
+                "lag": 0,
+            },
+        )
+        conn.execute(
+            update(Project)
+            .where(Project.id == UUID(project_id))
+            .values(schedule_version=Project.schedule_version + 1)
+        )
+
+
+def test_recalculate_pushes_successors_through_chain(client):
+    project = _create_project(client)
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=2)
+    b = _create_task(
+        client, project["id"], "B", start, days=1,
+        dependencies=[{"predecessorId": a["id"], "type": "FS", "lag": 0}],
+    )
+    _create_task(
+        client, project["id"], "C", start, days=1,
+        dependencies=[{"predecessorId": b["id"], "type": "SS", "lag": 6}],
+    )
+
+    res = client.post(f"/projects/{project['id']}/tasks/recalculate")
+    assert res.status_code == 200
+    tasks = _by_title(res.json())
+
+    assert _dt(tasks["A"]["planned_start"]) == start
+    assert _dt(tasks["B"]["planned_start"]) == start + timedelta(days=2)
+    assert _dt(tasks["B"]["planned_end"]) == start + timedelta(days=3)
+    assert _dt(tasks["C"]["planned_start"]) == start + timedelta(days=2, hours=6)
+
+
+def test_recalculate_stretches_parent_over_late_child(client):
+    project = _create_project(client, email="parent-sched@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    blocker = _create_task(client, project["id"], "Blocker", start, days=3)
+    parent = _create_task(client, project["id"], "Parent", start, days=2)
+    _create_task(
+        client, project["id"], "Child", start, days=1, parent_id=parent["id"],
+        dependencies=[{"predecessorId": blocker["id"], "type": "FS", "lag": 0}],
+    )
+
+    res = client.post(f"/projects/{project['id']}/tasks/recalculate")
+    assert res.status_code == 200
+    tasks = _by_title(res.json())
+
+    child_end = _dt(tasks["Child"]["planned_end"])
+    assert _dt(tasks["Child"]["planned_start"]) == start + timedelta(days=3)
+    assert _dt(tasks["Parent"]["planned_start"]) == start
+    assert _dt(tasks["Parent"]["planned_end"]) == child_end
+
+
+def test_patch_propagates_to_successors_only(client):
+    project = _create_project(client, email="patch-sched@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=1)
+    b = _create_task(
+        client, project["id"], "B", start + timedelta(days=1), days=1,
+        dependencies=[{"predecessorId": a["id"], "type": "FS", "lag": 0}],
+    )
+    c = _create_task(
+        client, project["id"], "C", start + timedelta(days=2), days=1,
+        dependencies=[{"predecessorId": b["id"], "type": "FS", "lag": 0}],
+    )
+    other = _create_task(client, project["id"], "Other", start, days=1)
+
+    moved = start + timedelta(days=3)
+    res = client.patch(f"/tasks/{a['id']}", json={"plannedStart": moved.isoformat()})
+    assert res.status_code == 200
+    assert _dt(res.json()["planned_end"]) == moved + timedelta(days=1)
+
+    b_after = client.get(f"/tasks/{b['id']}").json()
+    c_after = client.get(f"/tasks/{c['id']}").json()
+    other_after = client.get(f"/tasks/{other['id']}").json()
+    assert _dt(b_after["planned_start"]) == moved + timedelta(days=1)
+    assert _dt(c_after["planned_start"]) == moved + timedelta(days=2)
+    assert other_after["planned_start"] == other["planned_start"]
+
+
+def test_patch_without_propagation_keeps_successors(client):
+    project = _create_project(client, email="nopropagate@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=1)
+    b = _create_task(
+        client, project["id"], "B", start + timedelta(days=1), days=1,
+        dependencies=[{"predecessorId": a["id"], "type": "FS", "lag": 0}],
+    )
+
+    moved = start + timedelta(days=3)
+    res = client.patch(
+        f"/tasks/{a['id']}?propagate=false", json={"plannedStart": moved.isoformat()}
+    )
+    assert res.status_code == 200
+    assert client.get(f"/tasks/{b['id']}").json()["planned_start"] == b["planned_start"]
+
+
+def test_recalculate_with_numpy_kernel_matches_python(client, monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(settings, "SCHEDULE_KERNEL", "numpy")
+    project = _create_project(client, email="numpy-sched@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=2)
+    parent = _create_task(client, project["id"], "Parent", start, days=1)
+    _create_task(
+        client, project["id"], "Child", start, days=1, parent_id=parent["id"],
+        dependencies=[{"predecessorId": a["id"], "type": "FF", "lag": 2}],
+    )
+
+    res = client.post(f"/projects/{project['id']}/tasks/recalculate")
+    assert res.status_code == 200
+    tasks = _by_title(res.json())
+
+    assert _dt(tasks["Child"]["planned_end"]) == start + timedelta(days=2, hours=2)
+    assert _dt(tasks["Child"]["planned_start"]) == start + timedelta(days=1, hours=2)
+    assert _dt(tasks["Parent"]["planned_end"]) == start + timedelta(days=2, hours=2)
+    assert _dt(tasks["A"]["planned_start"]) == start
+
+
+def test_dependency_cycle_is_rejected_with_path(client):
+    project = _create_project(client, email="cycle@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=1)
+    b = _create_task(
+        client, project["id"], "B", start, days=1,
+        dependencies=[{"predecessorId": a["id"], "type": "FS", "lag": 0}],
+    )
+    c = _create_task(
+        client, project["id"], "C", start, days=1,
+        dependencies=[{"predecessorId": b["id"], "type": "SS", "lag": 0}],
+    )
+
+    res = client.patch(
+        f"/tasks/{a['id']}",
+        json={"dependencies": [{"predecessorId": c["id"], "type": "FS", "lag": 0}]},
+    )
+    assert res.status_code == 409
+    detail = res.json()["detail"]
+    assert [step["title"] for step in detail["path"]] == ["C", "A", "B", "C"]
+
+    a_after = client.get(f"/tasks/{a['id']}").json()
+    assert a_after["dependencies"] == []
+
+
+def test_subtask_links_are_not_a_cycle(client):
+    project = _create_project(client, email="nocycle@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    parent = _create_task(client, project["id"], "Parent", start, days=3)
+    child = _create_task(client, project["id"], "Child", start, days=1, parent_id=parent["id"])
+    res = client.patch(f"/tasks/{child['id']}", json={"dependencies": []})
+    assert res.status_code == 200
+
+
+def test_schedule_snapshot_reports_critical_path_and_slack(client):
+    project = _create_project(client, email="snapshot@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=2)
+    b = _create_task(
+        client, project["id"], "B", start + timedelta(days=2), days=1,
+        dependencies=[{"predecessorId": a["id"], "type": "FS", "lag": 0}],
+    )
+    short = _create_task(client, project["id"], "Short", start, days=1)
+
+    res = client.get(f"/projects/{project['id']}/schedule")
+    assert res.status_code == 200
+    tasks = {t["id"]: t for t in res.json()["tasks"]}
+    assert tasks[a["id"]]["critical"] is True
+    assert tasks[b["id"]]["critical"] is True
+    assert tasks[short["id"]]["critical"] is False
+    assert tasks[short["id"]]["slack_hours"] > tasks[a["id"]]["slack_hours"]
+
+
+def test_schedule_snapshot_is_cached_per_version(client):
+    project = _create_project(client, email="snapshot-cache@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=1)
+
+    first = client.get(f"/projects/{project['id']}/schedule")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    cached = client.get(f"/projects/{project['id']}/schedule", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    moved = start + timedelta(days=2)
+    client.patch(f"/tasks/{a['id']}", json={"plannedStart": moved.isoformat()})
+    fresh = client.get(f"/projects/{project['id']}/schedule", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.json()["version"] > first.json()["version"]
+    assert _dt(fresh.json()["tasks"][0]["planned_start"]) == moved
+
+
+def test_schedule_snapshot_unknown_project(client):
+    res = client.get("/projects/00000000-0000-0000-0000-000000000000/schedule")
+    assert res.status_code == 404
+
+
+def test_batch_patch_propagates_once_and_returns_changed(client):
+    project = _create_project(client, email="batch-patch@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=1)
+    b = _create_task(
+        client, project["id"], "B", start + timedelta(days=1), days=1,
+        dependencies=[{"predecessorId": a["id"], "type": "FS", "lag": 0}],
+    )
+    c = _create_task(client, project["id"], "C", start + timedelta(days=5), days=1)
+    _create_task(client, project["id"], "Other", start, days=1)
+
+    moved = start + timedelta(days=2)
+    res = client.patch(
+        f"/projects/{project['id']}/tasks:batch",
+        json={
+            "tasks": [
+                {"id": a["id"], "plannedStart": moved.isoformat()},
+                {"id": c["id"], "dependencies": [{"predecessorId": b["id"], "type": "FS", "lag": 0}]},
+            ]
+        },
+    )
+    assert res.status_code == 200, res.text
+    tasks = _by_title(res.json())
+    assert set(tasks) == {"A", "B"}
+    assert _dt(tasks["B"]["planned_start"]) == moved + timedelta(days=1)
+    c_after = client.get(f"/tasks/{c['id']}").json()
+    assert [d["predecessor_task_id"] for d in c_after["dependencies"]] == [b["id"]]
+    assert c_after["planned_start"] == c["planned_start"]
+
+
+def test_recalculate_rejects_a_stored_cycle(client):
+    project = _create_project(client, email="recalc-cycle@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=1)
+    b = _create_task(
+        client, project["id"], "B", start, days=1,
+        dependencies=[{"predecessorId": a["id"], "type": "FS", "lag": 0}],
+    )
+    _write_dependency(project["id"], b["id"], a["id"])
+    version = client.get(f"/projects/{project['id']}/schedule").json()["version"]
+
+    res = client.post(f"/projects/{project['id']}/tasks/recalculate")
+    assert res.status_code == 409
+    detail = res.json()["detail"]
+    assert detail["message"] == "Project dependencies contain a cycle"
+    assert {t["title"] for t in detail["tasks"]} == {"A", "B"}
+    # Окна не записаны и версия расписания не сдвинулась
+    assert client.get(f"/tasks/{b['id']}").json()["planned_start"] == b["planned_start"]
+    assert client.get(f"/projects/{project['id']}/schedule").json()["version"] == version
+
+
+def test_batch_patch_rejects_cycles(client):
+    project = _create_project(client, email="batch-cycle@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=1)
+    b = _create_task(client, project["id"], "B", start, days=1)
+    res = client.patch(
+        f"/projects/{project['id']}/tasks:batch",
+        json={
+            "tasks": [
+                {"id": a["id"], "dependencies": [{"predecessorId": b["id"], "type": "FS", "lag": 0}]},
+                {"id": b["id"], "dependencies": [{"predecessorId": a["id"], "type": "FS", "lag": 0}]},
+            ]
+        },
+    )
+    assert res.status_code == 409
+    assert client.get(f"/tasks/{a['id']}").json()["dependencies"] == []
+
+
+def test_cycle_index_sees_edges_written_by_another_worker(client):
+    project = _create_project(client, email="cycle-worker@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=1)
+    b = _create_task(
+        client, project["id"], "B", start, days=1,
+        dependencies=[{"predecessorId": a["id"], "type": "FS", "lag": 0}],
+    )
+    c = _create_task(client, project["id"], "C", start, days=1)
+    # Индекс этого процесса уже построен; связь B -> C появляется в обход него
+    _write_dependency(project["id"], b["id"], c["id"])
+
+    res = client.patch(f"/tasks/{a['id']}", json={"dependencies": [{"predecessorId": c["id"], "type": "FS", "lag": 0}]})
+    assert res.status_code == 409, res.text
+    assert client.get(f"/tasks/{a['id']}").json()["dependencies"] == []
+
+    # Свои записи процесс учитывает без перестройки: следующая проверка видит A -> B -> C
+    d = _create_task(
+        client, project["id"], "D", start, days=1,
+        dependencies=[{"predecessorId": c["id"], "type": "FS", "lag": 0}],
+    )
+    index = cycle_registry._indexes[UUID(project["id"])]
+    _create_task(
+        client, project["id"], "E", start, days=1,
+        dependencies=[{"predecessorId": d["id"], "type": "FS", "lag": 0}],
+    )
+    assert cycle_registry._indexes[UUID(project["id"])] is index
+    assert index.version == client.get(f"/projects/{project['id']}/schedule").json()["version"]
+    res = client.patch(f"/tasks/{a['id']}", json={"dependencies": [{"predecessorId": d["id"], "type": "FS", "lag": 0}]})
+    assert res.status_code == 409, res.text
+
+
+def test_failed_update_does_not_leave_edges_in_cycle_index(client, monkeypatch):
+    from app.core.api import tasks as tasks_api
+
+    project = _create_project(client, email="cycle-rollback@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    c = _create_task(client, project["id"], "C", start, days=1)
+    a = _create_task(
+        client, project["id"], "A", start, days=1,
+        dependencies=[{"predecessorId": c["id"], "type": "FS", "lag": 0}],
+    )
+    b = _create_task(client, project["id"], "B", start, days=1)
+
+    def fail(db, project_id):
+        raise RuntimeError("commit failed")
+
+    # Связь A -> B проходит проверку циклов, но транзакция не фиксируется
+    monkeypatch.setattr(tasks_api, "bump_version", fail)
+    with pytest.raises(RuntimeError):
+        client.patch(f"/tasks/{b['id']}", json={"dependencies": [{"predecessorId": a["id"], "type": "FS", "lag": 0}]})
+    monkeypatch.undo()
+
+    # В базе нет A -> B, поэтому B -> C не замыкает цикл C -> A -> B -> C
+    res = client.patch(f"/tasks/{c['id']}", json={"dependencies": [{"predecessorId": b["id"], "type": "FS", "lag": 0}]})
+    assert res.status_code == 200, res.text
+    assert client.get(f"/tasks/{b['id']}").json()["dependencies"] == []
+
+
+def test_critical_path_reports_floats(client):
+    project = _create_project(client, email="critical@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=2)
+    b = _create_task(
+        client, project["id"], "B", start + timedelta(days=2), days=1,
+        dependencies=[{"predecessorId": a["id"], "type": "FS", "lag": 0}],
+    )
+    c = _create_task(client, project["id"], "C", start, days=1)
+    d = _create_task(
+        client, project["id"], "D", start + timedelta(hours=36), days=1,
+        dependencies=[{"predecessorId": c["id"], "type": "FS", "lag": 0}],
+    )
+
+    res = client.get(f"/projects/{project['id']}/critical-path")
+    assert res.status_code == 200
+    body = res.json()
+    tasks = {t["id"]: t for t in body["tasks"]}
+    assert body["chain"] == [a["id"], b["id"]]
+    assert tasks[a["id"]]["free_float_hours"] == 0
+    # D стоит на полсуток позже, чем позволяет C: у C свободный резерв 12 часов
+    assert tasks[c["id"]]["free_float_hours"] == 12
+    assert tasks[c["id"]]["total_float_hours"] == tasks[a["id"]]["total_float_hours"] + 24
+    assert tasks[d["id"]]["free_float_hours"] == tasks[d["id"]]["total_float_hours"]
+    assert _dt(tasks[b["id"]]["early_start"]) == start + timedelta(days=2)
+    assert _dt(body["project_finish"]) == start + timedelta(days=3)
+
+
+def test_simulation_projects_slip_without_writing(client):
+    project = _create_project(client, email="simulate@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=1)
+    b = _create_task(
+        client, project["id"], "B", start + timedelta(days=1), days=1,
+        dependencies=[{"predecessorId": a["id"], "type": "FS", "lag": 0}],
+    )
+    c = _create_task(client, project["id"], "C", start, days=1)
+    version = client.get(f"/projects/{project['id']}/schedule").json()["version"]
+
+    res = client.post(
+        f"/projects/{project['id']}/schedule/simulate",
+        json={
+            "tasks": [
+                {"id": a["id"], "shiftHours": 72},
+                {"id": c["id"], "deadline": (start + timedelta(days=4)).isoformat()},
+            ],
+            "addDependencies": [{"predecessorId": b["id"], "successorId": c["id"], "type": "FS"}],
+        },
+    )
+    assert res.status_code == 200, res.text
+    body = res.json()
+    deltas = {d["id"]: d for d in body["deltas"]}
+    assert deltas[a["id"]]["shift_hours"] == 72
+    assert _dt(deltas[b["id"]]["new_start"]) == start + timedelta(days=4)
+    assert _dt(deltas[c["id"]]["new_start"]) == start + timedelta(days=5)
+    assert [v["id"] for v in body["violations"]] == [c["id"]]
+    assert body["violations"][0]["overrun_hours"] > 0
+
+    assert client.get(f"/tasks/{a['id']}").json()["planned_start"] == a["planned_start"]
+    assert client.get(f"/projects/{project['id']}/schedule").json()["version"] == version
+
+
+def test_risk_analysis_uses_three_point_estimates(client):
+    pytest.importorskip("numpy")
+    project = _create_project(client, email="risk@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=2)
+    res = client.patch(
+        f"/tasks/{a['id']}",
+        json={"durationOptimistic": 1, "durationLikely": 2, "durationPessimistic": 6},
+    )
+    assert res.status_code == 200
+    assert res.json()["duration_pessimistic"] == 6
+    b = _create_task(
+        client, project["id"], "B", start + timedelta(days=2), days=1,
+        dependencies=[{"predecessorId": a["id"], "type": "FS", "lag": 0}],
+    )
+    c = _create_task(client, project["id"], "C", start, days=1)
+
+    res = client.get(f"/projects/{project['id']}/risk?samples=500&seed=7")
+    assert res.status_code == 200, res.text
+    body = res.json()
+    assert _dt(body["p50"]) <= _dt(body["p80"]) <= _dt(body["p95"])
+    assert _dt(body["p95"]) > start + timedelta(days=3)
+    criticality = {t["id"]: t["criticality"] for t in body["tasks"]}
+    assert criticality[b["id"]] == 1.0
+    assert criticality[c["id"]] == 0.0
+    assert 0 < criticality[a["id"]] < 1
+
+
+def test_duration_estimates_must_be_ordered(client):
+    project = _create_project(client, email="risk-order@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=2)
+    res = client.patch(f"/tasks/{a['id']}", json={"durationOptimistic": 3, "durationPessimistic": 2})
+    assert res.status_code == 400
+
+
+def test_recalculate_delta_view_returns_moved_windows_only(client):
+    project = _create_project(client, email="delta@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=2)
+    b = _create_task(
+        client, project["id"], "B", start, days=1,
+        dependencies=[{"predecessorId": a["id"], "type": "FS", "lag": 0}],
+    )
+    _create_task(client, project["id"], "C", start, days=1)
+    version = client.get(f"/projects/{project['id']}/schedule").json()["version"]
+
+    res = client.post(f"/projects/{project['id']}/tasks/recalculate?view=delta")
+    assert res.status_code == 200
+    body = res.json()
+    assert body["version"] == version + 1
+    assert [w["id"] for w in body["changed"]] == [b["id"]]
+    assert _dt(body["changed"][0]["planned_start"]) == start + timedelta(days=2)
+    assert _dt(client.get(f"/tasks/{b['id']}").json()["planned_start"]) == start + timedelta(days=2)
+
+    again = client.post(f"/projects/{project['id']}/tasks/recalculate?view=delta").json()
+    assert again["changed"] == []
+
+
+def test_background_recalculation_job(client):
+    project = _create_project(client, email="job@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=2)
+    b = _create_task(
+        client, project["id"], "B", start, days=1,
+        dependencies=[{"predecessorId": a["id"], "type": "FS", "lag": 0}],
+    )
+
+    res = client.post(f"/projects/{project['id']}/tasks/recalculate?background=true")
+    assert res.status_code == 202
+    job_id = res.json()["id"]
+    for _ in range(100):
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            break
+        time.sleep(0.05)
+    assert job["status"] == "done", job
+    assert job["progress"] == 1.0
+    assert [w["id"] for w in job["result"]["changed"]] == [b["id"]]
+    assert _dt(client.get(f"/tasks/{b['id']}").json()["planned_start"]) == start + timedelta(days=2)
+    assert client.get("/jobs/00000000-0000-0000-0000-000000000000").status_code == 404
+
+
+def test_concurrent_recalculations_coalesce_into_one_follow_up():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def recalc():
+        runs.append(len(runs) + 1)
+        if len(runs) == 1:
+            started.set()
+            release.wait(5)
+        return len(runs)
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("p", recalc)))
+    leader.start()
+    started.wait(5)
+    waiters = [threading.Thread(target=lambda: results.append(flights.do("p", recalc))) for _ in range(5)]
+    for t in waiters:
+        t.start()
+    time.sleep(0.05)
+    release.set()
+    for t in [leader, *waiters]:
+        t.join(5)
+
+    assert runs == [1, 2]
+    assert sorted(results) == [1, 2, 2, 2, 2, 2]
+
+
+def test_auto_scheduling_waits_for_a_running_recalculation(client, monkeypatch):
+    from app.core.scheduling import autoschedule
+
+    project_id = UUID(_create_project(client, email="auto-lock@example.com")["id"])
+    passes = []
+    monkeypatch.setattr(autoschedule, "reschedule_downstream", lambda db, pid, ids, pin: passes.append(pid))
+
+    # Пока полный пересчёт держит проект, автопланировщик ждёт и не перетирает его окна
+    with schedule_locks.hold(project_id):
+        worker = threading.Thread(target=autoschedule._reschedule, args=(project_id, set()))
+        worker.start()
+        worker.join(0.2)
+        assert passes == []
+    worker.join(5)
+    assert passes == [project_id]
+
+
+def test_task_edits_wait_for_a_running_recalculation(client):
+    project = _create_project(client, email="edit-lock@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=1)
+    responses = []
+
+    def edit():
+        responses.append(client.patch(f"/tasks/{a['id']}", json={"plannedStart": (start + timedelta(days=1)).isoformat()}))
+
+    with schedule_locks.hold(UUID(project["id"])):
+        worker = threading.Thread(target=edit)
+        worker.start()
+        worker.join(0.2)
+        assert responses == []
+    worker.join(5)
+    assert responses[0].status_code == 200, responses[0].text
+
+
+def test_auto_scheduled_tasks_are_rescheduled_once_per_burst(client, monkeypatch):
+    from app.core.scheduling.autoschedule import auto_scheduler
+
+    monkeypatch.setattr(auto_scheduler, "delay", 60)
+    project = _create_project(client, email="auto@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=2)
+    b = _create_task(
+        client, project["id"], "B", start + timedelta(days=2), days=1,
+        dependencies=[{"predecessorId": a["id"], "type": "FS", "lag": 0}],
+    )
+    res = client.patch(f"/tasks/{b['id']}", json={"autoScheduled": True})
+    assert res.status_code == 200
+    auto_scheduler.flush()
+
+    # Серия правок предшественника без синхронного распространения
+    for days in range(3, 8):
+        res = client.patch(f"/tasks/{a['id']}?propagate=false", json={"duration": days})
+        assert res.status_code == 200
+
+    assert _dt(client.get(f"/tasks/{b['id']}").json()["planned_start"]) == start + timedelta(days=2)
+    assert auto_scheduler.flush() == 1
+    assert _dt(client.get(f"/tasks/{b['id']}").json()["planned_start"]) == start + timedelta(days=7)
+    assert auto_scheduler.flush() == 0
+
+
+def test_alap_task_finishes_just_before_its_successor(client):
+    project = _create_project(client, email="alap@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=3)
+    b = _create_task(client, project["id"], "B", start, days=1)
+    client.patch(f"/tasks/{b['id']}", json={"scheduleMode": "ALAP"})
+    c = _create_task(
+        client, project["id"], "C", start, days=1,
+        dependencies=[
+            {"predecessorId": a["id"], "type": "FS", "lag": 0},
+            {"predecessorId": b["id"], "type": "FS", "lag": 0},
+        ],
+    )
+
+    res = client.post(f"/projects/{project['id']}/tasks/recalculate")
+    assert res.status_code == 200
+    tasks = _by_title(res.json())
+    assert tasks["B"]["schedule_mode"] == "ALAP"
+    assert _dt(tasks["B"]["planned_start"]) == start + timedelta(days=2)
+    assert _dt(tasks["B"]["planned_end"]) == start + timedelta(days=3)
+    assert _dt(tasks["C"]["planned_start"]) == start + timedelta(days=3)
+
+    # Позднее размещение не съедает резерв: ранние даты и резервы — из прямого прохода
+    body = client.get(f"/projects/{project['id']}/critical-path").json()
+    critical = {t["id"]: t for t in body["tasks"]}
+    assert _dt(critical[b["id"]]["early_start"]) == start
+    assert _dt(critical[b["id"]]["early_finish"]) == start + timedelta(days=1)
+    # Резерв B — два дня сверх резерва C до дедлайна проекта
+    assert critical[b["id"]]["free_float_hours"] == pytest.approx(48, abs=0.01)
+    assert critical[b["id"]]["total_float_hours"] == pytest.approx(
+        critical[c["id"]]["total_float_hours"] + 48, abs=0.01
+    )
+    assert critical[a["id"]]["total_float_hours"] == pytest.approx(
+        critical[c["id"]]["total_float_hours"], abs=0.01
+    )
+    assert b["id"] not in body["chain"]
+    assert a["id"] in body["chain"]
+
+    res = client.post(f"/projects/{project['id']}/schedule/level")
+    assert res.status_code == 200, res.text
+    assert res.json()["delays"] == []
+
+
+def test_project_deadline_overrun_is_reported_not_clamped(client):
+    project = _create_project(client, email="overrun@example.com", deadline_days=3)
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=2)
+    b = _create_task(
+        client, project["id"], "B", start, days=2,
+        dependencies=[{"predecessorId": a["id"], "type": "FS", "lag": 0}],
+    )
+
+    body = client.post(f"/projects/{project['id']}/tasks/recalculate?view=delta").json()
+    assert _dt(client.get(f"/tasks/{b['id']}").json()["planned_start"]) == start + timedelta(days=2)
+    assert [v["id"] for v in body["infeasible"]] == [b["id"]]
+    assert _dt(body["infeasible"][0]["planned_end"]) == start + timedelta(days=4)
+    assert body["infeasible"][0]["overrun_hours"] == pytest.approx(24, abs=0.1)
+
+    schedule = client.get(f"/projects/{project['id']}/schedule").json()
+    assert [v["id"] for v in schedule["infeasible"]] == [b["id"]]
+
+
+def test_team_calendar_skips_weekends_and_holidays(client):
+    project = _create_project(client, email="calendar@example.com")
+    today = datetime.utcnow().date()
+    friday = datetime.combine(today + timedelta(days=(4 - today.weekday()) % 7 + 7), datetime.min.time())
+    monday = friday + timedelta(days=3)
+    calendar = {
+        "timezone": "UTC",
+        "workStart": "09:00",
+        "workEnd": "17:00",
+        "workDays": [5, 4, 3, 2, 1],
+        "holidays": [monday.date().isoformat()],
+    }
+    res = client.put(f"/teams/{project['team_id']}/calendar", json=calendar)
+    assert res.status_code == 200, res.text
+    assert res.json()["work_days"] == [1, 2, 3, 4, 5]
+    res = client.put(f"/teams/{project['team_id']}/calendar", json=calendar)
+    assert res.json()["version"] == 2
+    assert client.get(f"/teams/{project['team_id']}/calendar").json()["holidays"] == [monday.date().isoformat()]
+
+    start = friday + timedelta(hours=9)
+    a = _create_task(client, project["id"], "A", start, days=1)
+    res = client.patch(f"/tasks/{a['id']}", json={"plannedStart": start.isoformat()})
+    assert _dt(res.json()["planned_end"]) == friday + timedelta(hours=17)
+    b = _create_task(
+        client, project["id"], "B", start, days=2,
+        dependencies=[{"predecessorId": a["id"], "type": "FS", "lag": 0}],
+    )
+
+    tasks = _by_title(client.post(f"/projects/{project['id']}/tasks/recalculate").json())
+    assert _dt(tasks["B"]["planned_start"]) == friday + timedelta(hours=17)
+    # Выходные и праздничный понедельник пропускаются: вторник и среда
+    assert _dt(tasks["B"]["planned_end"]) == monday + timedelta(days=2, hours=17)
+
+    assert client.delete(f"/teams/{project['team_id']}/calendar").status_code == 204
+    assert client.get(f"/teams/{project['team_id']}/calendar").status_code == 404
+    assert client.get(f"/tasks/{b['id']}").status_code == 200
+
+
+def test_risk_analysis_counts_working_time_of_team_calendar(client):
+    pytest.importorskip("numpy")
+    project = _create_project(client, email="risk-calendar@example.com")
+    today = datetime.utcnow().date()
+    friday = datetime.combine(today + timedelta(days=(4 - today.weekday()) % 7 + 7), datetime.min.time())
+    calendar = {"timezone": "UTC", "workStart": "09:00", "workEnd": "17:00", "workDays": [1, 2, 3, 4, 5]}
+    assert client.put(f"/teams/{project['team_id']}/calendar", json=calendar).status_code == 200
+
+    start = friday + timedelta(hours=9)
+    a = _create_task(client, project["id"], "A", start, days=1)
+    _create_task(
+        client, project["id"], "B", start, days=2,
+        dependencies=[{"predecessorId": a["id"], "type": "FS", "lag": 0}],
+    )
+    assert client.post(f"/projects/{project['id']}/tasks/recalculate").status_code == 200
+
+    res = client.get(f"/projects/{project['id']}/risk?samples=100&seed=1")
+    assert res.status_code == 200, res.text
+    body = res.json()
+    # Без трёхточечных оценок разброса нет: все перцентили совпадают с планом
+    assert _dt(body["planned_finish"]) == friday + timedelta(days=4, hours=17)
+    assert _dt(body["p50"]) == _dt(body["p95"]) == _dt(body["planned_finish"])
+
+
+def test_team_calendar_rejects_empty_working_day(client):
+    team = _create_team(client, "Night shift")
+    res = client.put(f"/teams/{team['id']}/calendar", json={"workStart": "18:00", "workEnd": "09:00"})
+    assert res.status_code == 422
+
+
+def test_leveling_delays_tasks_of_an_overbooked_assignee(client):
+    project = _create_project(client, email="level@example.com")
+    team_id = project["team_id"]
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=2)
+    b = _create_task(client, project["id"], "B", start, days=1)
+    _create_task(client, project["id"], "C", start, days=1)
+    for task in (a, b):
+        res = client.patch(f"/tasks/{task['id']}", json={"assigneeIds": [team_id]})
+        assert res.status_code == 200
+
+    # Тот же исполнитель занят в другом проекте первые полдня
+    tokens = _login(client, "level@example.com", "Passw0rd1").json()
+    other = client.post(
+        "/projects",
+        headers=_auth_headers(tokens["access_token"]),
+        json={
+            "title": "Other",
+            "description": "Other project",
+            "teamId": team_id,
+            "outcome": {
+                "description": "Deliverable",
+                "acceptanceCriteria": "Done",
+                "deadline": (start + timedelta(days=60)).isoformat(),
+                "result": None,
+            },
+        },
+    ).json()
+    busy = _create_task(client, other["id"], "Busy", start, days=0.5)
+    client.patch(f"/tasks/{busy['id']}", json={"assigneeIds": [team_id]})
+
+    preview = client.post(f"/projects/{project['id']}/schedule/level")
+    assert preview.status_code == 200, preview.text
+    body = preview.json()
+    assert body["applied"] is False
+    delays = {d["id"]: d for d in body["delays"]}
+    assert set(delays) == {a["id"], b["id"]}
+    # A (меньше резерв) идёт первой сразу после чужой задачи, B — после A
+    assert _dt(delays[a["id"]]["leveled_start"]) == start + timedelta(hours=12)
+    assert _dt(delays[b["id"]]["leveled_start"]) == start + timedelta(days=2, hours=12)
+    assert delays[b["id"]]["delay_hours"] == pytest.approx(60)
+    assert _dt(client.get(f"/tasks/{b['id']}").json()["planned_start"]) == start
+
+    applied = client.post(f"/projects/{project['id']}/schedule/level?apply=true").json()
+    assert applied["applied"] is True
+    assert _dt(applied["finish_after"]) == start + timedelta(days=3, hours=12)
+    assert _dt(client.get(f"/tasks/{b['id']}").json()["planned_start"]) == start + timedelta(days=2, hours=12)
+    assert client.post(f"/projects/{project['id']}/schedule/level").json()["delays"] == []
+
+
+def test_team_workload_matrix(client):
+    project = _create_project(client, email="workload@example.com")
+    team_id = project["team_id"]
+    day0 = datetime.combine(datetime.utcnow().date() + timedelta(days=1), datetime.min.time())
+    a = _create_task(client, project["id"], "A", day0, days=2)
+    b = _create_task(client, project["id"], "B", day0 + timedelta(days=1), days=1)
+    _create_task(client, project["id"], "Unassigned", day0, days=3)
+    for task in (a, b):
+        client.patch(f"/tasks/{task['id']}?propagate=false", json={"assigneeIds": [team_id]})
+
+    to = (day0 + timedelta(days=3)).date().isoformat()
+    res = client.get(f"/teams/{team_id}/workload", params={"from": day0.date().isoformat(), "to": to})
+    assert res.status_code == 200, res.text
+    body = res.json()
+    assert len(body["starts"]) == 3
+    assert len(body["user_ids"]) == 1
+    assert body["hours"] == [[24.0, 48.0, 0.0]]
+    assert body["peak"] == [[1, 2, 0]]
+
+    weekly = client.get(
+        f"/teams/{team_id}/workload", params={"from": day0.date().isoformat(), "to": to, "bucket": "week"}
+    ).json()
+    assert sum(sum(row) for row in weekly["hours"]) == pytest.approx(72.0)
+    assert _dt(weekly["starts"][0]).weekday() == 0
+
+    bad = client.get(f"/teams/{team_id}/workload", params={"from": to, "to": day0.date().isoformat()})
+    assert bad.status_code == 400
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+def test_baseline_variance_lists_largest_slips_first(client, monkeypatch, vectorized):
+    if vectorized:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(baselines, "np", None)
+    project = _create_project(client, email=f"baseline-{vectorized}@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=1)
+    b = _create_task(
+        client, project["id"], "B", start + timedelta(days=2), days=1,
+        dependencies=[{"predecessorId": a["id"], "type": "FS", "lag": 0}],
+    )
+    _create_task(client, project["id"], "Other", start, days=1)
+
+    res = client.post(f"/projects/{project['id']}/baselines", json={"name": "v1"})
+    assert res.status_code == 201, res.text
+    assert res.json()["task_count"] == 3
+    again = client.post(f"/projects/{project['id']}/baselines", json={"name": "v1"})
+    assert again.status_code == 409
+    listed = client.get(f"/projects/{project['id']}/baselines").json()
+    assert [item["name"] for item in listed] == ["v1"]
+
+    client.patch(f"/tasks/{a['id']}", json={"plannedStart": (start + timedelta(days=2)).isoformat()})
+    c = _create_task(client, project["id"], "C", start, days=1)
+
+    variance = client.get(f"/projects/{project['id']}/baselines/v1/variance")
+    assert variance.status_code == 200, variance.text
+    body = variance.json()
+    assert body["compared"] == 3
+    assert body["late"] == 2
+    assert body["added"] == [c["id"]]
+    assert body["removed"] == []
+    # A сдвинута на двое суток, B съела день резерва и сдвинута на сутки
+    assert [slip["id"] for slip in body["slips"]] == [a["id"], b["id"]]
+    assert [slip["finish_slip_hours"] for slip in body["slips"]] == [48.0, 24.0]
+    assert _dt(body["slips"][1]["baseline_start"]) == start + timedelta(days=2)
+    assert body["finish_slip_hours"] == pytest.approx(24.0)
+
+    limited = client.get(f"/projects/{project['id']}/baselines/v1/variance?limit=1").json()
+    assert [slip["id"] for slip in limited["slips"]] == [a["id"]]
+
+    etag = variance.headers["etag"]
+    assert client.get(f"/projects/{project['id']}/baselines/v1/variance?limit=1").headers["etag"] != etag
+    assert client.delete(f"/projects/{project['id']}/baselines/v1").status_code == 204
+    assert client.get(f"/projects/{project['id']}/baselines/v1/variance").status_code == 404
+
+    # Пересозданный под тем же именем план — другой ответ, старый ETag не подходит
+    assert client.post(f"/projects/{project['id']}/baselines", json={"name": "v1"}).status_code == 201
+    fresh = client.get(f"/projects/{project['id']}/baselines/v1/variance", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.json()["slips"] == []
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+def test_earned_value_of_project_and_team(client, monkeypatch, vectorized):
+    if vectorized:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(earned_value, "np", None)
+    email = f"earned-{vectorized}@example.com"
+    project = _create_project(client, email=email)
+    token = _login(client, email, "Passw0rd1").json()["access_token"]
+    base = datetime.utcnow().replace(microsecond=0) - timedelta(days=1)
+    a = _create_task(client, project["id"], "A", base - timedelta(days=3), days=2)
+    _create_task(client, project["id"], "B", base, days=2)
+    parent = _create_task(client, project["id"], "Parent", base + timedelta(days=10), days=5)
+    _create_task(client, project["id"], "Child", base + timedelta(days=10), days=1, parent_id=parent["id"])
+    canceled = _create_task(client, project["id"], "Canceled", base - timedelta(days=3), days=3)
+    headers = _auth_headers(token)
+    assert client.post(f"/tasks/{a['id']}/complete", headers=headers).status_code == 200
+    assert client.post(f"/tasks/{canceled['id']}/cancel", headers=headers).status_code == 200
+
+    as_of = base + timedelta(days=1, hours=1)
+    res = client.get(f"/projects/{project['id']}/earned-value", params={"asOf": as_of.isoformat()})
+    assert res.status_code == 200, res.text
+    body = res.json()
+    planned = 2 + 2 * 25 / 48
+    assert body["tasks"] == 3
+    assert body["budget_at_completion"] == pytest.approx(5)
+    assert body["planned_value"] == pytest.approx(planned)
+    assert body["earned_value"] == pytest.approx(2)
+    assert body["schedule_variance"] == pytest.approx(2 - planned)
+    assert body["spi"] == pytest.approx(2 / planned)
+    assert body["percent_complete"] == pytest.approx(0.4)
+
+    # До начала проекта ничего не запланировано и не сделано
+    early = client.get(
+        f"/projects/{project['id']}/earned-value", params={"asOf": (base - timedelta(days=5)).isoformat()}
+    ).json()
+    assert early["planned_value"] == 0 and early["earned_value"] == 0 and early["spi"] is None
+
+    team = client.get(f"/teams/{project['team_id']}/earned-value", params={"asOf": as_of.isoformat()})
+    assert team.status_code == 200, team.text
+    team_body = team.json()
+    assert [p["project_id"] for p in team_body["projects"]] == [project["id"]]
+    assert team_body["total"]["earned_value"] == pytest.approx(2)
+    assert team_body["total"]["planned_value"] == pytest.approx(planned)
+    assert client.get(f"/projects/{project['team_id']}/earned-value").status_code == 404
+
+
+def test_gantt_feed_is_columnar(client):
+    project = _create_project(client, email="gantt@example.com")
+    start = datetime.utcnow().replace(microsecond=0)
+    a = _create_task(client, project["id"], "A", start, days=1)
+    parent = _create_task(client, project["id"], "Parent", start + timedelta(days=1), days=3)
+    child = _create_task(
+        client, project["id"], "Child", start + timedelta(days=1), days=1, parent_id=parent["id"],
+        dependencies=[{"predecessorId": a["id"], "type": "FS", "lag": 2}],
+    )
+
+    res = client.get(f"/projects/{project['id']}/gantt")
+    assert res.status_code == 200, res.text
+    body = res.json()
+    ids = body["ids"]
+    assert set(ids) == {a["id"], parent["id"], child["id"]}
+    assert len(body["titles"]) == len(body["starts"]) == len(body["ends"]) == len(body["parents"]) == 3
+    row = ids.index(child["id"])
+    assert body["parents"][row] == ids.index(parent["id"])
+    assert body["parents"][ids.index(a["id"])] == -1
+    edges = set(zip(body["edge_from"], body["edge_to"], body["edge_types"], body["edge_lags"]))
+    assert (ids.index(a["id"]), row, "FS", 2) in edges
+    a_row = ids.index(a["id"])
+    assert body["ends"][a_row] - body["starts"][a_row] == 24 * 3600 * 1000
+    assert datetime.utcfromtimestamp(body["starts"][a_row] / 1000) == _dt(a["planned_start"])
+
+    full = client.get(f"/projects/{project['id']}/tasks")
+    assert len(res.content) * 3 < len(full.content)
+    cached = client.get(f"/projects/{project['id']}/gantt", headers={"If-None-Match": res.headers["ETag"]})
+    assert cached.status_code == 304
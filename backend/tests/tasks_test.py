@@ -1,4 +1,8 @@
+import csv
+import io
+import json
 from datetime import datetime, timedelta
+from uuid import uuid4
 
 
 def _register(client, email, password):
@@ -180,3 +184,346 @@ def test_complete_task_all_assignees_flow(client):
     )
     assert second_complete.status_code == 200
     assert second_complete.json()["status"] == "Done"
+
+
+def test_batch_import_links_tasks_by_key(client):
+    user = _register(client, "batch@example.com", "Passw0rd1").json()
+    tokens = _login(client, "batch@example.com", "Passw0rd1").json()
+    team = _create_team(client, "Batch Team")
+    _add_member(client, team["id"], user["id"])
+    project = _create_project(client, tokens["access_token"], team["id"])
+
+    start = datetime.utcnow()
+    parent = _task_payload("Parent", start, start + timedelta(days=5))
+    child = _task_payload("Child", start, start + timedelta(days=2), assignee_ids=[user["id"]])
+    child.update(key="child", parentKey="parent")
+    follow = _task_payload("Follow", start, start + timedelta(days=1), assignee_ids=[team["id"]])
+    follow.update(key="follow", dependencies=[{"predecessorKey": "child", "type": "FS", "lag": 0}])
+    parent.update(key="parent")
+
+    res = client.post(f"/projects/{project['id']}/tasks:batch", json={"tasks": [child, follow, parent]})
+    assert res.status_code == 201, res.text
+    ids = res.json()["ids"]
+    assert res.json()["created"] == 3
+
+    child_out = client.get(f"/tasks/{ids['child']}").json()
+    assert child_out["parent_id"] == ids["parent"]
+    assert child_out["assignee_ids"] == [user["id"]]
+    follow_out = client.get(f"/tasks/{ids['follow']}").json()
+    assert [d["predecessor_task_id"] for d in follow_out["dependencies"]] == [ids["child"]]
+    assert follow_out["assignee_ids"] == [user["id"]]
+
+
+def test_batch_import_is_all_or_nothing(client):
+    user = _register(client, "batch-fail@example.com", "Passw0rd1").json()
+    tokens = _login(client, "batch-fail@example.com", "Passw0rd1").json()
+    team = _create_team(client, "Batch Fail Team")
+    _add_member(client, team["id"], user["id"])
+    project = _create_project(client, tokens["access_token"], team["id"])
+
+    start = datetime.utcnow()
+    a = _task_payload("A", start, start + timedelta(days=1))
+    a.update(key="a", dependencies=[{"predecessorKey": "b", "type": "FS", "lag": 0}])
+    b = _task_payload("B", start, start + timedelta(days=1))
+    b.update(key="b", dependencies=[{"predecessorKey": "a", "type": "FS", "lag": 0}])
+    res = client.post(f"/projects/{project['id']}/tasks:batch", json={"tasks": [a, b]})
+    assert res.status_code == 409
+    assert len(res.json()["detail"]["path"]) == 3
+
+    parent = _task_payload("Parent", start, start + timedelta(days=1))
+    parent.update(key="parent")
+    late = _task_payload("Late", start, start + timedelta(days=3))
+    late.update(key="late", parentKey="parent")
+    res = client.post(f"/projects/{project['id']}/tasks:batch", json={"tasks": [parent, late]})
+    assert res.status_code == 400
+
+    assert client.get(f"/projects/{project['id']}/tasks").json() == []
+
+
+def _populate_project(client, email, count):
+    """Project with ``count`` chained tasks, each with assignees and a reviewer."""
+    user = _register(client, email, "Passw0rd1").json()
+    tokens = _login(client, email, "Passw0rd1").json()
+    team = _create_team(client, f"Team {email}")
+    _add_member(client, team["id"], user["id"])
+    project = _create_project(client, tokens["access_token"], team["id"])
+
+    start = datetime.utcnow().replace(microsecond=0)
+    ids = []
+    previous = None
+    for i in range(count):
+        payload = _task_payload(f"Task {i}", start, start + timedelta(days=2), assignee_ids=[team["id"]])
+        if previous:
+            payload["dependencies"] = [{"predecessorId": previous, "type": "FS", "lag": 0}]
+        res = client.post(f"/projects/{project['id']}/tasks", json=payload)
+        assert res.status_code == 201, res.text
+        previous = res.json()["id"]
+        ids.append(previous)
+        review = client.post(f"/tasks/{previous}/reviews", json={"reviewerId": user["id"]})
+        assert review.status_code == 201, review.text
+    return project, ids
+
+
+def _query_count(response):
+    assert response.status_code == 200, response.text
+    return int(response.headers["X-Query-Count"])
+
+
+def test_task_endpoints_issue_constant_number_of_queries(client):
+    projects = {
+        "small": _populate_project(client, "few@example.com", 2),
+        "large": _populate_project(client, "many@example.com", 8),
+    }
+
+    counts = {}
+    for name, (project, ids) in projects.items():
+        listed = client.get(f"/projects/{project['id']}/tasks")
+        assert all(task["reviews"][0]["reviewer_email"] for task in listed.json())
+        # Сдвигаем первую задачу без распространения, чтобы пересчёт двигал всю цепочку
+        moved = datetime.utcnow() + timedelta(days=5)
+        client.patch(f"/tasks/{ids[0]}?propagate=false", json={"plannedStart": moved.isoformat()})
+        recalculated = client.post(f"/projects/{project['id']}/tasks/recalculate")
+        assert len({t["planned_start"] for t in recalculated.json()}) == len(ids)
+        counts[name] = (
+            _query_count(listed),
+            _query_count(client.get(f"/tasks/{ids[-1]}")),
+            _query_count(recalculated),
+        )
+    assert counts["small"] == counts["large"]
+
+
+def _walk_pages(client, url, limit):
+    items, pages, cursor = [], 0, None
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        res = client.get(url, params=params)
+        assert res.status_code == 200, res.text
+        items.extend(res.json())
+        pages += 1
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            return items, pages
+
+
+def test_cursor_pagination_of_tasks_and_comments(client):
+    user = _register(client, "pages@example.com", "Passw0rd1").json()
+    tokens = _login(client, "pages@example.com", "Passw0rd1").json()
+    team = _create_team(client, "Team Pages")
+    _add_member(client, team["id"], user["id"])
+    project = _create_project(client, tokens["access_token"], team["id"])
+
+    start = datetime.utcnow().replace(microsecond=0)
+    created = []
+    for i in range(5):
+        # Две задачи с одинаковым стартом: порядок между ними задаёт id
+        task_start = start + timedelta(days=min(i, 3))
+        res = client.post(
+            f"/projects/{project['id']}/tasks",
+            json=_task_payload(f"Task {i}", task_start, task_start + timedelta(days=1)),
+        )
+        assert res.status_code == 201
+        created.append(res.json())
+
+    items, pages = _walk_pages(client, f"/projects/{project['id']}/tasks", limit=2)
+    assert pages == 3
+    assert sorted(t["id"] for t in items) == sorted(t["id"] for t in created)
+    assert [(t["planned_start"], t["id"]) for t in items] == sorted((t["planned_start"], t["id"]) for t in items)
+
+    bad = client.get(f"/projects/{project['id']}/tasks", params={"cursor": "not-a-cursor"})
+    assert bad.status_code == 400
+
+    task_id = created[0]["id"]
+    for i in range(3):
+        res = client.post(
+            f"/tasks/{task_id}/comments",
+            json={"text": f"Comment {i}"},
+            headers=_auth_headers(tokens["access_token"]),
+        )
+        assert res.status_code == 201, res.text
+    comments, pages = _walk_pages(client, f"/tasks/{task_id}/comments", limit=2)
+    assert pages == 2
+    assert [c["text"] for c in comments] == ["Comment 0", "Comment 1", "Comment 2"]
+
+    for task in created[:3]:
+        assert client.post(f"/tasks/{task['id']}/reviews", json={"reviewerId": user["id"]}).status_code == 201
+    headers = _auth_headers(tokens["access_token"])
+    first = client.get("/reviews/tasks", params={"limit": 2}, headers=headers)
+    assert len(first.json()) == 2
+    rest = client.get(
+        "/reviews/tasks", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]}, headers=headers
+    )
+    assert "X-Next-Cursor" not in rest.headers
+    reviews = first.json() + rest.json()
+    # Новые ревью первыми
+    assert [r["task"]["id"] for r in reviews] == [t["id"] for t in reversed(created[:3])]
+
+
+def test_export_streams_tasks_as_ndjson_and_csv(client):
+    project, ids = _populate_project(client, "export@example.com", 3)
+
+    res = client.get(f"/projects/{project['id']}/tasks/export")
+    assert res.status_code == 200, res.text
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    records = {r["id"]: r for r in map(json.loads, res.text.splitlines())}
+    assert set(records) == set(ids)
+    assert records[ids[0]]["dependencies"] == []
+    assert records[ids[1]]["dependencies"] == [{"predecessor_task_id": ids[0], "type": "FS", "lag": 0}]
+    assert records[ids[2]]["outcome_acceptance_criteria"] == "AC"
+    assert records[ids[2]]["status"] == "Planned"
+
+    res = client.get(f"/projects/{project['id']}/tasks/export", params={"format": "csv"})
+    assert res.status_code == 200, res.text
+    rows = {r["id"]: r for r in csv.DictReader(io.StringIO(res.text))}
+    assert set(rows) == set(ids)
+    assert rows[ids[2]]["dependencies"] == f"{ids[1]}:FS:0"
+    assert rows[ids[0]]["parent_id"] == ""
+
+    assert client.get(f"/projects/{ids[0]}/tasks/export").status_code == 404
+
+
+def test_import_round_trips_export_and_resolves_forward_references(client):
+    source, ids = _populate_project(client, "import-src@example.com", 3)
+    target, _ = _populate_project(client, "import-dst@example.com", 1)
+    url = f"/projects/{target['id']}/tasks/import"
+
+    ndjson = client.get(f"/projects/{source['id']}/tasks/export").content
+    res = client.post(url, files={"file": ("tasks.ndjson", ndjson)})
+    assert res.status_code == 201, res.text
+    assert res.json()["created"] == 3
+    assert res.json()["dependencies"] == 2
+
+    exported = client.get(f"/projects/{source['id']}/tasks/export", params={"format": "csv"}).content
+    res = client.post(url, files={"file": ("tasks.csv", exported)})
+    assert res.status_code == 201, res.text
+
+    tasks = client.get(f"/projects/{target['id']}/tasks", params={"limit": 50}).json()
+    assert len(tasks) == 7
+    by_id = {t["id"]: t for t in tasks}
+    copies = [t for t in tasks if t["title"] == "Task 2"]
+    assert len(copies) == 2
+    for task in copies:
+        # Связи указывают на импортированные копии, а не на задачи исходного проекта
+        (dep,) = task["dependencies"]
+        assert by_id[dep["predecessor_task_id"]]["title"] == "Task 1"
+        assert datetime.fromisoformat(task["planned_start"]) >= datetime.fromisoformat(
+            by_id[dep["predecessor_task_id"]]["planned_end"]
+        )
+
+    # Подзадача и связь стоят в файле раньше родителя и предшественника
+    start = datetime(2030, 1, 1)
+    lines = [
+        {"id": "child", "parent_id": "parent", "title": "Child",
+         "planned_start": start.isoformat(), "planned_end": (start + timedelta(days=1)).isoformat()},
+        {"id": "next", "title": "Next", "dependencies": [{"predecessor_task_id": "parent", "type": "FS", "lag": 0}],
+         "planned_start": start.isoformat(), "planned_end": (start + timedelta(days=1)).isoformat()},
+        {"id": "parent", "title": "Parent",
+         "planned_start": start.isoformat(), "planned_end": (start + timedelta(days=3)).isoformat()},
+    ]
+    body = "\n".join(json.dumps(line) for line in lines).encode()
+    res = client.post(url, files={"file": ("tasks.ndjson", body)})
+    assert res.status_code == 201, res.text
+    tasks = {t["title"]: t for t in client.get(f"/projects/{target['id']}/tasks", params={"limit": 50}).json()}
+    assert tasks["Child"]["parent_id"] == tasks["Parent"]["id"]
+    assert datetime.fromisoformat(tasks["Next"]["planned_start"]).replace(tzinfo=None) >= \
+        datetime.fromisoformat(tasks["Parent"]["planned_end"]).replace(tzinfo=None)
+
+    cycle = [
+        {"id": "a", "title": "A", "dependencies": [{"predecessor_task_id": "b"}],
+         "planned_start": start.isoformat(), "planned_end": (start + timedelta(days=1)).isoformat()},
+        {"id": "b", "title": "B", "dependencies": [{"predecessor_task_id": "a"}],
+         "planned_start": start.isoformat(), "planned_end": (start + timedelta(days=1)).isoformat()},
+    ]
+    body = "\n".join(json.dumps(line) for line in cycle).encode()
+    res = client.post(url, files={"file": ("tasks.ndjson", body)})
+    assert res.status_code == 409
+    assert res.json()["detail"]["tasks"] == [{"key": "a", "line": 1}, {"key": "b", "line": 2}]
+    res = client.post(url, files={"file": ("tasks.ndjson", b'{"id": "x", "title": "X"}\n')})
+    assert res.status_code == 400
+    assert res.json()["detail"].startswith("Line 1:")
+    assert len(client.get(f"/projects/{target['id']}/tasks", params={"limit": 50}).json()) == 10
+
+
+def test_import_rejects_malformed_files_with_line_numbers(client):
+    project, _ = _populate_project(client, "import-bad@example.com", 1)
+    url = f"/projects/{project['id']}/tasks/import"
+
+    # Смещение только у одной из дат переводится в UTC, а не роняет сравнение
+    row = {"id": "tz", "title": "Offset", "planned_start": "2030-01-01T12:00:00+03:00",
+           "planned_end": "2030-01-01T10:00:00"}
+    res = client.post(url, files={"file": ("tasks.ndjson", json.dumps(row).encode())})
+    assert res.status_code == 201, res.text
+    (task,) = [t for t in client.get(f"/projects/{project['id']}/tasks").json() if t["title"] == "Offset"]
+    assert task["planned_start"].startswith("2030-01-01T09:00:00")
+
+    body = json.dumps({**row, "id": "ok"}).encode() + b"\n\xff\xfe garbage\n"
+    res = client.post(url, files={"file": ("tasks.ndjson", body)})
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Line 2: file is not valid UTF-8"
+    res = client.post(url, files={"file": ("tasks.csv", b'id,title\n"a,"b\n')})
+    assert res.status_code == 400
+    assert res.json()["detail"].startswith("Line 2:")
+
+    window = {"planned_start": "2030-01-01T00:00:00", "planned_end": "2030-01-02T00:00:00"}
+    rows = [
+        {"id": "a", "title": "A", **window},
+        {"id": "b", "title": "B", **window, "dependencies": [
+            {"predecessor_task_id": "a", "type": "FS", "lag": 0},
+            {"predecessor_task_id": "a", "type": "SS", "lag": 5},
+        ]},
+    ]
+    body = "\n".join(json.dumps(r) for r in rows).encode()
+    res = client.post(url, files={"file": ("tasks.ndjson", body)})
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Line 2: conflicting dependencies on 'a'"
+
+    # Явная копия связи родителя (как в экспорте) пропускается, отличающаяся — нет
+    rows = [
+        {"id": "p", "title": "P", **window, "dependencies": [{"predecessor_task_id": "c", "type": "FF", "lag": 0}]},
+        {"id": "c", "title": "C", "parent_id": "p", **window,
+         "dependencies": [{"predecessor_task_id": "p", "type": "SS", "lag": 0}]},
+    ]
+    body = "\n".join(json.dumps(r) for r in rows).encode()
+    res = client.post(url, files={"file": ("tasks.ndjson", body)})
+    assert res.status_code == 201, res.text
+    assert res.json()["dependencies"] == 2
+    rows[1]["dependencies"][0]["type"] = "FS"
+    body = "\n".join(json.dumps(r) for r in rows).encode()
+    assert client.post(url, files={"file": ("tasks.ndjson", body)}).status_code == 400
+
+
+def test_import_copy_buffer_uses_postgres_text_format():
+    from app.core.api.transfer import _copy_buffer
+    from app.core.models.enums import DepType, TaskStatus
+
+    task_id, outcome_id = uuid4(), uuid4()
+    rows = [
+        {
+            "id": task_id,
+            "title": "Tab\there\\N",
+            "description": "line\nbreak",
+            "status": TaskStatus.InProgress,
+            "duration": 1.5,
+            "deadline": None,
+            "planned_start": datetime(2030, 1, 2, 3, 4, 5),
+            "auto_scheduled": True,
+            "outcome_task_id": outcome_id,
+        },
+        {"id": task_id, "title": "", "description": "", "status": TaskStatus.Planned, "duration": 2,
+         "deadline": None, "planned_start": datetime(2030, 1, 2), "auto_scheduled": False,
+         "outcome_task_id": outcome_id},
+    ]
+    lines = _copy_buffer(rows, list(rows[0])).getvalue().split("\n")
+    assert lines[0].split("\t") == [
+        str(task_id), "Tab\\there\\\\N", "line\\nbreak", "InProgress", "1.5", "\\N",
+        "2030-01-02T03:04:05", "t", str(outcome_id),
+    ]
+    # Пустая строка остаётся пустой строкой, NULL пишется только как \N
+    assert lines[1].split("\t")[1:6] == ["", "", "Planned", "2", "\\N"]
+    assert lines[1].split("\t")[7] == "f"
+    assert lines[2] == ""
+
+    dep = {"id": task_id, "predecessor_task_id": outcome_id, "successor_task_id": task_id,
+           "type": DepType.SF, "lag": -2}
+    assert _copy_buffer([dep], list(dep)).getvalue() == f"{task_id}\t{outcome_id}\t{task_id}\tSF\t-2\n"